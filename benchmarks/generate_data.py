@@ -0,0 +1,239 @@
+"""
+Generate synthetic NPPES pipeline inputs at benchmark scale.
+
+The NPPES file keeps the full schema of nppes_sample.csv: sample rows are
+resampled with fresh NPIs, practice ZIPs and taxonomy slots so that the
+county and taxonomy joins behave like the real data. The reference files
+(ZIP crosswalk, SSA FIPS, NUCC taxonomy, census population) are generated
+to match.
+
+    python -m benchmarks.generate_data --rows 1000000 --output-dir bench_data
+"""
+
+import argparse
+import json
+import os
+
+import numpy
+import polars
+import pyarrow.parquet
+
+SAMPLE_FILE = os.path.join(os.path.dirname(__file__), "..", "nppes_sample.csv")
+
+STATES = {
+    "01": ("AL", "ALABAMA"), "04": ("AZ", "ARIZONA"), "06": ("CA", "CALIFORNIA"),
+    "08": ("CO", "COLORADO"), "12": ("FL", "FLORIDA"), "13": ("GA", "GEORGIA"),
+    "17": ("IL", "ILLINOIS"), "18": ("IN", "INDIANA"), "21": ("KY", "KENTUCKY"),
+    "25": ("MA", "MASSACHUSETTS"), "26": ("MI", "MICHIGAN"), "27": ("MN", "MINNESOTA"),
+    "29": ("MO", "MISSOURI"), "31": ("NE", "NEBRASKA"), "36": ("NY", "NEW YORK"),
+    "37": ("NC", "NORTH CAROLINA"), "39": ("OH", "OHIO"), "42": ("PA", "PENNSYLVANIA"),
+    "47": ("TN", "TENNESSEE"), "48": ("TX", "TEXAS"), "51": ("VA", "VIRGINIA"),
+    "53": ("WA", "WASHINGTON"), "55": ("WI", "WISCONSIN"),
+}
+
+TAXONOMY_GROUPINGS = [
+    "Allopathic & Osteopathic Physicians",
+    "Behavioral Health & Social Service Providers",
+    "Nursing Service Providers",
+    "Hospitals",
+    "Ambulatory Health Care Facilities",
+]
+
+TAXONOMY_SLOTS = 15
+
+
+def generate_counties(num_counties, rng):
+    state_fips = numpy.array(sorted(STATES))
+    counties = polars.DataFrame(
+        {
+            "state_fips": state_fips[numpy.arange(num_counties) % len(state_fips)],
+            "county_fips": [
+                f"{2 * (n // len(state_fips)) + 1:03d}" for n in range(num_counties)
+            ],
+            "population": rng.integers(1_000, 2_000_000, num_counties),
+        }
+    )
+    return counties.with_columns(
+        (polars.col("state_fips") + polars.col("county_fips")).alias("fips"),
+        polars.col("state_fips").replace_strict({k: v[0] for k, v in STATES.items()}).alias("state"),
+        polars.col("state_fips").replace_strict({k: v[1] for k, v in STATES.items()}).alias("state_name"),
+        polars.format("COUNTY {} {}", polars.col("state_fips"), polars.col("county_fips")).alias("county_name"),
+    )
+
+
+def generate_zip_county(counties, num_zips, rng):
+    # Every ZIP maps to one to three counties of one state, like the crosswalk
+    zips = [f"{n:05d}" for n in range(10_000, 10_000 + num_zips)]
+    county_rows = counties.to_dicts()
+    state_counties = {}
+    for county in county_rows:
+        state_counties.setdefault(county["state_fips"], []).append(county)
+    rows = []
+    for zip_code, county_index in zip(zips, rng.integers(0, len(county_rows), num_zips)):
+        home = county_rows[county_index]
+        same_state = state_counties[home["state_fips"]]
+        picks = [home] + [same_state[i] for i in rng.integers(0, len(same_state), rng.integers(0, 3))]
+        ratios = rng.dirichlet(numpy.ones(len(picks)))
+        for county, ratio in zip(picks, ratios):
+            rows.append(
+                {
+                    "ZIP": zip_code,
+                    "COUNTY": county["fips"],
+                    "USPS_ZIP_PREF_CITY": f"CITY {zip_code}",
+                    "USPS_ZIP_PREF_STATE": county["state"],
+                    "RES_RATIO": round(float(ratio), 10),
+                    "BUS_RATIO": round(float(ratio), 10),
+                    "OTH_RATIO": round(float(ratio), 10),
+                    "TOT_RATIO": round(float(ratio), 10),
+                }
+            )
+    return polars.DataFrame(rows).unique(["ZIP", "COUNTY"], keep="first", maintain_order=True)
+
+
+def generate_ssa_fips(counties):
+    return counties.select(
+        polars.col("fips").alias("fipscounty"),
+        polars.col("county_name").alias("countyname_fips"),
+        "state",
+        polars.lit("99999").alias("cbsa_code"),
+        polars.lit("RURAL").alias("cbsa_name"),
+        polars.col("fips").alias("ssa_code"),
+        polars.col("state_name"),
+        polars.col("county_name").alias("countyname_rate"),
+    )
+
+
+def generate_census_population(counties):
+    header = [["NAME", "B01001_001E", "state", "county"]]
+    return header + [
+        [f"{row['county_name']}, {row['state_name']}", str(row["population"]), row["state_fips"], row["county_fips"]]
+        for row in counties.iter_rows(named=True)
+    ]
+
+
+def generate_taxonomy(sample_df, num_codes):
+    sample_codes = (
+        polars.concat(
+            [sample_df[f"Healthcare Provider Taxonomy Code_{slot}"] for slot in range(1, TAXONOMY_SLOTS + 1)]
+        )
+        .drop_nulls()
+        .unique()
+        .sort()
+        .to_list()
+    )
+    codes = sample_codes + [f"{n:09d}X" for n in range(max(0, num_codes - len(sample_codes)))]
+    return polars.DataFrame(
+        {
+            "Code": codes,
+            "Grouping": [TAXONOMY_GROUPINGS[i % len(TAXONOMY_GROUPINGS)] for i in range(len(codes))],
+            "Classification": [f"Classification {i % 97}" for i in range(len(codes))],
+            "Specialization": [f"Specialization {i}" if i % 3 else None for i in range(len(codes))],
+        }
+    )
+
+
+def generate_nppes_chunk(sample_df, start_npi, num_rows, zip_codes, taxonomy_codes, rng):
+    chunk = sample_df[rng.integers(0, sample_df.height, num_rows)]
+
+    # A provider has one to four taxonomy slots with one of them primary
+    slot_counts = rng.integers(1, 5, num_rows)
+    primary_slot = (rng.random(num_rows) * slot_counts).astype(numpy.int64) + 1
+    codes = numpy.array(taxonomy_codes)
+    taxonomy_columns = {}
+    for slot in range(1, TAXONOMY_SLOTS + 1):
+        filled = slot <= slot_counts
+        slot_codes = codes[rng.integers(0, len(codes), num_rows)]
+        taxonomy_columns[f"Healthcare Provider Taxonomy Code_{slot}"] = polars.Series(
+            numpy.where(filled, slot_codes, None).tolist(), dtype=polars.Utf8
+        )
+        taxonomy_columns[f"Healthcare Provider Primary Taxonomy Switch_{slot}"] = polars.Series(
+            numpy.where(filled, numpy.where(primary_slot == slot, "Y", "N"), None).tolist(), dtype=polars.Utf8
+        )
+
+    practice_zips = numpy.array(zip_codes)[rng.integers(0, len(zip_codes), num_rows)]
+    plus_four = rng.integers(0, 10_000, num_rows)
+    return chunk.with_columns(
+        polars.Series("NPI", [str(npi) for npi in range(start_npi, start_npi + num_rows)]),
+        polars.col("Entity Type Code").str.replace(r"\.0$", ""),
+        polars.Series(
+            "Provider Business Practice Location Address Postal Code",
+            [f"{z}{p:04d}" for z, p in zip(practice_zips, plus_four)],
+        ),
+        **taxonomy_columns,
+    )
+
+
+def write_nppes_files(sample_df, output_dir, num_rows, zip_codes, taxonomy_codes, rng, chunk_size, row_group_size):
+    csv_path = os.path.join(output_dir, "nppes.csv")
+    parquet_path = os.path.join(output_dir, "nppes.parquet")
+    parquet_writer = None
+    try:
+        with open(csv_path, "wb") as csv_file:
+            for offset in range(0, num_rows, chunk_size):
+                chunk = generate_nppes_chunk(
+                    sample_df,
+                    1_000_000_000 + offset,
+                    min(chunk_size, num_rows - offset),
+                    zip_codes,
+                    taxonomy_codes,
+                    rng,
+                )
+                chunk.write_csv(csv_file, include_header=offset == 0)
+                table = chunk.to_arrow()
+                if parquet_writer is None:
+                    parquet_writer = pyarrow.parquet.ParquetWriter(parquet_path, table.schema)
+                parquet_writer.write_table(table, row_group_size=row_group_size)
+                print(f"Generated {offset + len(chunk):,} of {num_rows:,} NPPES rows")
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+
+
+def generate(output_dir, num_rows, num_counties=3_000, num_zips=40_000, num_taxonomy_codes=900,
+             chunk_size=100_000, row_group_size=100_000, seed=0):
+    os.makedirs(output_dir, exist_ok=True)
+    rng = numpy.random.default_rng(seed)
+    sample_df = polars.read_csv(SAMPLE_FILE, infer_schema=False)
+
+    counties = generate_counties(num_counties, rng)
+    zip_county = generate_zip_county(counties, num_zips, rng)
+    zip_county.write_csv(os.path.join(output_dir, "zip_county.csv"))
+    generate_ssa_fips(counties).write_csv(os.path.join(output_dir, "ssa_fips_state_county.csv"))
+    with open(os.path.join(output_dir, "census_population.json"), "w") as census_file:
+        json.dump(generate_census_population(counties), census_file)
+    taxonomy = generate_taxonomy(sample_df, num_taxonomy_codes)
+    taxonomy.write_csv(os.path.join(output_dir, "nucc_taxonomy.csv"))
+
+    write_nppes_files(
+        sample_df,
+        output_dir,
+        num_rows,
+        zip_county["ZIP"].unique().sort().to_list(),
+        taxonomy["Code"].to_list(),
+        rng,
+        chunk_size,
+        row_group_size,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="NPPES rows (e.g. 1000000, 5000000, 10000000)")
+    parser.add_argument("--output-dir", default="bench_data")
+    parser.add_argument("--counties", type=int, default=3_000)
+    parser.add_argument("--zips", type=int, default=40_000)
+    parser.add_argument("--row-group-size", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate(
+        args.output_dir,
+        args.rows,
+        num_counties=args.counties,
+        num_zips=args.zips,
+        row_group_size=args.row_group_size,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
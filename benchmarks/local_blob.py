@@ -0,0 +1,75 @@
+"""
+Filesystem stand-in for the parts of BlobServiceClient the pipeline uses, so
+benchmarks can run without Azure. Every container is served from `directory`.
+"""
+
+import hashlib
+import os
+from datetime import datetime, timezone
+
+
+class LocalBlobProperties:
+    def __init__(self, path):
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.last_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+        self.etag = hashlib.md5(f"{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()
+
+
+class LocalBlobDownload:
+    def __init__(self, path, offset, length, chunk_size):
+        self._path = path
+        self._offset = offset or 0
+        self._length = length
+        self._chunk_size = chunk_size
+
+    def chunks(self):
+        remaining = self._length
+        with open(self._path, "rb") as blob_file:
+            blob_file.seek(self._offset)
+            while remaining is None or remaining > 0:
+                size = self._chunk_size if remaining is None else min(self._chunk_size, remaining)
+                data = blob_file.read(size)
+                if not data:
+                    break
+                if remaining is not None:
+                    remaining -= len(data)
+                yield data
+
+    def readall(self):
+        return b"".join(self.chunks())
+
+
+class LocalBlobClient:
+    def __init__(self, path, chunk_size=4 * 1024 * 1024):
+        self._path = path
+        self._chunk_size = chunk_size
+        self._staged_blocks = {}
+
+    def get_blob_properties(self):
+        return LocalBlobProperties(self._path)
+
+    def download_blob(self, offset=None, length=None):
+        return LocalBlobDownload(self._path, offset, length, self._chunk_size)
+
+    def upload_blob(self, data, overwrite=False):
+        if not overwrite and os.path.exists(self._path):
+            raise FileExistsError(self._path)
+        with open(self._path, "wb") as blob_file:
+            blob_file.write(data)
+
+    def stage_block(self, block_id, data):
+        self._staged_blocks[block_id] = data
+
+    def commit_block_list(self, blocks):
+        with open(self._path, "wb") as blob_file:
+            for block in blocks:
+                blob_file.write(self._staged_blocks.pop(block.id))
+
+
+class LocalBlobServiceClient:
+    def __init__(self, directory):
+        self._directory = directory
+
+    def get_blob_client(self, container, blob):
+        return LocalBlobClient(os.path.join(self._directory, blob))
@@ -0,0 +1,291 @@
+"""
+Run pipeline stages against generated data and report rows/s, MB/s, peak RSS
+and wall time for each.
+
+Extract stages only need the blob stand-in. Load, cleaning and export stages
+need a local Postgres configured through the POSTGRES_* variables the
+function app reads.
+
+    python -m benchmarks.run_benchmarks --data-dir bench_data --setup-schema
+    python -m benchmarks.run_benchmarks --data-dir bench_data --stages extract_parquet,extract_csv
+    python -m benchmarks.run_benchmarks --data-dir bench_data --json after.json --baseline before.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+
+import polars
+
+import function_app
+from benchmarks.local_blob import LocalBlobServiceClient
+
+SQL_SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), "..", "sql_scripts")
+
+ALL_STAGES = [
+    "extract_parquet",
+    "extract_csv",
+    "convert_csv",
+    "load_reference",
+    "zip_primary_county",
+    "load_nppes",
+    "clean",
+    "export",
+]
+
+
+def measure(name, stage):
+    # `stage` returns (rows processed, bytes processed)
+    print(f"Benchmark {name} started")
+    start_rss = function_app.current_rss_bytes()
+    with function_app.PeakRssSampler() as sampler:
+        start = time.perf_counter()
+        rows, processed_bytes = stage()
+        wall_seconds = time.perf_counter() - start
+    return {
+        "stage": name,
+        "rows": rows,
+        "bytes": processed_bytes,
+        "wall_seconds": wall_seconds,
+        "rows_per_second": rows / wall_seconds if wall_seconds else 0.0,
+        "mb_per_second": processed_bytes / 1e6 / wall_seconds if wall_seconds else 0.0,
+        "peak_rss_mb": sampler.peak_bytes / 1e6,
+        "rss_growth_mb": (sampler.peak_bytes - start_rss) / 1e6,
+    }
+
+
+def blob_size(filename):
+    return (
+        function_app.get_blob_service_client()
+        .get_blob_client(container="nppes", blob=filename)
+        .get_blob_properties()
+        .size
+    )
+
+
+def query_scalar(sql, params=None):
+    pg_conn = function_app.get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchone()[0]
+    finally:
+        pg_conn.close()
+
+
+def count_batches(lazy_df, chunk_size):
+    return sum(len(batch_df) for batch_df in lazy_df.collect_batches(chunk_size=chunk_size))
+
+
+def setup_schema():
+    # Scripts with psql meta-commands (the one-off migrations) are skipped
+    pg_conn = function_app.get_psycopg2_connection()
+    try:
+        for path in sorted(glob.glob(os.path.join(SQL_SCRIPTS_DIR, "*.sql"))):
+            with open(path) as script:
+                sql = script.read()
+            if any(line.startswith("\\") for line in sql.splitlines()):
+                continue
+            with pg_conn.cursor() as cursor:
+                cursor.execute(sql)
+            pg_conn.commit()
+            print(f"Applied {os.path.basename(path)}")
+    finally:
+        pg_conn.close()
+
+
+def upload_data_files(data_dir):
+    # Azurite or a real account: copy the generated files into the nppes container
+    blob_service_client = function_app.get_blob_service_client()
+    container_client = blob_service_client.get_container_client("nppes")
+    if not container_client.exists():
+        container_client.create_container()
+    for path in sorted(glob.glob(os.path.join(data_dir, "*"))):
+        if path.endswith(".json"):
+            continue
+        with open(path, "rb") as data_file:
+            container_client.upload_blob(os.path.basename(path), data_file, overwrite=True)
+        print(f"Uploaded {os.path.basename(path)}")
+
+
+def build_stages(args):
+    chunk_size = args.chunk_size
+    body = {
+        "csv_target_file_1": "zip_county.csv",
+        "csv_target_file_2": "ssa_fips_state_county.csv",
+        "csv_target_file_3": "nucc_taxonomy.csv",
+        "force_reload": True,
+    }
+
+    def extract_parquet():
+        lazy_df = function_app.extract_parquet_data_from_blob("nppes.parquet")
+        return count_batches(lazy_df, chunk_size), blob_size("nppes.parquet")
+
+    def extract_csv():
+        lazy_df = function_app.extract_csv_data_from_blob(
+            "nppes.csv",
+            function_app.NPPES_RELEVANT_COLUMNS,
+            function_app.NPPES_COLUMN_MAPPING,
+            {column: polars.Utf8 for column in function_app.NPPES_RELEVANT_COLUMNS},
+        )
+        return count_batches(lazy_df, chunk_size), blob_size("nppes.csv")
+
+    def convert_csv():
+        rows = function_app.convert_nppes_csv_to_parquet("nppes.csv", "bench_converted.parquet")
+        return rows, blob_size("nppes.csv")
+
+    def load_reference():
+        with open(os.path.join(args.data_dir, "census_population.json")) as census_file:
+            census_data = json.load(census_file)
+        rows = function_app.load_api_data(census_data)
+        function_app.load_zip_county_stage(body)
+        function_app.load_ssa_fips_state_county_stage(body)
+        function_app.load_nucc_taxonomy_stage(body)
+        for table in ("zip_county", "ssa_fips_state_county", "nucc_taxonomy"):
+            rows += query_scalar(f"SELECT COUNT(*) FROM {table}")
+        source_bytes = sum(
+            blob_size(filename)
+            for filename in ("zip_county.csv", "ssa_fips_state_county.csv", "nucc_taxonomy.csv")
+        )
+        return rows, source_bytes
+
+    def zip_primary_county():
+        pg_conn = function_app.get_psycopg2_connection()
+        try:
+            with pg_conn.cursor() as cursor:
+                cursor.execute("CALL build_zip_primary_county(%s, NULL)", (args.county_strategy,))
+                rows = cursor.fetchone()[0]
+            pg_conn.commit()
+        finally:
+            pg_conn.close()
+        return rows, query_scalar("SELECT pg_table_size('zip_county')")
+
+    def load_nppes():
+        if args.load_parallelism > 1:
+            rows = function_app.load_parquet_blob_parallel_to_postgres(
+                "nppes.parquet",
+                max_workers=args.load_parallelism,
+                chunk_size=chunk_size,
+                bulk_load=args.bulk_load,
+            )
+        else:
+            rows = function_app.load_chunked_blob_data_to_postgres(
+                function_app.extract_parquet_data_from_blob("nppes.parquet"),
+                "nppes_providers",
+                chunk_size=chunk_size,
+                bulk_load=args.bulk_load,
+            )
+        return rows, blob_size("nppes.parquet")
+
+    def clean():
+        if args.clean_parallelism > 1:
+            function_app.clean_nppes_data_partitioned(
+                max_workers=args.clean_parallelism, bulk_load=args.bulk_load
+            )
+        else:
+            pg_conn = function_app.get_psycopg2_connection()
+            try:
+                with pg_conn.cursor() as cursor:
+                    cursor.execute("CALL clean_and_populate_nppes_data(%s)", (args.bulk_load,))
+                pg_conn.commit()
+            finally:
+                pg_conn.close()
+        return (
+            query_scalar("SELECT COUNT(*) FROM nppes_providers_clean"),
+            query_scalar("SELECT pg_table_size('nppes_providers')"),
+        )
+
+    def export():
+        if not function_app.export_clean_data_to_csv_chunked(args.export_chunk_size, "bench_export.csv"):
+            raise RuntimeError("Export failed")
+        return (
+            query_scalar("SELECT COUNT(*) FROM nppes_export_view"),
+            blob_size("bench_export.csv"),
+        )
+
+    return {
+        "extract_parquet": extract_parquet,
+        "extract_csv": extract_csv,
+        "convert_csv": convert_csv,
+        "load_reference": load_reference,
+        "zip_primary_county": zip_primary_county,
+        "load_nppes": load_nppes,
+        "clean": clean,
+        "export": export,
+    }
+
+
+def print_results(results, baseline=None, regression_threshold=0.1):
+    baseline_rates = {result["stage"]: result["rows_per_second"] for result in baseline or []}
+    print(
+        f"{'stage':<20}{'rows':>12}{'wall s':>10}{'rows/s':>14}{'MB/s':>10}{'peak RSS MB':>13}"
+        + (f"{'vs baseline':>14}" if baseline_rates else "")
+    )
+    regressions = []
+    for result in results:
+        line = (
+            f"{result['stage']:<20}{result['rows']:>12,}{result['wall_seconds']:>10.2f}"
+            f"{result['rows_per_second']:>14,.0f}{result['mb_per_second']:>10.1f}"
+            f"{result['peak_rss_mb']:>13.0f}"
+        )
+        baseline_rate = baseline_rates.get(result["stage"])
+        if baseline_rate:
+            change = result["rows_per_second"] / baseline_rate - 1
+            line += f"{change:>+14.1%}"
+            if change < -regression_threshold:
+                regressions.append(result["stage"])
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default="bench_data", help="Output of benchmarks.generate_data")
+    parser.add_argument("--stages", default=",".join(ALL_STAGES), help="Comma-separated stages to run, in order")
+    parser.add_argument("--blob", choices=["local", "azurite"], default="local",
+                        help="local serves --data-dir directly; azurite uploads it through AzureWebJobsStorage")
+    parser.add_argument("--setup-schema", action="store_true", help="Apply sql_scripts before running")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--export-chunk-size", type=int, default=50_000)
+    parser.add_argument("--load-parallelism", type=int, default=4)
+    parser.add_argument("--clean-parallelism", type=int, default=1)
+    parser.add_argument("--bulk-load", action="store_true")
+    parser.add_argument("--county-strategy", default="population")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results file of an earlier run to compare rows/s against")
+    parser.add_argument("--regression-threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    stage_names = [name for name in args.stages.split(",") if name]
+    unknown = [name for name in stage_names if name not in ALL_STAGES]
+    if unknown:
+        parser.error(f"Unknown stages: {unknown}")
+
+    if args.blob == "local":
+        blob_service_client = LocalBlobServiceClient(os.path.abspath(args.data_dir))
+        function_app.get_blob_service_client = lambda: blob_service_client
+    else:
+        upload_data_files(args.data_dir)
+    if args.setup_schema:
+        setup_schema()
+
+    stages = build_stages(args)
+    results = [measure(name, stages[name]) for name in stage_names]
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    regressions = print_results(results, baseline, args.regression_threshold)
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+    if regressions:
+        print(f"Throughput regressions beyond {args.regression_threshold:.0%}: {regressions}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,164 @@
 import azure.functions as func
 import os
-from azure.storage.blob import BlobServiceClient
+import logging
+from azure.storage.blob import BlobServiceClient, BlobBlock
 import time
+import json
+import hashlib
+from datetime import datetime, timezone
+import base64
+import threading
+import functools
+import contextlib
+import contextvars
+import collections
+import re
+import resource
+import struct
+import csv
+import decimal
+import uuid
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 import polars
+import numpy
 import io
 import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+import pyarrow.compute
+import pyarrow.csv
+import pyarrow.ipc
+import pyarrow.parquet
+from polars.io.plugins import register_io_source
 from io import StringIO
 import requests
+from urllib.parse import quote, urlsplit
 
 app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
+logger = logging.getLogger(__name__)
 API_URL = f"{os.getenv('API_URL')}"
+# API_URL carries the Census API key, so it is never stored or logged; loads
+# are recorded under this name and log lines show only the host
+CENSUS_SOURCE_NAME = "census_acs5_county_population"
 
 
-def fetch_api_data():
+CENSUS_CACHE_BLOB = os.getenv("CENSUS_CACHE_BLOB", "census_cache/acs5_county_population.json")
+CENSUS_CACHE_TTL_HOURS = float(os.getenv("CENSUS_CACHE_TTL_HOURS", "720"))
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def url_host(url):
+    return urlsplit(url).hostname or "unknown host"
+
+
+def request_with_retries(url, headers, max_attempts=4, backoff_seconds=1.0):
+    # Retry transient failures with exponential backoff. Errors name only the
+    # host: requests puts the full URL, query string included, in its messages
+    host = url_host(url)
+    for attempt in range(1, max_attempts + 1):
+        try:
+            response = requests.get(url, headers=headers, timeout=60)
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == max_attempts:
+                return response
+            logger.warning(f"Attempt {attempt} got HTTP {response.status_code} from {host}, retrying")
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == max_attempts:
+                raise type(e)(f"Request to {host} failed: {type(e).__name__}") from None
+            logger.warning(f"Attempt {attempt} failed for {host}: {type(e).__name__}, retrying")
+        time.sleep(backoff_seconds * 2 ** (attempt - 1))
+
+
+def raise_for_status(response):
+    # Like response.raise_for_status, without the URL in the message
+    if response.status_code >= 400:
+        raise requests.HTTPError(
+            f"HTTP {response.status_code} from {url_host(response.url)}", response=response
+        )
+
+
+def fetch_api_data(url=None):
     headers = {"Content-Type": "application/json"}
-    response = requests.get(API_URL, headers=headers)
-    response.raise_for_status()
+    response = request_with_retries(url or API_URL, headers)
+    raise_for_status(response)
     return response.json()
 
 
+def read_census_cache():
+    CONTAINER_NAME = "nppes"
+    try:
+        blob_client = get_blob_service_client().get_blob_client(
+            container=CONTAINER_NAME, blob=CENSUS_CACHE_BLOB
+        )
+        return json.loads(blob_client.download_blob().readall())
+    except Exception as e:
+        logger.warning(f"No usable census cache: {e}")
+        return None
+
+
+def write_census_cache(cache):
+    CONTAINER_NAME = "nppes"
+    try:
+        blob_client = get_blob_service_client().get_blob_client(
+            container=CONTAINER_NAME, blob=CENSUS_CACHE_BLOB
+        )
+        blob_client.upload_blob(json.dumps(cache).encode("utf-8"), overwrite=True)
+    except Exception as e:
+        logger.warning(f"Could not write census cache: {e}")
+
+
+def fetch_census_data_cached(url=None, ttl_hours=None, force_refresh=False):
+    """
+    Fetch the Census ACS payload through a blob cache. A cached response younger
+    than the TTL is reused without a request; an older one is revalidated with
+    If-None-Match / If-Modified-Since. Returns the data and its content hash.
+    """
+    url = url or API_URL
+    ttl_hours = CENSUS_CACHE_TTL_HOURS if ttl_hours is None else ttl_hours
+    now = datetime.now(timezone.utc)
+    # The blob is keyed on a hash, so the API key in the URL is not stored
+    url_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    cache = read_census_cache()
+    if cache is not None and cache.get("url_hash") != url_hash:
+        cache = None
+
+    if cache is not None and not force_refresh:
+        age_hours = (now - datetime.fromisoformat(cache["fetched_at"])).total_seconds() / 3600
+        if age_hours < ttl_hours:
+            logger.info(f"Using cached census data ({age_hours:.1f} hours old)")
+            return cache["data"], cache["content_hash"]
+
+    headers = {"Content-Type": "application/json"}
+    if cache is not None:
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache.get("last_modified"):
+            headers["If-Modified-Since"] = cache["last_modified"]
+
+    response = request_with_retries(url, headers)
+    if response.status_code == 304 and cache is not None:
+        logger.info("Census data not modified since last fetch")
+        cache["fetched_at"] = now.isoformat()
+        write_census_cache(cache)
+        return cache["data"], cache["content_hash"]
+
+    raise_for_status(response)
+    data = response.json()
+    content_hash = hashlib.sha256(response.content).hexdigest()
+    write_census_cache(
+        {
+            "url_hash": url_hash,
+            "fetched_at": now.isoformat(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_hash": content_hash,
+            "data": data,
+        }
+    )
+    return data, content_hash
+
+
 def load_api_data(data):
     headers = data[0]
     rows = data[1:]
@@ -38,71 +178,208 @@ def load_api_data(data):
         db_columns = ["name", "population", "state_fips", "county_fips"]
         df = df.select(db_columns)
 
-        # Convert population to integer safely
-        df = df.with_columns([df["population"].cast(polars.Int32, strict=False)])
-
-        # Drop rows with any missing required values
-        df = df.filter(
-            df["population"].is_not_null()
-            & df["name"].is_not_null()
-            & df["state_fips"].is_not_null()
-            & df["county_fips"].is_not_null()
-        )
-
-        # Cast to strings, strip spaces, fill nulls with ""
+        # Strip spaces from the text columns
         df = df.with_columns(
             [
-                df[col].cast(str).fill_null("").str.strip_chars().alias(col)
-                for col in db_columns
+                df[col].cast(str).str.strip_chars().alias(col)
+                for col in ["name", "state_fips", "county_fips"]
             ]
         )
 
-        # Filter out rows where all fields are empty (just in case)
-        df = df.filter(
-            (df["name"].str.len_chars() > 0)
-            | (df["population"].str.len_chars() > 0)
-            | (df["state_fips"].str.len_chars() > 0)
-            | (df["county_fips"].str.len_chars() > 0)
-        )
-
-        # Step 1: Write cleaned CSV to StringIO
-        output = StringIO()
-        df.write_csv(output, separator="\t", include_header=False)
-        output.seek(0)
-
-        # Step 2: Strip blank lines
-        cleaned_lines = [
-            line
-            for line in output.getvalue().splitlines()
-            if line.strip() and len(line.split("\t")) == 4
-        ]
-        clean_output = StringIO("\n".join(cleaned_lines) + "\n")
-
-        # Step 3: Load to Postgres
+        # Load to Postgres with binary COPY
         target_table = "census_county_population"
         pg_conn = get_psycopg2_connection()
 
         with pg_conn.cursor() as cursor:
             try:
-                cursor.copy_from(
-                    clean_output, target_table, columns=db_columns, sep="\t", null=""
+                # Replace the previous load in the same transaction
+                cursor.execute("CALL truncate_table(%s)", (target_table,))
+                clear_load_rejects(cursor, target_table, CENSUS_SOURCE_NAME)
+                # Rows with missing values or a non-numeric population go to load_rejects
+                df, reject_counts = validate_and_copy_rejects(
+                    cursor, df, target_table, source_name=CENSUS_SOURCE_NAME
                 )
+                df = df.with_columns(polars.col("population").cast(polars.Int32))
+                copy_dataframe_to_postgres(cursor, df, target_table)
                 pg_conn.commit()
-                print(f" Loaded {len(cleaned_lines)} clean rows into {target_table}")
+                log_reject_counts(target_table, CENSUS_SOURCE_NAME, reject_counts)
+                logger.info(f" Loaded {len(df)} clean rows into {target_table}")
             except Exception as e:
                 pg_conn.rollback()
-                print(f" COPY error: {e}")
+                logger.error(f" COPY error: {e}")
                 raise
 
         pg_conn.close()
+        return len(df)
 
     except Exception as e:
-        print(f" Failed to load API data: {e}")
+        logger.error(f" Failed to load API data: {e}")
         if "pg_conn" in locals():
             pg_conn.close()
         raise
 
 
+# Metrics of the stage running in the current context (see measure_stage)
+current_stage_metrics = contextvars.ContextVar("current_stage_metrics", default=None)
+
+# Interval text of the "Duration: %" the stored procedures report
+DB_NOTICE_DURATION = re.compile(r"Duration: (?:(\d+) days? )?(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+def log_event(event, **fields):
+    # One JSON object per line so log queries can filter on fields
+    logger.info(json.dumps({"event": event, **fields}, default=str))
+
+
+def current_rss_bytes():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # No procfs: the process-wide peak is the best available figure
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PeakRssSampler:
+    """Track the highest RSS seen while a stage runs."""
+
+    def __init__(self, interval_seconds=0.02):
+        self._interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self.peak_bytes = current_rss_bytes()
+
+    def _sample(self):
+        while not self._stop.wait(self._interval_seconds):
+            self.peak_bytes = max(self.peak_bytes, current_rss_bytes())
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, current_rss_bytes())
+
+
+class StageMetrics:
+    """
+    Timer and counters for one pipeline stage. Code running for the stage adds
+    to them through count_metric, including worker threads started with
+    submit_in_context.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.counters = collections.Counter()
+        self.db_notices = []
+        self.status = "running"
+        self.started_at = None
+        self.wall_seconds = None
+        self.peak_rss_mb = None
+        self._lock = threading.Lock()
+
+    def add(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] += amount
+
+    def add_db_notice(self, message, duration_seconds):
+        with self._lock:
+            self.db_notices.append({"message": message, "duration_seconds": duration_seconds})
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "stage": self.name,
+                "status": self.status,
+                "started_at": self.started_at,
+                "wall_seconds": self.wall_seconds,
+                "peak_rss_mb": self.peak_rss_mb,
+                "counters": dict(self.counters),
+                "db_notices": list(self.db_notices),
+            }
+
+
+def count_metric(counter, amount=1, metrics=None):
+    metrics = metrics or current_stage_metrics.get()
+    if metrics is not None:
+        metrics.add(counter, amount)
+
+
+@contextlib.contextmanager
+def measure_stage(name, metrics=None):
+    metrics = metrics or StageMetrics(name)
+    token = current_stage_metrics.set(metrics)
+    metrics.started_at = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    # Sampled over the stage alone; ru_maxrss would report the process's
+    # all-time peak, hiding which stage actually used the memory
+    sampler = PeakRssSampler()
+    try:
+        with sampler:
+            yield metrics
+        metrics.status = "completed"
+    except Exception:
+        metrics.status = "failed"
+        raise
+    finally:
+        metrics.wall_seconds = time.perf_counter() - start
+        metrics.peak_rss_mb = sampler.peak_bytes / (1024 * 1024)
+        current_stage_metrics.reset(token)
+        log_event("stage_finished", **metrics.as_dict())
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    # Worker threads do not inherit context variables; carry the stage's over
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def record_db_notice(notice):
+    message = notice.strip().removeprefix("NOTICE:").strip()
+    duration_seconds = None
+    match = DB_NOTICE_DURATION.search(message)
+    if match:
+        days, hours, minutes, seconds = match.groups()
+        duration_seconds = (
+            int(days or 0) * 86_400 + int(hours) * 3_600 + int(minutes) * 60 + float(seconds)
+        )
+    metrics = current_stage_metrics.get()
+    if metrics is not None:
+        metrics.add_db_notice(message, duration_seconds)
+    log_event(
+        "db_notice",
+        stage=metrics.name if metrics else None,
+        message=message,
+        duration_seconds=duration_seconds,
+    )
+
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    """
+    Cursor that counts round trips for the current stage and forwards the
+    RAISE NOTICE messages of each statement to record_db_notice.
+    """
+
+    def execute(self, query, vars=None):
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._record_round_trip()
+
+    def copy_expert(self, sql, file, size=8192):
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            self._record_round_trip()
+
+    def _record_round_trip(self):
+        count_metric("db_round_trips")
+        notices = self.connection.notices
+        while notices:
+            record_db_notice(notices.pop(0))
+
+
 def get_blob_service_client():
     conn_str = os.getenv("AzureWebJobsStorage")
     if not conn_str:
@@ -110,47 +387,355 @@ def get_blob_service_client():
     return BlobServiceClient.from_connection_string(conn_str)
 
 
+def get_postgres_connection_string():
+    return (
+        f"host={os.environ.get('POSTGRES_HOST')} "
+        f"port={os.environ.get('POSTGRES_PORT')} "
+        f"dbname={os.environ.get('POSTGRES_DB')} "
+        f"user={os.environ.get('POSTGRES_USER')} "
+        f"password={os.environ.get('POSTGRES_PASSWORD')}"
+    )
+
+
 def get_psycopg2_connection():
     try:
-        connection_string = (
-            f"host={os.environ.get('POSTGRES_HOST')} "
-            f"port={os.environ.get('POSTGRES_PORT')} "
-            f"dbname={os.environ.get('POSTGRES_DB')} "
-            f"user={os.environ.get('POSTGRES_USER')} "
-            f"password={os.environ.get('POSTGRES_PASSWORD')}"
+        return psycopg2.connect(
+            get_postgres_connection_string(), cursor_factory=InstrumentedCursor
         )
-        return psycopg2.connect(connection_string)
     except Exception as e:
         error_message = f"Failed to connect to PostgreSQL with psycopg2: {str(e)}"
         raise ValueError(error_message)
 
 
+QUERY_POOL_MAX_CONNECTIONS = int(os.getenv("QUERY_POOL_MAX_CONNECTIONS", "4"))
+_query_connection_pool = None
+_query_connection_pool_lock = threading.Lock()
+
+
+def get_query_connection_pool():
+    # Created on first use and kept for the life of the worker process
+    global _query_connection_pool
+    with _query_connection_pool_lock:
+        if _query_connection_pool is None:
+            _query_connection_pool = psycopg2.pool.ThreadedConnectionPool(
+                1,
+                QUERY_POOL_MAX_CONNECTIONS,
+                get_postgres_connection_string(),
+                cursor_factory=InstrumentedCursor,
+            )
+        return _query_connection_pool
+
+
+@contextlib.contextmanager
+def query_connection():
+    """
+    Borrow a read-only autocommit connection from the query pool, so the
+    query endpoints skip connection setup. A connection that raised is
+    discarded rather than returned.
+    """
+    pool = get_query_connection_pool()
+    pg_conn = pool.getconn()
+    try:
+        if not pg_conn.autocommit:
+            pg_conn.set_session(readonly=True, autocommit=True)
+        yield pg_conn
+    except Exception:
+        pool.putconn(pg_conn, close=True)
+        raise
+    else:
+        pool.putconn(pg_conn)
+
+
+class TTLLRUCache:
+    """
+    Thread-safe, size-bounded LRU cache whose entries expire ttl_seconds after
+    they are stored. clear() starts a new generation; values read from the
+    database before a clear are dropped instead of stored.
+    """
+
+    MISSING = object()
+
+    def __init__(self, max_entries, ttl_seconds, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.generation = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_many(self, keys):
+        now = self.clock()
+        hits = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                expires_at, value = entry
+                if expires_at <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                hits[key] = value
+        return hits
+
+    def get(self, key):
+        return self.get_many([key]).get(key, self.MISSING)
+
+    def put_many(self, items, generation=None):
+        expires_at = self.clock() + self.ttl_seconds
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            for key, value in items.items():
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, key, value, generation=None):
+        self.put_many({key: value}, generation)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+
+class BlobRangeReader(io.RawIOBase):
+    """
+    Seekable, read-only file object that fetches byte ranges of a blob on demand.
+    """
+
+    def __init__(self, blob_client):
+        self._blob_client = blob_client
+        self._size = blob_client.get_blob_properties().size
+        self._position = 0
+        # pyarrow reads from its own threads; count against the opening stage
+        self._metrics = current_stage_metrics.get()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence value: {whence}")
+        if position < 0:
+            raise ValueError(f"Negative seek position: {position}")
+        self._position = position
+        return self._position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._size - self._position
+        size = min(size, self._size - self._position)
+        if size <= 0:
+            return b""
+        data = self._blob_client.download_blob(
+            offset=self._position, length=size
+        ).readall()
+        self._position += len(data)
+        count_metric("blob_bytes_read", len(data), self._metrics)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+class BlobChunkStream(io.RawIOBase):
+    """
+    Forward-only file object over the chunks of a blob download.
+    """
+
+    def __init__(self, blob_stream, metrics=None):
+        self._chunks = iter(blob_stream.chunks())
+        self._pending = memoryview(b"")
+        self._metrics = metrics
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self._pending:
+            self._pending = memoryview(next(self._chunks, b""))
+            count_metric("blob_bytes_read", len(self._pending), self._metrics)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+class BlobBlockWriter:
+    """
+    Write-only file object that uploads to a block blob in staged blocks.
+    Nothing is visible in the blob until commit() writes the block list.
+    """
+
+    def __init__(self, blob_client, block_size=8 * 1024 * 1024):
+        self._blob_client = blob_client
+        self._block_size = block_size
+        self._buffer = bytearray()
+        self._blocks = []
+        self._bytes_written = 0
+        # pyarrow checks this before writing to a Python file object
+        self.closed = False
+
+    def writable(self):
+        return True
+
+    def flush(self):
+        pass
+
+    def tell(self):
+        return self._bytes_written
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._buffer += data
+        self._bytes_written += len(data)
+        while len(self._buffer) >= self._block_size:
+            self._stage_block(self._buffer[: self._block_size])
+            del self._buffer[: self._block_size]
+        return len(data)
+
+    def _stage_block(self, data):
+        block_id = base64.b64encode(f"{len(self._blocks):08d}".encode()).decode()
+        self._blob_client.stage_block(block_id=block_id, data=bytes(data))
+        self._blocks.append(BlobBlock(block_id=block_id))
+        count_metric("blob_bytes_written", len(data))
+
+    def commit(self):
+        if self._buffer:
+            self._stage_block(self._buffer)
+            self._buffer.clear()
+        self._blob_client.commit_block_list(self._blocks)
+        self.closed = True
+        return self._bytes_written
+
+
+def scan_parquet_row_groups(parquet_file, row_groups=None, skip_rows=0):
+    """
+    Lazily scan a pyarrow ParquetFile one row group at a time, reading only
+    the column chunks the query needs. `row_groups` limits the scan to a
+    subset of row groups; the first `skip_rows` rows of those are left out,
+    and row groups that lie wholly before them are never read.
+    """
+    schema = polars.from_arrow(parquet_file.schema_arrow.empty_table()).schema
+    if row_groups is None:
+        row_groups = range(parquet_file.num_row_groups)
+    row_groups = list(row_groups)
+    # The footer has each row group's row count, so skipping needs no reads
+    while row_groups and skip_rows >= parquet_file.metadata.row_group(row_groups[0]).num_rows:
+        skip_rows -= parquet_file.metadata.row_group(row_groups[0]).num_rows
+        row_groups.pop(0)
+
+    def row_group_source(with_columns, predicate, n_rows, batch_size):
+        remaining_rows = n_rows
+        for position, row_group in enumerate(row_groups):
+            if remaining_rows is not None and remaining_rows <= 0:
+                break
+            batch_df = polars.from_arrow(
+                parquet_file.read_row_group(row_group, columns=with_columns)
+            )
+            if position == 0 and skip_rows:
+                batch_df = batch_df.slice(skip_rows)
+            if predicate is not None:
+                batch_df = batch_df.filter(predicate)
+            if remaining_rows is not None:
+                batch_df = batch_df.head(remaining_rows)
+                remaining_rows -= len(batch_df)
+            yield batch_df
+
+    return register_io_source(row_group_source, schema=schema)
+
+
+def scan_csv_stream(open_stream, schema_overrides=None, block_size=8 * 1024 * 1024):
+    """
+    Lazily scan a CSV stream in bounded blocks. `open_stream` is called each
+    time the scan runs and must return a new file-like object.
+    """
+    column_types = {
+        column: polars.Series(dtype=dtype).to_arrow().type
+        for column, dtype in (schema_overrides or {}).items()
+    }
+    read_options = pyarrow.csv.ReadOptions(block_size=block_size)
+
+    def convert_options(include_columns=None):
+        return pyarrow.csv.ConvertOptions(
+            column_types=column_types,
+            include_columns=include_columns,
+            null_values=[""],
+            strings_can_be_null=True,
+        )
+
+    with pyarrow.csv.open_csv(
+        open_stream(), read_options=read_options, convert_options=convert_options()
+    ) as reader:
+        schema = polars.from_arrow(reader.schema.empty_table()).schema
+
+    def csv_block_source(with_columns, predicate, n_rows, batch_size):
+        remaining_rows = n_rows
+        with pyarrow.csv.open_csv(
+            open_stream(),
+            read_options=read_options,
+            convert_options=convert_options(with_columns),
+        ) as reader:
+            for record_batch in reader:
+                if remaining_rows is not None and remaining_rows <= 0:
+                    break
+                batch_df = polars.from_arrow(record_batch)
+                if predicate is not None:
+                    batch_df = batch_df.filter(predicate)
+                if remaining_rows is not None:
+                    batch_df = batch_df.head(remaining_rows)
+                    remaining_rows -= len(batch_df)
+                yield batch_df
+
+    return register_io_source(csv_block_source, schema=schema)
+
+
 def extract_csv_data_from_blob(
     filename, relevant_columns, column_mapping, schema_overrides=None
 ):
     CONTAINER_NAME = "nppes"
     try:
-        print(f"Starting chunked blob data extraction for file: {filename}")
+        logger.info(f"Starting streaming blob data extraction for file: {filename}")
         blob_service_client = get_blob_service_client()
         blob_client = blob_service_client.get_blob_client(
             container=CONTAINER_NAME, blob=filename
         )
 
-        file_buffer = io.BytesIO()
+        # The scan opens the stream on a Polars thread
+        stage_metrics = current_stage_metrics.get()
 
-        blob_stream = blob_client.download_blob()
-
-        for chunk in blob_stream.chunks():
-            file_buffer.write(chunk)
-
-        # Reset buffer position to beginning
-        file_buffer.seek(0)
+        def open_blob_stream():
+            return io.BufferedReader(
+                BlobChunkStream(blob_client.download_blob(), metrics=stage_metrics)
+            )
 
         if relevant_columns == []:
-            lazy_df = polars.scan_csv(file_buffer, schema_overrides=schema_overrides)
+            lazy_df = scan_csv_stream(open_blob_stream, schema_overrides=schema_overrides)
         else:
             lazy_df = (
-                polars.scan_csv(file_buffer, schema_overrides=schema_overrides)
+                scan_csv_stream(open_blob_stream, schema_overrides=schema_overrides)
                 .select(relevant_columns)
                 .rename(column_mapping)
             )
@@ -158,337 +743,2049 @@ def extract_csv_data_from_blob(
         return lazy_df
 
     except Exception as e:
-        print(f"An error occurred: {e}")
+        logger.error(f"An error occurred: {e}")
         return None
 
 
-def extract_parquet_data_from_blob(filename):
-    CONTAINER_NAME = "nppes"
-    relevant_columns = [
-        "NPI",
-        "Entity Type Code",
-        "Provider Organization Name (Legal Business Name)",
-        "Provider Last Name (Legal Name)",
-        "Provider First Name",
-        "Provider Middle Name",
-        "Provider Name Prefix Text",
-        "Provider Name Suffix Text",
-        "Provider Credential Text",
-        "Provider Other Organization Name",
-        "Provider First Line Business Practice Location Address",
-        "Provider Second Line Business Practice Location Address",
-        "Provider Business Practice Location Address City Name",
-        "Provider Business Practice Location Address State Name",
-        "Provider Business Practice Location Address Postal Code",
-        "Healthcare Provider Taxonomy Code_1",
-        "Healthcare Provider Primary Taxonomy Switch_1",
-        "Healthcare Provider Taxonomy Code_2",
-        "Healthcare Provider Primary Taxonomy Switch_2",
-        "Healthcare Provider Taxonomy Code_3",
-        "Healthcare Provider Primary Taxonomy Switch_3",
-        "Healthcare Provider Taxonomy Code_4",
-        "Healthcare Provider Primary Taxonomy Switch_4",
-        "Healthcare Provider Taxonomy Code_5",
-        "Healthcare Provider Primary Taxonomy Switch_5",
-        "Healthcare Provider Taxonomy Code_6",
-        "Healthcare Provider Primary Taxonomy Switch_6",
-        "Healthcare Provider Taxonomy Code_7",
-        "Healthcare Provider Primary Taxonomy Switch_7",
-        "Healthcare Provider Taxonomy Code_8",
-        "Healthcare Provider Primary Taxonomy Switch_8",
-        "Healthcare Provider Taxonomy Code_9",
-        "Healthcare Provider Primary Taxonomy Switch_9",
-        "Healthcare Provider Taxonomy Code_10",
-        "Healthcare Provider Primary Taxonomy Switch_10",
-        "Healthcare Provider Taxonomy Code_11",
-        "Healthcare Provider Primary Taxonomy Switch_11",
-        "Healthcare Provider Taxonomy Code_12",
-        "Healthcare Provider Primary Taxonomy Switch_12",
-        "Healthcare Provider Taxonomy Code_13",
-        "Healthcare Provider Primary Taxonomy Switch_13",
-        "Healthcare Provider Taxonomy Code_14",
-        "Healthcare Provider Primary Taxonomy Switch_14",
-        "Healthcare Provider Taxonomy Code_15",
-        "Healthcare Provider Primary Taxonomy Switch_15",
-    ]
-
-    column_mapping = {
-        "NPI": "npi",
-        "Entity Type Code": "entity_type_code",
-        "Provider Organization Name (Legal Business Name)": "provider_organization_name",
-        "Provider Last Name (Legal Name)": "provider_last_name",
-        "Provider First Name": "provider_first_name",
-        "Provider Middle Name": "provider_middle_name",
-        "Provider Name Prefix Text": "provider_name_prefix",
-        "Provider Name Suffix Text": "provider_name_suffix",
-        "Provider Credential Text": "provider_credential",
-        "Provider Other Organization Name": "provider_other_organization_name",
-        "Provider First Line Business Practice Location Address": "provider_location_address_1",
-        "Provider Second Line Business Practice Location Address": "provider_location_address_2",
-        "Provider Business Practice Location Address City Name": "provider_city",
-        "Provider Business Practice Location Address State Name": "provider_state",
-        "Provider Business Practice Location Address Postal Code": "provider_postal_code",
-        "Healthcare Provider Taxonomy Code_1": "healthcare_provider_taxonomy_code_1",
-        "Healthcare Provider Primary Taxonomy Switch_1": "healthcare_provider_primary_taxonomy_switch_1",
-        "Healthcare Provider Taxonomy Code_2": "healthcare_provider_taxonomy_code_2",
-        "Healthcare Provider Primary Taxonomy Switch_2": "healthcare_provider_primary_taxonomy_switch_2",
-        "Healthcare Provider Taxonomy Code_3": "healthcare_provider_taxonomy_code_3",
-        "Healthcare Provider Primary Taxonomy Switch_3": "healthcare_provider_primary_taxonomy_switch_3",
-        "Healthcare Provider Taxonomy Code_4": "healthcare_provider_taxonomy_code_4",
-        "Healthcare Provider Primary Taxonomy Switch_4": "healthcare_provider_primary_taxonomy_switch_4",
-        "Healthcare Provider Taxonomy Code_5": "healthcare_provider_taxonomy_code_5",
-        "Healthcare Provider Primary Taxonomy Switch_5": "healthcare_provider_primary_taxonomy_switch_5",
-        "Healthcare Provider Taxonomy Code_6": "healthcare_provider_taxonomy_code_6",
-        "Healthcare Provider Primary Taxonomy Switch_6": "healthcare_provider_primary_taxonomy_switch_6",
-        "Healthcare Provider Taxonomy Code_7": "healthcare_provider_taxonomy_code_7",
-        "Healthcare Provider Primary Taxonomy Switch_7": "healthcare_provider_primary_taxonomy_switch_7",
-        "Healthcare Provider Taxonomy Code_8": "healthcare_provider_taxonomy_code_8",
-        "Healthcare Provider Primary Taxonomy Switch_8": "healthcare_provider_primary_taxonomy_switch_8",
-        "Healthcare Provider Taxonomy Code_9": "healthcare_provider_taxonomy_code_9",
-        "Healthcare Provider Primary Taxonomy Switch_9": "healthcare_provider_primary_taxonomy_switch_9",
-        "Healthcare Provider Taxonomy Code_10": "healthcare_provider_taxonomy_code_10",
-        "Healthcare Provider Primary Taxonomy Switch_10": "healthcare_provider_primary_taxonomy_switch_10",
-        "Healthcare Provider Taxonomy Code_11": "healthcare_provider_taxonomy_code_11",
-        "Healthcare Provider Primary Taxonomy Switch_11": "healthcare_provider_primary_taxonomy_switch_11",
-        "Healthcare Provider Taxonomy Code_12": "healthcare_provider_taxonomy_code_12",
-        "Healthcare Provider Primary Taxonomy Switch_12": "healthcare_provider_primary_taxonomy_switch_12",
-        "Healthcare Provider Taxonomy Code_13": "healthcare_provider_taxonomy_code_13",
-        "Healthcare Provider Primary Taxonomy Switch_13": "healthcare_provider_primary_taxonomy_switch_13",
-        "Healthcare Provider Taxonomy Code_14": "healthcare_provider_taxonomy_code_14",
-        "Healthcare Provider Primary Taxonomy Switch_14": "healthcare_provider_primary_taxonomy_switch_14",
-        "Healthcare Provider Taxonomy Code_15": "healthcare_provider_taxonomy_code_15",
-        "Healthcare Provider Primary Taxonomy Switch_15": "healthcare_provider_primary_taxonomy_switch_15",
-    }
+NPPES_RELEVANT_COLUMNS = [
+    "NPI",
+    "Entity Type Code",
+    "Provider Organization Name (Legal Business Name)",
+    "Provider Last Name (Legal Name)",
+    "Provider First Name",
+    "Provider Middle Name",
+    "Provider Name Prefix Text",
+    "Provider Name Suffix Text",
+    "Provider Credential Text",
+    "Provider Other Organization Name",
+    "Provider First Line Business Practice Location Address",
+    "Provider Second Line Business Practice Location Address",
+    "Provider Business Practice Location Address City Name",
+    "Provider Business Practice Location Address State Name",
+    "Provider Business Practice Location Address Postal Code",
+    "Healthcare Provider Taxonomy Code_1",
+    "Healthcare Provider Primary Taxonomy Switch_1",
+    "Healthcare Provider Taxonomy Code_2",
+    "Healthcare Provider Primary Taxonomy Switch_2",
+    "Healthcare Provider Taxonomy Code_3",
+    "Healthcare Provider Primary Taxonomy Switch_3",
+    "Healthcare Provider Taxonomy Code_4",
+    "Healthcare Provider Primary Taxonomy Switch_4",
+    "Healthcare Provider Taxonomy Code_5",
+    "Healthcare Provider Primary Taxonomy Switch_5",
+    "Healthcare Provider Taxonomy Code_6",
+    "Healthcare Provider Primary Taxonomy Switch_6",
+    "Healthcare Provider Taxonomy Code_7",
+    "Healthcare Provider Primary Taxonomy Switch_7",
+    "Healthcare Provider Taxonomy Code_8",
+    "Healthcare Provider Primary Taxonomy Switch_8",
+    "Healthcare Provider Taxonomy Code_9",
+    "Healthcare Provider Primary Taxonomy Switch_9",
+    "Healthcare Provider Taxonomy Code_10",
+    "Healthcare Provider Primary Taxonomy Switch_10",
+    "Healthcare Provider Taxonomy Code_11",
+    "Healthcare Provider Primary Taxonomy Switch_11",
+    "Healthcare Provider Taxonomy Code_12",
+    "Healthcare Provider Primary Taxonomy Switch_12",
+    "Healthcare Provider Taxonomy Code_13",
+    "Healthcare Provider Primary Taxonomy Switch_13",
+    "Healthcare Provider Taxonomy Code_14",
+    "Healthcare Provider Primary Taxonomy Switch_14",
+    "Healthcare Provider Taxonomy Code_15",
+    "Healthcare Provider Primary Taxonomy Switch_15",
+]
 
-    try:
-        print(f"Starting chunked blob data extraction for file: {filename}")
-        blob_service_client = get_blob_service_client()
-        blob_client = blob_service_client.get_blob_client(
-            container=CONTAINER_NAME, blob=filename
-        )
+NPPES_COLUMN_MAPPING = {
+    "NPI": "npi",
+    "Entity Type Code": "entity_type_code",
+    "Provider Organization Name (Legal Business Name)": "provider_organization_name",
+    "Provider Last Name (Legal Name)": "provider_last_name",
+    "Provider First Name": "provider_first_name",
+    "Provider Middle Name": "provider_middle_name",
+    "Provider Name Prefix Text": "provider_name_prefix",
+    "Provider Name Suffix Text": "provider_name_suffix",
+    "Provider Credential Text": "provider_credential",
+    "Provider Other Organization Name": "provider_other_organization_name",
+    "Provider First Line Business Practice Location Address": "provider_location_address_1",
+    "Provider Second Line Business Practice Location Address": "provider_location_address_2",
+    "Provider Business Practice Location Address City Name": "provider_city",
+    "Provider Business Practice Location Address State Name": "provider_state",
+    "Provider Business Practice Location Address Postal Code": "provider_postal_code",
+    "Healthcare Provider Taxonomy Code_1": "healthcare_provider_taxonomy_code_1",
+    "Healthcare Provider Primary Taxonomy Switch_1": "healthcare_provider_primary_taxonomy_switch_1",
+    "Healthcare Provider Taxonomy Code_2": "healthcare_provider_taxonomy_code_2",
+    "Healthcare Provider Primary Taxonomy Switch_2": "healthcare_provider_primary_taxonomy_switch_2",
+    "Healthcare Provider Taxonomy Code_3": "healthcare_provider_taxonomy_code_3",
+    "Healthcare Provider Primary Taxonomy Switch_3": "healthcare_provider_primary_taxonomy_switch_3",
+    "Healthcare Provider Taxonomy Code_4": "healthcare_provider_taxonomy_code_4",
+    "Healthcare Provider Primary Taxonomy Switch_4": "healthcare_provider_primary_taxonomy_switch_4",
+    "Healthcare Provider Taxonomy Code_5": "healthcare_provider_taxonomy_code_5",
+    "Healthcare Provider Primary Taxonomy Switch_5": "healthcare_provider_primary_taxonomy_switch_5",
+    "Healthcare Provider Taxonomy Code_6": "healthcare_provider_taxonomy_code_6",
+    "Healthcare Provider Primary Taxonomy Switch_6": "healthcare_provider_primary_taxonomy_switch_6",
+    "Healthcare Provider Taxonomy Code_7": "healthcare_provider_taxonomy_code_7",
+    "Healthcare Provider Primary Taxonomy Switch_7": "healthcare_provider_primary_taxonomy_switch_7",
+    "Healthcare Provider Taxonomy Code_8": "healthcare_provider_taxonomy_code_8",
+    "Healthcare Provider Primary Taxonomy Switch_8": "healthcare_provider_primary_taxonomy_switch_8",
+    "Healthcare Provider Taxonomy Code_9": "healthcare_provider_taxonomy_code_9",
+    "Healthcare Provider Primary Taxonomy Switch_9": "healthcare_provider_primary_taxonomy_switch_9",
+    "Healthcare Provider Taxonomy Code_10": "healthcare_provider_taxonomy_code_10",
+    "Healthcare Provider Primary Taxonomy Switch_10": "healthcare_provider_primary_taxonomy_switch_10",
+    "Healthcare Provider Taxonomy Code_11": "healthcare_provider_taxonomy_code_11",
+    "Healthcare Provider Primary Taxonomy Switch_11": "healthcare_provider_primary_taxonomy_switch_11",
+    "Healthcare Provider Taxonomy Code_12": "healthcare_provider_taxonomy_code_12",
+    "Healthcare Provider Primary Taxonomy Switch_12": "healthcare_provider_primary_taxonomy_switch_12",
+    "Healthcare Provider Taxonomy Code_13": "healthcare_provider_taxonomy_code_13",
+    "Healthcare Provider Primary Taxonomy Switch_13": "healthcare_provider_primary_taxonomy_switch_13",
+    "Healthcare Provider Taxonomy Code_14": "healthcare_provider_taxonomy_code_14",
+    "Healthcare Provider Primary Taxonomy Switch_14": "healthcare_provider_primary_taxonomy_switch_14",
+    "Healthcare Provider Taxonomy Code_15": "healthcare_provider_taxonomy_code_15",
+    "Healthcare Provider Primary Taxonomy Switch_15": "healthcare_provider_primary_taxonomy_switch_15",
+}
 
-        file_buffer = io.BytesIO()
 
-        print("Downloading blob data...")
-        blob_stream = blob_client.download_blob()
-        print(f"Blob download complete. Data size: {len(blob_stream):,} bytes")
+def open_parquet_blob(filename):
+    CONTAINER_NAME = "nppes"
+    blob_service_client = get_blob_service_client()
+    blob_client = blob_service_client.get_blob_client(
+        container=CONTAINER_NAME, blob=filename
+    )
+    # Only the footer is read here; row groups are fetched with ranged reads
+    return pyarrow.parquet.ParquetFile(BlobRangeReader(blob_client), pre_buffer=True)
 
-        for chunk in blob_stream.chunks():
-            file_buffer.write(chunk)
 
-        # Reset buffer position to beginning
-        file_buffer.seek(0)
+def extract_parquet_data_from_blob(filename, row_groups=None, skip_rows=0):
+    try:
+        logger.info(f"Starting streaming blob data extraction for file: {filename}")
+        parquet_file = open_parquet_blob(filename)
+        logger.info(
+            f"Parquet footer read: {parquet_file.metadata.num_rows:,} rows "
+            f"in {parquet_file.num_row_groups} row groups"
+        )
 
-        print("Scanning Parquet...")
         lazy_df = (
-            polars.scan_parquet(file_buffer)
-            .select(relevant_columns)
-            .rename(column_mapping)
+            scan_parquet_row_groups(parquet_file, row_groups, skip_rows)
+            .select(NPPES_RELEVANT_COLUMNS)
+            .rename(NPPES_COLUMN_MAPPING)
         )
 
         return lazy_df
 
     except Exception as e:
-        print(f"An error occurred: {e}")
+        logger.error(f"An error occurred: {e}")
         return None
 
 
-def load_chunked_blob_data_to_postgres(lazy_df, target_table, chunk_size=100_000):
-    try:
-        print(f"Starting to load data to {target_table} in chunks of {chunk_size:,}")
+# NPIs are 10 digits starting with 1 or 2; spill buckets split this range of
+# 4-digit prefixes evenly, so buckets in order hold ascending NPI ranges
+NPI_PREFIX_RANGE = (1000, 3000)
 
-        pg_conn = get_psycopg2_connection()
-        chunk_count = 0
-        total_rows_processed = 0
 
-        while True:
-            chunk_count += 1
-            batch_df = lazy_df.slice(total_rows_processed, chunk_size).collect()
-            if batch_df.is_empty():
-                print("No more data to process")
-                break
+def npi_bucket_expr(npi_column, bucket_count):
+    low, high = NPI_PREFIX_RANGE
+    prefix = polars.col(npi_column).str.slice(0, 4).cast(polars.Int32, strict=False).fill_null(low)
+    return ((prefix - low) * bucket_count // (high - low)).clip(0, bucket_count - 1)
 
-            # FIXME: For Demo Purposes Only
-            if chunk_count == 6 and target_table == "nppes_providers":
-                print("Demo data limit reached")
-                break
 
-            current_chunk_size = len(batch_df)
+def spill_by_npi_bucket(lazy_df, spill_dir, npi_column, bucket_count, chunk_size):
+    """
+    Stream lazy_df in batches and append each batch's rows to an lz4 Arrow
+    IPC spill file per NPI bucket. Returns the spill file paths in bucket
+    (so NPI range) order and the number of rows spilled.
+    """
+    writers = {}
+    rows_spilled = 0
+    try:
+        for batch_df in lazy_df.collect_batches(chunk_size=chunk_size):
+            if batch_df.is_empty():
+                continue
+            bucketed = batch_df.with_columns(
+                npi_bucket_expr(npi_column, bucket_count).alias("__npi_bucket")
+            )
+            for (bucket,), bucket_df in bucketed.partition_by(
+                "__npi_bucket", as_dict=True, include_key=False
+            ).items():
+                table = bucket_df.to_arrow(compat_level=polars.CompatLevel.oldest())
+                if bucket not in writers:
+                    writers[bucket] = pyarrow.ipc.new_file(
+                        os.path.join(spill_dir, f"bucket-{bucket:04d}.arrow"),
+                        table.schema,
+                        options=pyarrow.ipc.IpcWriteOptions(compression="lz4"),
+                    )
+                writers[bucket].write_table(table)
+            rows_spilled += len(batch_df)
+            logger.info(f"Spilled {rows_spilled:,} rows into {len(writers)} NPI buckets")
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return [os.path.join(spill_dir, f"bucket-{bucket:04d}.arrow") for bucket in sorted(writers)], rows_spilled
 
-            # Convert to CSV in memory for COPY
-            output = StringIO()
-            batch_df.write_csv(output, separator="\t", include_header=False)
-            output.seek(0)
 
-            # Use COPY for blazing fast bulk insert
-            with pg_conn.cursor() as cursor:
-                try:
-                    if chunk_count == 1:
-                        # Truncate table on first chunk if needed using stored procedure
-                        cursor.execute("CALL truncate_table(%s)", (target_table,))
+def write_npi_sorted_parquet(spill_paths, blob_writer, npi_column, row_group_size, compression_level):
+    """
+    Sort each spill file by NPI, one bucket in memory at a time, and write the
+    buckets in order as one zstd Parquet file with full row groups of
+    row_group_size rows and column statistics. Returns the rows written.
+    """
+    parquet_writer = None
+    pending = []
+    pending_rows = 0
+    rows_written = 0
+    for bucket_number, spill_path in enumerate(spill_paths, start=1):
+        with pyarrow.ipc.open_file(spill_path) as reader:
+            bucket_table = (
+                polars.from_arrow(reader.read_all())
+                .sort(npi_column)
+                .to_arrow(compat_level=polars.CompatLevel.oldest())
+            )
+        os.remove(spill_path)
+        if parquet_writer is None:
+            npi_index = bucket_table.schema.get_field_index(npi_column)
+            parquet_writer = pyarrow.parquet.ParquetWriter(
+                blob_writer,
+                bucket_table.schema,
+                compression="zstd",
+                compression_level=compression_level,
+                write_statistics=True,
+                sorting_columns=[pyarrow.parquet.SortingColumn(npi_index)],
+            )
+        pending.append(bucket_table)
+        pending_rows += bucket_table.num_rows
 
-                    cursor.copy_from(
-                        output,
-                        target_table,
-                        columns=list(batch_df.columns),
-                        sep="\t",
-                    )
-                    pg_conn.commit()
-                    total_rows_processed += current_chunk_size
-                    print(
-                        f"[SUCCESS] Successfully loaded chunk {chunk_count} ({current_chunk_size:,} rows)"
-                    )
+        # Row groups span bucket boundaries; only the last one is partial
+        done = bucket_number == len(spill_paths)
+        while pending_rows >= row_group_size or (done and pending_rows):
+            buffered = pyarrow.concat_tables(pending)
+            row_group = buffered.slice(0, row_group_size)
+            parquet_writer.write_table(row_group, row_group_size=row_group_size)
+            rows_written += row_group.num_rows
+            pending = [buffered.slice(row_group_size)]
+            pending_rows = pending[0].num_rows
+    if parquet_writer is not None:
+        parquet_writer.close()
+    return rows_written
 
-                except Exception as e:
-                    pg_conn.rollback()
-                    print(f"Error loading chunk {chunk_count}: {e}")
-                    raise
 
-            if current_chunk_size < chunk_size:
-                break
+def convert_nppes_csv_to_parquet(
+    csv_filename,
+    parquet_filename,
+    row_group_size=250_000,
+    bucket_count=32,
+    chunk_size=100_000,
+    compression_level=3,
+):
+    """
+    Convert the CMS NPPES dissemination CSV in the nppes container to an
+    NPI-sorted Parquet file with the NPPES_RELEVANT_COLUMNS, ready for
+    extract_parquet_data_from_blob and the parallel row group loader. The
+    CSV is streamed once into NPI-range spill files on local disk, so only
+    one bucket is sorted in memory at a time. Returns the rows written.
+    """
+    CONTAINER_NAME = "nppes"
+    npi_column = "NPI"
+    schema_overrides = {column: polars.Utf8 for column in NPPES_RELEVANT_COLUMNS}
+    lazy_df = extract_csv_data_from_blob(csv_filename, NPPES_RELEVANT_COLUMNS, {}, schema_overrides)
+    if lazy_df is None:
+        raise ValueError(f"Could not read NPPES CSV file: {csv_filename}")
+    lazy_df = lazy_df.with_columns(polars.col(npi_column).str.strip_chars())
 
-        pg_conn.close()
-        print(
-            f"COMPLETE: Successfully loaded all {total_rows_processed:,} rows to {target_table}"
+    logger.info(f"Converting {csv_filename} to {parquet_filename} ({bucket_count} NPI buckets)")
+    with tempfile.TemporaryDirectory(prefix="nppes_spill_", dir=os.getenv("SPILL_DIR")) as spill_dir:
+        spill_paths, rows_spilled = spill_by_npi_bucket(
+            lazy_df, spill_dir, npi_column, bucket_count, chunk_size
         )
+        if not rows_spilled:
+            raise ValueError(f"NPPES CSV file {csv_filename} has no rows")
 
-    except Exception as e:
-        print(f"Failed to write DataFrame to Postgres: {e}")
-        if "pg_conn" in locals():
-            pg_conn.close()
-        raise
+        blob_client = get_blob_service_client().get_blob_client(
+            container=CONTAINER_NAME, blob=parquet_filename
+        )
+        blob_writer = BlobBlockWriter(blob_client)
+        rows_written = write_npi_sorted_parquet(
+            spill_paths, blob_writer, npi_column, row_group_size, compression_level
+        )
+        total_bytes = blob_writer.commit()
 
+    logger.info(
+        f"Converted {rows_written:,} rows to {parquet_filename} ({total_bytes:,} bytes, "
+        f"row groups of {row_group_size:,})"
+    )
+    return rows_written
 
-def convert_df_to_csv(df):
-    output = StringIO()
-    df.write_csv(output)
-    output.seek(0)
-    return output.getvalue()
 
+# PostgreSQL binary COPY framing: signature, flags, header extension length
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+PGCOPY_TRAILER = struct.pack(">h", -1)
+PGCOPY_NULL_FIELD = struct.pack(">i", -1)
 
-def upload_csv_to_azure_blob(filename, data):
-    CONTAINER_NAME = "nppes"
-    try:
-        blob_service_client = get_blob_service_client()
-        blob_client = blob_service_client.get_blob_client(
-            container=CONTAINER_NAME, blob=filename
-        )
-        
-        # Handle encoding more robustly
-        if isinstance(data, str):
-            # Use errors='replace' to handle problematic characters
-            blob_data = data.encode("utf-8", errors="replace")
-        else:
-            blob_data = data
-            
-        blob_client.upload_blob(blob_data, overwrite=True)
-        print(f"Successfully uploaded {filename} to Azure Blob Storage")
-        return None
-    except Exception as e:
-        print(f"Upload error for {filename}: {e}")
-        return str(e)
+# Fixed-width PostgreSQL types -> (Polars dtype, big-endian NumPy dtype)
+BINARY_COPY_FIXED_WIDTH_TYPES = {
+    "int2": (polars.Int16, ">i2"),
+    "int4": (polars.Int32, ">i4"),
+    "int8": (polars.Int64, ">i8"),
+    "float4": (polars.Float32, ">f4"),
+    "float8": (polars.Float64, ">f8"),
+    "bool": (polars.Boolean, "u1"),
+    "date": (polars.Date, ">i4"),
+    "timestamp": (polars.Datetime("us"), ">i8"),
+    "timestamptz": (polars.Datetime("us", "UTC"), ">i8"),
+}
+# Types whose binary form is their UTF-8 text
+BINARY_COPY_TEXT_TYPES = {"text", "varchar", "bpchar", "name"}
+# PostgreSQL dates and timestamps count from 2000-01-01
+POSTGRES_EPOCH_DAYS = 10_957
+POSTGRES_EPOCH_MICROSECONDS = POSTGRES_EPOCH_DAYS * 86_400 * 1_000_000
 
 
-@app.route(route="NPPES_Data_Cleaning")
-def NPPES_Data_Cleaning(req: func.HttpRequest) -> func.HttpResponse:
-    start_time = time.time()  # Tick
-    try:
-        api_data = fetch_api_data()
-        load_api_data(api_data)
+def get_table_column_types(cursor, table_name):
+    cursor.execute(
+        """
+        SELECT a.attname, t.typname
+        FROM pg_attribute a
+        JOIN pg_type t ON t.oid = a.atttypid
+        WHERE a.attrelid = %s::regclass
+          AND a.attnum > 0
+          AND NOT a.attisdropped
+        """,
+        (table_name,),
+    )
+    return dict(cursor.fetchall())
 
-        body = req.get_json()
 
-        # First & Large Data Target
-        parquet_target_file = body.get("parquet_target_file")
-        nppes_providers_table = "nppes_providers"
-        lazy_df_1 = extract_parquet_data_from_blob(parquet_target_file)
-        if lazy_df_1 is not None:
-            load_chunked_blob_data_to_postgres(
-                lazy_df_1, target_table=nppes_providers_table, chunk_size=100_000
-            )
-
-        # Additional Data Target 1
-        csv_target_file_1 = body.get("csv_target_file_1")
-        zip_county_table = "zip_county"
-        zip_county_relevant_columns = [
-            "ZIP",
-            "COUNTY",
-            "USPS_ZIP_PREF_CITY",
-            "USPS_ZIP_PREF_STATE",
-            "RES_RATIO",
-            "BUS_RATIO",
-            "OTH_RATIO",
-            "TOT_RATIO",
-        ]
-        zip_county_column_mapping = {
-            "ZIP": "zip",
-            "COUNTY": "county",
-            "USPS_ZIP_PREF_CITY": "usps_zip_pref_city",
-            "USPS_ZIP_PREF_STATE": "usps_zip_pref_state",
-            "RES_RATIO": "res_ratio",
-            "BUS_RATIO": "bus_ratio",
-            "OTH_RATIO": "oth_ratio",
-            "TOT_RATIO": "tot_ratio",
-        }
-        # Add schema overrides to ensure ZIP codes are treated as strings
-        zip_county_schema_overrides = {
-            "ZIP": polars.Utf8,
-            "COUNTY": polars.Utf8,
-            "USPS_ZIP_PREF_CITY": polars.Utf8,
-            "USPS_ZIP_PREF_STATE": polars.Utf8,
-        }
-        lazy_df_2 = extract_csv_data_from_blob(
-            csv_target_file_1, zip_county_relevant_columns, zip_county_column_mapping, zip_county_schema_overrides
-        )
-        if lazy_df_2 is not None:
-            load_chunked_blob_data_to_postgres(
-                lazy_df_2, target_table=zip_county_table, chunk_size=100_000
-            )
-
-        # Additional Data Target 2
-        csv_target_file_2 = body.get("csv_target_file_2")
-        ssa_fips_state_county_table = "ssa_fips_state_county"
-        ssa_relevant_columns = []
-        ssa_column_mapping = {}
-        ssa_schema_overrides = {
-            "ssa_code": polars.Utf8,
-            "fipscounty": polars.Utf8,
-            "cbsa_code": polars.Utf8,
-        }
+def length_prefixed(payload, lengths, is_null):
+    # Prefix each value with its int32 length; NULLs become a -1 length and no data
+    prefixes = pyarrow.FixedSizeBinaryArray.from_buffers(
+        pyarrow.binary(4),
+        len(lengths),
+        [None, pyarrow.py_buffer(numpy.asarray(lengths).astype(">i4").tobytes())],
+    ).cast(pyarrow.large_binary())
+    fields = pyarrow.compute.binary_join_element_wise(
+        prefixes, payload, pyarrow.scalar(b"", pyarrow.large_binary())
+    )
+    return pyarrow.compute.if_else(
+        is_null, pyarrow.scalar(PGCOPY_NULL_FIELD, pyarrow.large_binary()), fields
+    )
 
-        lazy_df_3 = extract_csv_data_from_blob(
+
+def encode_numeric(value):
+    # Base-10000 digits, weight of the first digit, sign and display scale
+    value = decimal.Decimal(str(value))
+    if value.is_nan():
+        return struct.pack(">hhHh", 0, 0, 0xC000, 0)
+    if value.is_infinite():
+        raise ValueError(f"Cannot COPY {value} into a numeric column")
+    sign, digits, exponent = value.as_tuple()
+    dscale = max(-exponent, 0)
+    digit_string = "".join(map(str, digits)) + "0" * max(exponent, 0)
+    # Leading fraction zeros are not in the digit tuple (0.000100 -> 100)
+    digit_string = digit_string.rjust(dscale + 1, "0")
+    integer_part = digit_string[: len(digit_string) - dscale] or "0"
+    fraction_part = digit_string[len(digit_string) - dscale :].rjust(dscale, "0")
+
+    integer_part = integer_part.rjust(-(-len(integer_part) // 4) * 4, "0")
+    fraction_part = fraction_part.ljust(-(-len(fraction_part) // 4) * 4, "0")
+    groups = [int(integer_part[i : i + 4]) for i in range(0, len(integer_part), 4)]
+    weight = len(groups) - 1
+    groups += [int(fraction_part[i : i + 4]) for i in range(0, len(fraction_part), 4)]
+
+    while groups and groups[0] == 0:
+        groups.pop(0)
+        weight -= 1
+    while groups and groups[-1] == 0:
+        groups.pop()
+    if not groups:
+        weight = 0
+    return struct.pack(
+        f">hhHh{len(groups)}h", len(groups), weight, 0x4000 if sign else 0, dscale, *groups
+    )
+
+
+def encode_numeric_field(value):
+    if value is None:
+        return PGCOPY_NULL_FIELD
+    encoded = encode_numeric(value)
+    return struct.pack(">i", len(encoded)) + encoded
+
+
+# A Decimal's 128-bit scaled integer is split into limbs of 16 decimal digits
+# (four base-10000 digits each) that fit numpy's uint64
+NUMERIC_LIMB = 10**16
+# Characters of exponent notation, NaN and Infinity, which to_decimal misreads
+NUMERIC_NON_DECIMAL_CHARS = ["e", "E", "n", "N"]
+
+
+def numeric_decimal_series(series):
+    """
+    series as a Polars Decimal, or None when some value has no exact Decimal
+    form (NaN, exponent notation, a fraction over 38 digits, not a number)
+    or the column is neither numeric nor text.
+    """
+    if series.dtype.is_decimal():
+        return series
+    if series.dtype.is_integer():
+        return series.cast(polars.Decimal(38, 0))
+    if series.dtype.is_float():
+        text = series.cast(polars.Utf8)
+    elif series.dtype == polars.Utf8:
+        text = series.str.strip_chars()
+    else:
+        return None
+    if text.str.contains_any(NUMERIC_NON_DECIMAL_CHARS).any():
+        return None
+    # The widest fraction of the whole column, not just the inferred sample
+    point = text.str.find(".", literal=True)
+    scale = (text.str.len_bytes() - point - 1).max() if point.is_not_null().any() else 0
+    if scale > 38:
+        return None
+    decimals = text.str.to_decimal(scale=scale)
+    if decimals.null_count() != text.null_count():
+        return None
+    return decimals
+
+
+def encode_numeric_column(decimals):
+    """
+    Encode a Decimal series as numeric payloads: base-10000 digits split with
+    numpy and headers from the column's fixed scale, which is the display
+    scale of every value. Returns None if the padded values overflow 128 bits.
+    """
+    count = len(decimals)
+    scale = decimals.dtype.scale
+    # Pad the scale to whole base-10000 digits after the decimal point
+    padding = -scale % 4
+    scaled = decimals.to_physical().fill_null(0)
+    magnitude = scaled.abs()
+    peak = magnitude.max() or 0
+    if peak >= 10 ** (38 - padding):
+        return None
+
+    # Only the limbs some value uses; most columns fit in the low one
+    limb_count = 1
+    while peak * 10**padding >= NUMERIC_LIMB**limb_count:
+        limb_count += 1
+    if limb_count == 1:
+        limbs = magnitude.cast(polars.UInt64).to_numpy()[:, None] * numpy.uint64(10**padding)
+    else:
+        padded = polars.lit(magnitude) * polars.lit(10**padding, dtype=polars.Int128)
+        limb = polars.lit(NUMERIC_LIMB, dtype=polars.Int128)
+        limbs = polars.select(
+            (padded // limb**position % limb).cast(polars.UInt64).alias(str(position))
+            for position in range(limb_count - 1, -1, -1)
+        ).to_numpy()
+
+    group_count = 4 * limb_count
+    groups = numpy.empty((count, group_count), dtype=numpy.int16)
+    for position in range(limb_count):
+        # Halves of 8 digits keep the remaining divisions in 32 bits
+        upper = (limbs[:, position] // numpy.uint64(10**8)).astype(numpy.uint32)
+        lower = (limbs[:, position] % numpy.uint64(10**8)).astype(numpy.uint32)
+        for digit, (half, divisor) in enumerate(
+            ((upper, 10000), (upper, 1), (lower, 10000), (lower, 1))
+        ):
+            groups[:, position * 4 + digit] = half // numpy.uint32(divisor) % numpy.uint32(10000)
+
+    # Drop leading and trailing zero digits; zero has no digits and weight 0
+    first = numpy.full(count, group_count)
+    last = numpy.full(count, -1)
+    for column in range(group_count):
+        is_nonzero = groups[:, column] != 0
+        first = numpy.where(is_nonzero & (first == group_count), column, first)
+        last = numpy.where(is_nonzero, column, last)
+    ndigits = numpy.maximum(last - first + 1, 0)
+    weight = numpy.where(ndigits > 0, group_count - 1 - first - (scale + padding) // 4, 0)
+
+    words = numpy.empty((count, 4 + group_count), dtype=numpy.int16)
+    words[:, 0] = ndigits
+    words[:, 1] = weight
+    words[:, 2] = numpy.where((scaled < 0).to_numpy(), 0x4000, 0)
+    words[:, 3] = scale
+    words[:, 4:] = groups
+    # Row-major boolean indexing keeps each value's header and digits together
+    columns = numpy.arange(-4, group_count)
+    kept = (columns < 0) | ((columns >= first[:, None]) & (columns <= last[:, None]))
+    data = words[kept].astype(">i2").tobytes()
+    lengths = 2 * (4 + ndigits)
+    offsets = numpy.zeros(count + 1, dtype=numpy.int64)
+    numpy.cumsum(lengths, out=offsets[1:])
+    payload = pyarrow.LargeBinaryArray.from_buffers(
+        pyarrow.large_binary(),
+        count,
+        [None, pyarrow.py_buffer(offsets.tobytes()), pyarrow.py_buffer(data)],
+    )
+    return payload, lengths
+
+
+def encode_binary_copy_field(series, pg_type):
+    """Encode one column as a large_binary array of length-prefixed COPY fields."""
+    is_null = series.is_null().to_arrow()
+
+    if pg_type in BINARY_COPY_TEXT_TYPES:
+        payload = (
+            series.cast(polars.Utf8)
+            .fill_null("")
+            .to_arrow(compat_level=polars.CompatLevel.oldest())
+            .cast(pyarrow.large_binary())
+        )
+        lengths = pyarrow.compute.binary_length(payload).to_numpy()
+        return length_prefixed(payload, lengths, is_null)
+
+    if pg_type in BINARY_COPY_FIXED_WIDTH_TYPES:
+        dtype, wire_dtype = BINARY_COPY_FIXED_WIDTH_TYPES[pg_type]
+        values = series.cast(dtype)
+        if pg_type == "date":
+            values = values.cast(polars.Int32) - POSTGRES_EPOCH_DAYS
+        elif pg_type in ("timestamp", "timestamptz"):
+            values = values.dt.epoch("us") - POSTGRES_EPOCH_MICROSECONDS
+        wire_values = values.fill_null(0).to_numpy().astype(wire_dtype)
+        width = wire_values.dtype.itemsize
+        payload = pyarrow.FixedSizeBinaryArray.from_buffers(
+            pyarrow.binary(width), len(series), [None, pyarrow.py_buffer(wire_values.tobytes())]
+        ).cast(pyarrow.large_binary())
+        return length_prefixed(payload, numpy.full(len(series), width), is_null)
+
+    if pg_type == "numeric":
+        decimals = numeric_decimal_series(series)
+        encoded = encode_numeric_column(decimals) if decimals is not None else None
+        if encoded is not None:
+            return length_prefixed(*encoded, is_null)
+        # Encoded value by value when the column is neither numeric nor text,
+        # has an e/E/n/N (exponent notation, NaN, Infinity), a fraction over
+        # 38 digits or text to_decimal cannot parse, or when a value padded to
+        # whole base-10000 fraction digits needs more than 38 digits
+        return pyarrow.array(
+            [encode_numeric_field(value) for value in series.to_list()],
+            type=pyarrow.large_binary(),
+        )
+
+    raise ValueError(f"Binary COPY does not support column type {pg_type} ({series.name})")
+
+
+def encode_binary_copy(df, column_types):
+    """
+    Encode a DataFrame in PostgreSQL's binary COPY format. column_types maps
+    each column to its PostgreSQL type name (pg_type.typname).
+    """
+    if df.is_empty():
+        return PGCOPY_HEADER + PGCOPY_TRAILER
+
+    fields = [encode_binary_copy_field(df[column], column_types[column]) for column in df.columns]
+    tuples = pyarrow.compute.binary_join_element_wise(
+        pyarrow.scalar(struct.pack(">h", len(fields)), pyarrow.large_binary()),
+        *fields,
+        pyarrow.scalar(b"", pyarrow.large_binary()),
+    )
+    # The joined tuples sit back to back in the array's data buffer
+    offsets = numpy.frombuffer(tuples.buffers()[1], dtype=numpy.int64)
+    start, end = offsets[tuples.offset], offsets[tuples.offset + len(tuples)]
+    return PGCOPY_HEADER + tuples.buffers()[2][start:end].to_pybytes() + PGCOPY_TRAILER
+
+
+def copy_dataframe_to_postgres(cursor, df, target_table, table_column_types=None):
+    # Column types are looked up once per table and cached in table_column_types
+    if table_column_types is None:
+        table_column_types = {}
+    if target_table not in table_column_types:
+        table_column_types[target_table] = get_table_column_types(cursor, target_table)
+
+    payload = encode_binary_copy(df, table_column_types[target_table])
+    cursor.copy_expert(
+        f"COPY {target_table} ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT BINARY)",
+        io.BytesIO(payload),
+    )
+    count_metric("rows_copied", len(df))
+    count_metric("copy_bytes", len(payload))
+
+
+def unpivot_provider_taxonomy(df):
+    # One row per non-empty taxonomy code/switch pair of each raw provider row
+    return polars.concat(
+        [
+            df.select(
+                polars.col("npi").str.strip_chars(" "),
+                polars.lit(slot, dtype=polars.Int16).alias("slot"),
+                polars.col(f"healthcare_provider_taxonomy_code_{slot}")
+                .str.strip_chars(" ")
+                .alias("code"),
+                (polars.col(f"healthcare_provider_primary_taxonomy_switch_{slot}") == "Y")
+                .fill_null(False)
+                .alias("is_primary"),
+            )
+            for slot in range(1, 16)
+        ]
+    ).filter(polars.col("code").is_not_null() & (polars.col("code") != ""))
+
+
+# Tables built from each batch of a raw load and COPYed alongside it
+DERIVED_TABLE_BUILDERS = {
+    "nppes_providers": {"provider_taxonomy": unpivot_provider_taxonomy},
+}
+
+
+def copy_derived_tables_to_postgres(cursor, batch_df, derived_tables, table_column_types=None):
+    for derived_table, build in derived_tables.items():
+        derived_df = build(batch_df)
+        if not derived_df.is_empty():
+            copy_dataframe_to_postgres(cursor, derived_df, derived_table, table_column_types)
+
+
+def trimmed(column):
+    # Same as PostgreSQL TRIM(): spaces only
+    return polars.col(column).cast(polars.Utf8).str.strip_chars(" ")
+
+
+def is_blank(column):
+    return trimmed(column).is_null() | (trimmed(column) == "")
+
+
+def fails_pattern(column, pattern):
+    return ~trimmed(column).str.contains(pattern).fill_null(False)
+
+
+# The rows clean_and_populate_nppes_data would otherwise drop without a trace
+NPPES_PROVIDER_RULES = [
+    ("npi_missing", is_blank("npi")),
+    ("npi_not_10_digits", fails_pattern("npi", r"^[0-9]{10}$")),
+    ("entity_type_missing", is_blank("entity_type_code")),
+    ("entity_type_not_numeric", fails_pattern("entity_type_code", r"^[0-9]+$")),
+]
+
+# Target table -> ordered (reason code, expression true for failing rows);
+# a row is rejected with the first rule it fails
+VALIDATION_RULES = {
+    "nppes_providers": NPPES_PROVIDER_RULES,
+    "nppes_providers_delta": NPPES_PROVIDER_RULES,
+    "nppes_providers_clean": NPPES_PROVIDER_RULES,
+    "census_county_population": [
+        ("name_missing", polars.col("name").is_null()),
+        ("state_fips_missing", polars.col("state_fips").is_null()),
+        ("county_fips_missing", polars.col("county_fips").is_null()),
+        ("population_not_numeric", polars.col("population").cast(polars.Int32, strict=False).is_null()),
+    ],
+    "zip_county": [
+        ("zip_missing", is_blank("zip")),
+        ("county_missing", is_blank("county")),
+    ],
+    "nucc_taxonomy": [
+        ("code_missing", is_blank("code")),
+        ("grouping_missing", polars.col("grouping").is_null()),
+        ("classification_missing", polars.col("classification").is_null()),
+    ],
+    "npi_deactivation": [
+        ("npi_missing", is_blank("npi")),
+        ("npi_not_10_digits", fails_pattern("npi", r"^[0-9]{10}$")),
+    ],
+}
+
+# Column that identifies a rejected row in load_rejects.record_key
+VALIDATION_RECORD_KEYS = {
+    "nppes_providers": "npi",
+    "nppes_providers_delta": "npi",
+    "nppes_providers_clean": "npi",
+    "census_county_population": "county_fips",
+    "zip_county": "zip",
+    "nucc_taxonomy": "code",
+    "npi_deactivation": "npi",
+}
+
+
+def validate_batch(df, rules):
+    """
+    Evaluate every rule in one vectorized pass and split df into the rows
+    that pass all of them and the rejected rows with a reason_code column.
+    """
+    reason_code = polars.when(rules[0][1]).then(polars.lit(rules[0][0]))
+    for code, failed in rules[1:]:
+        reason_code = reason_code.when(failed).then(polars.lit(code))
+    flagged = df.with_columns(
+        reason_code.otherwise(polars.lit(None, dtype=polars.Utf8)).alias("reason_code")
+    )
+    is_rejected = polars.col("reason_code").is_not_null()
+    return flagged.filter(~is_rejected).drop("reason_code"), flagged.filter(is_rejected)
+
+
+def clear_load_rejects(cursor, target_table, source_name=None):
+    # Reloading a source replaces its earlier rejects
+    if target_table in VALIDATION_RULES:
+        cursor.execute(
+            "DELETE FROM load_rejects WHERE target_table = %s AND source_name IS NOT DISTINCT FROM %s",
+            (target_table, source_name),
+        )
+
+
+def validate_and_copy_rejects(
+    cursor, batch_df, target_table, table_column_types=None, source_name=None, run_id=None
+):
+    """
+    Apply the VALIDATION_RULES of target_table to a batch, COPY the rejected
+    rows into load_rejects and count them per rule in the stage metrics.
+    Returns the accepted rows and {reason_code: rejected rows}.
+    """
+    rules = VALIDATION_RULES.get(target_table)
+    if not rules:
+        return batch_df, {}
+    valid_df, rejects_df = validate_batch(batch_df, rules)
+    if rejects_df.is_empty():
+        return valid_df, {}
+
+    record_key = VALIDATION_RECORD_KEYS.get(target_table)
+    record_columns = [column for column in rejects_df.columns if column != "reason_code"]
+    load_rejects_df = rejects_df.select(
+        polars.lit(target_table).alias("target_table"),
+        polars.lit(source_name, dtype=polars.Utf8).alias("source_name"),
+        polars.lit(run_id, dtype=polars.Utf8).alias("run_id"),
+        polars.col("reason_code"),
+        (
+            polars.col(record_key).cast(polars.Utf8).str.slice(0, 100)
+            if record_key
+            else polars.lit(None, dtype=polars.Utf8)
+        ).alias("record_key"),
+        polars.struct(record_columns).struct.json_encode().alias("record"),
+    )
+    copy_dataframe_to_postgres(cursor, load_rejects_df, "load_rejects", table_column_types)
+
+    reject_counts = dict(rejects_df["reason_code"].value_counts().iter_rows())
+    for code, count in reject_counts.items():
+        count_metric(f"rejected:{code}", count)
+    return valid_df, reject_counts
+
+
+def log_reject_counts(target_table, source_name, reject_counts):
+    if reject_counts:
+        log_event(
+            "rows_rejected",
+            target_table=target_table,
+            source_name=source_name,
+            rejected=sum(reject_counts.values()),
+            reasons=dict(reject_counts),
+        )
+
+
+def load_chunked_blob_data_to_postgres(
+    lazy_df,
+    target_table,
+    chunk_size=100_000,
+    bulk_load=False,
+    run_id=None,
+    source_name=None,
+    resume_source=None,
+):
+    """
+    COPY a lazy source into target_table in chunks. With a run_id, chunks are
+    checkpointed and a later call resumes after the last committed one; the
+    rest of the source is then read from resume_source(rows_committed) if
+    given (a scan that skips without reading), otherwise by slicing lazy_df.
+    Checkpoints carry the ETag of the source_name blob, and a call finding
+    the blob replaced starts over.
+    """
+    try:
+        logger.info(f"Starting to load data to {target_table} in chunks of {chunk_size:,}")
+
+        chunk_count = 0
+        total_rows_processed = 0
+        checkpoints = []
+        source_etag = None
+        if run_id is not None:
+            if source_name is not None:
+                source_etag, _ = get_blob_fingerprint(source_name)
+                discard_source_checkpoints_if_changed(run_id, target_table, source_name, source_etag)
+            # Resume after the last chunk this run committed
+            checkpoints = get_run_checkpoints(run_id, target_table)
+            chunk_offsets = [
+                (row_offset, rows_committed)
+                for _, _, row_offset, rows_committed in checkpoints
+                if row_offset is not None
+            ]
+            chunk_count = len(chunk_offsets)
+            total_rows_processed = max(
+                (row_offset + rows_committed for row_offset, rows_committed in chunk_offsets),
+                default=0,
+            )
+            swapped = any(chunk_key == "swapped" for chunk_key, _, _, _ in checkpoints)
+            if (
+                bulk_load
+                and chunk_count
+                and not swapped
+                and not staging_rows_match_checkpoints(
+                    run_id,
+                    target_table,
+                    f"{target_table}_staging",
+                    total_rows_processed - count_run_rejects(run_id, target_table),
+                )
+            ):
+                checkpoints = []
+                chunk_count = total_rows_processed = 0
+            if total_rows_processed:
+                logger.info(
+                    f"Resuming {target_table} after {chunk_count} chunks "
+                    f"({total_rows_processed:,} rows) committed by run {run_id}"
+                )
+                if resume_source is not None:
+                    lazy_df = resume_source(total_rows_processed)
+                    if lazy_df is None:
+                        raise ValueError(f"Could not reopen the source of {target_table}")
+                else:
+                    lazy_df = lazy_df.slice(total_rows_processed)
+        resumed = chunk_count > 0
+        if any(chunk_key == "swapped" for chunk_key, _, _, _ in checkpoints):
+            logger.info(f"Skipping {target_table}: run {run_id} already swapped it in")
+            return total_rows_processed - count_run_rejects(run_id, target_table)
+
+        pg_conn = get_psycopg2_connection()
+        derived_tables = DERIVED_TABLE_BUILDERS.get(target_table, {})
+        table_column_types = {}
+        # A bulk load fills unlogged, unindexed staging copies that replace the
+        # live tables (logged and indexed) once every chunk is in
+        copy_tables = {
+            table: f"{table}_staging" if bulk_load else table
+            for table in (target_table, *derived_tables)
+        }
+        derived_copy_tables = {
+            copy_tables[table]: build for table, build in derived_tables.items()
+        }
+        reject_counts = collections.Counter()
+
+        # Walk the source once; each batch goes straight to COPY
+        for batch_df in lazy_df.collect_batches(chunk_size=chunk_size):
+            if batch_df.is_empty():
+                continue
+            chunk_count += 1
+
+            current_chunk_size = len(batch_df)
+
+            # Use COPY for blazing fast bulk insert
+            with pg_conn.cursor() as cursor:
+                try:
+                    if chunk_count == 1 and not resumed:
+                        for table in copy_tables:
+                            if bulk_load:
+                                cursor.execute(
+                                    "CALL prepare_staging_table(%s, %s)", (table, True)
+                                )
+                            else:
+                                # Truncate table on first chunk if needed using stored procedure
+                                cursor.execute("CALL truncate_table(%s)", (table,))
+                        clear_load_rejects(cursor, target_table, source_name)
+
+                    # Rejected rows go to load_rejects in the same transaction
+                    valid_df, chunk_reject_counts = validate_and_copy_rejects(
+                        cursor, batch_df, target_table, table_column_types, source_name, run_id
+                    )
+                    copy_dataframe_to_postgres(
+                        cursor, valid_df, copy_tables[target_table], table_column_types
+                    )
+                    copy_derived_tables_to_postgres(
+                        cursor, valid_df, derived_copy_tables, table_column_types
+                    )
+                    # Offsets count source rows, rejected ones included
+                    if run_id is not None:
+                        record_checkpoint(
+                            cursor,
+                            run_id,
+                            target_table,
+                            f"offset:{total_rows_processed}",
+                            source_name=source_name,
+                            row_offset=total_rows_processed,
+                            rows_committed=current_chunk_size,
+                            source_etag=source_etag,
+                        )
+                    pg_conn.commit()
+                    total_rows_processed += current_chunk_size
+                    reject_counts.update(chunk_reject_counts)
+                    logger.info(
+                        f"[SUCCESS] Successfully loaded chunk {chunk_count} ({current_chunk_size:,} rows)"
+                    )
+
+                except Exception as e:
+                    pg_conn.rollback()
+                    logger.error(f"Error loading chunk {chunk_count}: {e}")
+                    raise
+        else:
+            logger.info("No more data to process")
+
+        if bulk_load and chunk_count:
+            with pg_conn.cursor() as cursor:
+                for table in copy_tables:
+                    cursor.execute("CALL swap_staging_table(%s)", (table,))
+                if run_id is not None:
+                    record_checkpoint(
+                        cursor, run_id, target_table, "swapped", source_etag=source_etag
+                    )
+            pg_conn.commit()
+
+        pg_conn.close()
+        log_reject_counts(target_table, source_name, reject_counts)
+        # Offsets count rejected rows too; a resumed run also rejected rows
+        # in the attempts before this one
+        if run_id is not None:
+            rows_loaded = total_rows_processed - count_run_rejects(run_id, target_table)
+        else:
+            rows_loaded = total_rows_processed - sum(reject_counts.values())
+        logger.info(
+            f"COMPLETE: Successfully loaded all {rows_loaded:,} rows to {target_table}"
+        )
+        return rows_loaded
+
+    except Exception as e:
+        logger.error(f"Failed to write DataFrame to Postgres: {e}")
+        if "pg_conn" in locals():
+            pg_conn.close()
+        raise
+
+
+def load_parquet_partition_to_postgres(
+    filename,
+    staging_table,
+    row_groups,
+    cancel_event,
+    chunk_size=100_000,
+    derived_tables=None,
+    run_id=None,
+    target_table=None,
+    source_etag=None,
+):
+    """
+    Worker for the parallel loader: COPY a disjoint set of Parquet row groups
+    into the staging table (and derived staging tables) over its own connection.
+    With a run_id each row group is committed together with its checkpoint.
+    """
+    pg_conn = get_psycopg2_connection()
+    try:
+        rows_loaded = 0
+        table_column_types = {}
+        reject_counts = collections.Counter()
+        for row_group in row_groups:
+            lazy_df = extract_parquet_data_from_blob(filename, row_groups=[row_group])
+            if lazy_df is None:
+                raise ValueError(f"Could not open {filename} for row group {row_group}")
+
+            row_group_rows = 0
+            for batch_df in lazy_df.collect_batches(chunk_size=chunk_size):
+                if cancel_event.is_set():
+                    # Uncheckpointed batches of this row group are dropped
+                    pg_conn.rollback()
+                    logger.info(f"Partition {row_groups} cancelled after {rows_loaded:,} rows")
+                    return rows_loaded
+                if batch_df.is_empty():
+                    continue
+                with pg_conn.cursor() as cursor:
+                    try:
+                        valid_df, batch_reject_counts = validate_and_copy_rejects(
+                            cursor, batch_df, target_table, table_column_types, filename, run_id
+                        )
+                        copy_dataframe_to_postgres(
+                            cursor, valid_df, staging_table, table_column_types
+                        )
+                        copy_derived_tables_to_postgres(
+                            cursor, valid_df, derived_tables or {}, table_column_types
+                        )
+                        if run_id is None:
+                            pg_conn.commit()
+                    except Exception:
+                        pg_conn.rollback()
+                        raise
+                row_group_rows += len(valid_df)
+                reject_counts.update(batch_reject_counts)
+
+            if run_id is not None:
+                with pg_conn.cursor() as cursor:
+                    record_checkpoint(
+                        cursor,
+                        run_id,
+                        target_table,
+                        f"row_group:{row_group}",
+                        source_name=filename,
+                        row_group=row_group,
+                        rows_committed=row_group_rows,
+                        source_etag=source_etag,
+                    )
+                pg_conn.commit()
+            rows_loaded += row_group_rows
+
+        log_reject_counts(target_table, filename, reject_counts)
+        return rows_loaded
+    finally:
+        pg_conn.close()
+
+
+def load_parquet_blob_parallel_to_postgres(
+    filename,
+    target_table="nppes_providers",
+    max_workers=4,
+    chunk_size=100_000,
+    bulk_load=False,
+    run_id=None,
+):
+    """
+    Load a Parquet blob with several COPY workers running at once, each on its
+    own connection and its own share of the row groups. Rows land in a staging
+    table that only replaces the target once every partition has succeeded.
+    With bulk_load the staging table is unlogged and its indexes are built at the swap.
+    With a run_id a re-run keeps the staging tables and skips checkpointed row
+    groups, unless the blob's ETag changed since they were loaded.
+    """
+    staging_table = f"{target_table}_staging"
+    derived_tables = DERIVED_TABLE_BUILDERS.get(target_table, {})
+    # Every table the load replaces, swapped together in one transaction
+    swapped_tables = [target_table, *derived_tables]
+    try:
+        logger.info(f"Starting parallel load of {filename} to {target_table} with {max_workers} workers")
+
+        checkpoints = []
+        source_etag = None
+        if run_id is not None:
+            source_etag, _ = get_blob_fingerprint(filename)
+            discard_source_checkpoints_if_changed(run_id, target_table, filename, source_etag)
+            checkpoints = get_run_checkpoints(run_id, target_table)
+        loaded_row_groups = {
+            row_group: rows_committed
+            for _, row_group, _, rows_committed in checkpoints
+            if row_group is not None
+        }
+
+        checkpoint_keys = {chunk_key for chunk_key, _, _, _ in checkpoints}
+        if "swapped" in checkpoint_keys:
+            logger.info(f"Skipping {target_table}: run {run_id} already swapped it in")
+            return sum(loaded_row_groups.values())
+
+        if (
+            bulk_load
+            and loaded_row_groups
+            and not staging_rows_match_checkpoints(
+                run_id, target_table, staging_table, sum(loaded_row_groups.values())
+            )
+        ):
+            loaded_row_groups = {}
+            checkpoint_keys = set()
+
+        pg_conn = get_psycopg2_connection()
+        if "staging" not in checkpoint_keys:
+            with pg_conn.cursor() as cursor:
+                # The single truncate for the load: fresh, empty staging tables
+                for table in swapped_tables:
+                    cursor.execute("CALL prepare_staging_table(%s, %s)", (table, bulk_load))
+                clear_load_rejects(cursor, target_table, filename)
+                if run_id is not None:
+                    record_checkpoint(
+                        cursor,
+                        run_id,
+                        target_table,
+                        "staging",
+                        source_name=filename,
+                        source_etag=source_etag,
+                    )
+            pg_conn.commit()
+        elif loaded_row_groups:
+            logger.info(
+                f"Resuming {target_table}: {len(loaded_row_groups)} row groups "
+                f"already loaded by run {run_id}"
+            )
+
+        remaining_row_groups = [
+            row_group
+            for row_group in range(open_parquet_blob(filename).num_row_groups)
+            if row_group not in loaded_row_groups
+        ]
+        partitions = [
+            remaining_row_groups[worker::max_workers]
+            for worker in range(min(max_workers, len(remaining_row_groups)))
+        ]
+
+        cancel_event = threading.Event()
+        total_rows_processed = sum(loaded_row_groups.values())
+        failures = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                submit_in_context(
+                    executor,
+                    load_parquet_partition_to_postgres,
+                    filename,
+                    staging_table,
+                    row_groups,
+                    cancel_event,
+                    chunk_size,
+                    {f"{table}_staging": build for table, build in derived_tables.items()},
+                    run_id,
+                    target_table,
+                    source_etag,
+                ): row_groups
+                for row_groups in partitions
+            }
+            for future in as_completed(futures):
+                row_groups = futures[future]
+                try:
+                    rows_loaded = future.result()
+                    total_rows_processed += rows_loaded
+                    logger.info(
+                        f"[SUCCESS] Loaded row groups {row_groups} ({rows_loaded:,} rows)"
+                    )
+                except Exception as e:
+                    logger.error(f"Error loading row groups {row_groups}: {e}")
+                    failures.append(e)
+                    cancel_event.set()
+
+        with pg_conn.cursor() as cursor:
+            if failures:
+                # Leave the live tables untouched; a checkpointed run keeps its
+                # staging tables so the retry only loads the missing row groups
+                if run_id is None:
+                    for table in swapped_tables:
+                        cursor.execute("CALL drop_staging_table(%s)", (table,))
+                    clear_load_rejects(cursor, target_table, filename)
+                    pg_conn.commit()
+                raise failures[0]
+
+            for table in swapped_tables:
+                cursor.execute("CALL swap_staging_table(%s)", (table,))
+            if run_id is not None:
+                record_checkpoint(
+                    cursor, run_id, target_table, "swapped", source_etag=source_etag
+                )
+        pg_conn.commit()
+
+        pg_conn.close()
+        logger.info(
+            f"COMPLETE: Successfully loaded all {total_rows_processed:,} rows to {target_table}"
+        )
+        return total_rows_processed
+
+    except Exception as e:
+        logger.error(f"Failed parallel load to {target_table}: {e}")
+        if "pg_conn" in locals():
+            pg_conn.close()
+        raise
+
+
+CLEAN_NPPES_COLUMNS = [
+    "npi",
+    "entity_type_code",
+    "entity_type",
+    "entity_name",
+    "provider_organization_name",
+    "provider_last_name",
+    "provider_first_name",
+    "provider_middle_name",
+    "provider_name_prefix",
+    "provider_name_suffix",
+    "provider_credential",
+    "provider_other_organization_name",
+    "provider_location_address_1",
+    "provider_location_address_2",
+    "provider_city",
+    "provider_state",
+    "provider_postal_code",
+    "provider_postal_code_clean",
+    "primary_taxonomy_code",
+    "taxonomy_grouping",
+    "taxonomy_classification",
+    "taxonomy_specialization",
+    "county_fips",
+    "county_name",
+    "state_name",
+    "zip_county_ratio",
+    "has_complete_address",
+    "has_valid_zip",
+    "has_primary_taxonomy",
+    "has_county_info",
+    "data_quality_score",
+]
+
+# Column -> max length, as truncated by LEFT(TRIM(...), n) in the cleaning procedure
+CLEAN_NPPES_TEXT_LENGTHS = {
+    "provider_organization_name": 200,
+    "provider_last_name": 100,
+    "provider_first_name": 100,
+    "provider_middle_name": 100,
+    "provider_name_prefix": 10,
+    "provider_name_suffix": 10,
+    "provider_credential": 50,
+    "provider_other_organization_name": 200,
+    "provider_location_address_1": 100,
+    "provider_location_address_2": 100,
+    "provider_city": 100,
+    "provider_state": 50,
+    "provider_postal_code": 10,
+}
+
+
+def sql_trim(expr):
+    # PostgreSQL TRIM() strips spaces only, not tabs or newlines
+    return expr.str.strip_chars(" ")
+
+
+def transform_nppes_providers(lazy_df, taxonomy_df, zip_county_df):
+    """
+    Vectorized equivalent of upsert_clean_nppes_providers: turns raw provider
+    rows, as extracted from the NPPES file, into nppes_providers_clean rows.
+    taxonomy_df holds nucc_taxonomy and zip_county_df holds zip_primary_county.
+    """
+    raw_columns = list(NPPES_COLUMN_MAPPING.values())
+    npi = sql_trim(polars.col("npi"))
+    entity_type_code = sql_trim(polars.col("entity_type_code"))
+
+    def taxonomy_code(slot):
+        return polars.col(f"healthcare_provider_taxonomy_code_{slot}")
+
+    def taxonomy_switch(slot):
+        return polars.col(f"healthcare_provider_primary_taxonomy_switch_{slot}")
+
+    # Same rule as get_primary_taxonomy_code: first slot switched 'Y', else the first code
+    primary_taxonomy_code = polars.when(taxonomy_switch(1) == "Y").then(taxonomy_code(1))
+    for slot in range(2, 16):
+        primary_taxonomy_code = primary_taxonomy_code.when(taxonomy_switch(slot) == "Y").then(
+            taxonomy_code(slot)
+        )
+    primary_taxonomy_code = primary_taxonomy_code.otherwise(
+        polars.coalesce(taxonomy_code(1), taxonomy_code(2), taxonomy_code(3))
+    )
+
+    def non_empty(column):
+        return polars.when(polars.col(column) != "").then(polars.col(column))
+
+    # CONCAT_WS skips NULLs, and NULLIF(part, '') turns empty parts into NULLs
+    individual_name = sql_trim(
+        polars.concat_str(
+            [
+                non_empty(column)
+                for column in (
+                    "provider_name_prefix",
+                    "provider_first_name",
+                    "provider_middle_name",
+                    "provider_last_name",
+                    "provider_name_suffix",
+                    "provider_credential",
+                )
+            ],
+            separator=" ",
+            ignore_nulls=True,
+        )
+    )
+
+    taxonomy_lookup = taxonomy_df.lazy().select(
+        polars.col("code").alias("primary_taxonomy_code"),
+        polars.col("grouping").str.slice(0, 100).alias("taxonomy_grouping"),
+        polars.col("classification").str.slice(0, 100).alias("taxonomy_classification"),
+        polars.col("specialization").str.slice(0, 100).alias("taxonomy_specialization"),
+    )
+    county_lookup = zip_county_df.lazy().select(
+        polars.col("zip").alias("provider_postal_code_clean"),
+        "county_fips",
+        "county_name",
+        "state_name",
+        "zip_county_ratio",
+    )
+
+    return (
+        lazy_df.select(raw_columns)
+        .with_columns(polars.col(raw_columns).cast(polars.Utf8))
+        .filter(
+            npi.str.contains(r"^[0-9]{10}$")
+            & entity_type_code.str.contains(r"^[0-9]+$")
+        )
+        .with_columns(
+            npi.alias("npi"),
+            entity_type_code.cast(polars.Int32).alias("entity_type_code"),
+            *[
+                sql_trim(polars.col(column)).str.slice(0, max_length).alias(column)
+                for column, max_length in CLEAN_NPPES_TEXT_LENGTHS.items()
+            ],
+            sql_trim(polars.col("provider_postal_code"))
+            .str.extract(r"^([0-9]{5})", 1)
+            .alias("provider_postal_code_clean"),
+            primary_taxonomy_code.alias("primary_taxonomy_code"),
+        )
+        .with_columns(
+            polars.when(polars.col("entity_type_code") == 1)
+            .then(polars.lit("Individual"))
+            .when(polars.col("entity_type_code") == 2)
+            .then(polars.lit("Organization"))
+            .otherwise(polars.lit("Unknown"))
+            .alias("entity_type"),
+            polars.when(polars.col("entity_type_code") == 1)
+            .then(individual_name)
+            .when(polars.col("entity_type_code") == 2)
+            .then(
+                polars.coalesce(
+                    non_empty("provider_organization_name"),
+                    polars.lit("Unknown Organization"),
+                )
+            )
+            .otherwise(polars.lit("Unknown"))
+            .str.slice(0, 200)
+            .alias("entity_name"),
+            (
+                polars.col("provider_location_address_1").is_not_null()
+                & polars.col("provider_city").is_not_null()
+                & polars.col("provider_state").is_not_null()
+            ).alias("has_complete_address"),
+            (
+                polars.col("provider_postal_code_clean").is_not_null()
+                & (polars.col("provider_postal_code_clean").str.len_chars() == 5)
+            ).alias("has_valid_zip"),
+            (
+                polars.col("primary_taxonomy_code").is_not_null()
+                & (polars.col("primary_taxonomy_code") != "")
+            ).alias("has_primary_taxonomy"),
+        )
+        .join(taxonomy_lookup, on="primary_taxonomy_code", how="left")
+        .join(county_lookup, on="provider_postal_code_clean", how="left")
+        .with_columns(
+            (
+                polars.col("county_fips").is_not_null()
+                & polars.col("county_name").is_not_null()
+            ).alias("has_county_info"),
+        )
+        .with_columns(
+            (
+                polars.when(
+                    polars.col("entity_name").is_not_null() & (polars.col("entity_name") != "")
+                ).then(20).otherwise(0)
+                + polars.when(polars.col("has_complete_address")).then(20).otherwise(0)
+                + polars.when(polars.col("has_valid_zip")).then(20).otherwise(0)
+                + polars.when(polars.col("has_primary_taxonomy")).then(20).otherwise(0)
+                + polars.when(polars.col("has_county_info")).then(20).otherwise(0)
+            ).alias("data_quality_score"),
+        )
+        .select(CLEAN_NPPES_COLUMNS)
+    )
+
+
+def fetch_clean_lookup_tables():
+    # Small reference tables the transform joins against, read once per load
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT code, grouping, classification, specialization FROM nucc_taxonomy"
+            )
+            taxonomy_df = polars.DataFrame(
+                cursor.fetchall(),
+                schema={
+                    "code": polars.Utf8,
+                    "grouping": polars.Utf8,
+                    "classification": polars.Utf8,
+                    "specialization": polars.Utf8,
+                },
+                orient="row",
+            )
+            # The ratio stays text so Postgres rounds it exactly as the procedure does
+            cursor.execute(
+                """
+                SELECT zip, county_fips, county_name, state_name, zip_county_ratio::TEXT
+                FROM zip_primary_county
+                """
+            )
+            zip_county_df = polars.DataFrame(
+                cursor.fetchall(),
+                schema={
+                    "zip": polars.Utf8,
+                    "county_fips": polars.Utf8,
+                    "county_name": polars.Utf8,
+                    "state_name": polars.Utf8,
+                    "zip_county_ratio": polars.Utf8,
+                },
+                orient="row",
+            )
+    finally:
+        pg_conn.close()
+    return taxonomy_df, zip_county_df
+
+
+def load_clean_nppes_providers_to_postgres(
+    lazy_df, chunk_size=100_000, bulk_load=False, source_name=None
+):
+    """
+    Clean raw provider rows in Polars and COPY them straight into
+    nppes_providers_clean, replacing the nppes_providers load followed by
+    clean_and_populate_nppes_data(). The table is rebuilt in one transaction;
+    with bulk_load it is rebuilt in a copy whose indexes are built once and
+    which is swapped in at the end. Raw rows failing the validation rules are
+    routed to load_rejects.
+    """
+    clean_table = "nppes_providers_clean"
+    try:
+        logger.info(f"Starting in-pipeline cleaning load to {clean_table} in chunks of {chunk_size:,}")
+        taxonomy_df, zip_county_df = fetch_clean_lookup_tables()
+
+        # The raw rows are not staged, so raw-derived tables are built here too
+        derived_tables = DERIVED_TABLE_BUILDERS["nppes_providers"]
+        # A bulk load fills staging copies (see begin_bulk_rebuild) that
+        # replace the live tables once every batch is in
+        copy_tables = {
+            table: f"{table}_staging" if bulk_load else table
+            for table in (clean_table, *derived_tables)
+        }
+        derived_copy_tables = {
+            copy_tables[table]: build for table, build in derived_tables.items()
+        }
+
+        pg_conn = get_psycopg2_connection()
+        total_rows_processed = 0
+        reject_counts = collections.Counter()
+        table_column_types = {}
+        with pg_conn.cursor() as cursor:
+            for table in (clean_table, *derived_tables):
+                if bulk_load:
+                    cursor.execute("CALL begin_bulk_rebuild(%s)", (table,))
+                else:
+                    cursor.execute("CALL truncate_table(%s)", (table,))
+            clear_load_rejects(cursor, clean_table, source_name)
+            for raw_batch_df in lazy_df.collect_batches(chunk_size=chunk_size):
+                raw_batch_df, batch_reject_counts = validate_and_copy_rejects(
+                    cursor, raw_batch_df, clean_table, table_column_types, source_name
+                )
+                reject_counts.update(batch_reject_counts)
+                if raw_batch_df.is_empty():
+                    continue
+                batch_df = transform_nppes_providers(
+                    raw_batch_df.lazy(), taxonomy_df, zip_county_df
+                ).collect()
+                copy_dataframe_to_postgres(
+                    cursor, batch_df, copy_tables[clean_table], table_column_types
+                )
+                copy_derived_tables_to_postgres(
+                    cursor, raw_batch_df, derived_copy_tables, table_column_types
+                )
+                total_rows_processed += len(batch_df)
+                logger.info(f"[SUCCESS] Cleaned and copied {total_rows_processed:,} rows")
+            if bulk_load:
+                for table in (clean_table, *derived_tables):
+                    cursor.execute("CALL finish_bulk_rebuild(%s)", (table,))
+            else:
+                cursor.execute(f"ANALYZE {clean_table}")
+        pg_conn.commit()
+
+        pg_conn.close()
+        log_reject_counts(clean_table, source_name, reject_counts)
+        logger.info(
+            f"COMPLETE: Successfully loaded all {total_rows_processed:,} rows to {clean_table}"
+        )
+        return total_rows_processed
+
+    except Exception as e:
+        logger.error(f"Failed in-pipeline cleaning load to {clean_table}: {e}")
+        if "pg_conn" in locals():
+            pg_conn.rollback()
+            pg_conn.close()
+        raise
+
+
+def convert_df_to_csv(df):
+    output = StringIO()
+    df.write_csv(output)
+    output.seek(0)
+    return output.getvalue()
+
+
+def upload_csv_to_azure_blob(filename, data):
+    CONTAINER_NAME = "nppes"
+    try:
+        blob_service_client = get_blob_service_client()
+        blob_client = blob_service_client.get_blob_client(
+            container=CONTAINER_NAME, blob=filename
+        )
+        
+        # Handle encoding more robustly
+        if isinstance(data, str):
+            # Use errors='replace' to handle problematic characters
+            blob_data = data.encode("utf-8", errors="replace")
+        else:
+            blob_data = data
+            
+        blob_client.upload_blob(blob_data, overwrite=True)
+        count_metric("blob_bytes_written", len(blob_data))
+        logger.info(f"Successfully uploaded {filename} to Azure Blob Storage")
+        return None
+    except Exception as e:
+        logger.error(f"Upload error for {filename}: {e}")
+        return str(e)
+
+
+def get_blob_fingerprint(filename):
+    CONTAINER_NAME = "nppes"
+    blob_service_client = get_blob_service_client()
+    blob_client = blob_service_client.get_blob_client(
+        container=CONTAINER_NAME, blob=filename
+    )
+    properties = blob_client.get_blob_properties()
+    return properties.etag, properties.last_modified
+
+
+def is_source_unchanged(target_table, source_name, source_etag):
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT source_name, source_etag FROM load_manifest WHERE target_table = %s",
+                (target_table,),
+            )
+            manifest_row = cursor.fetchone()
+    finally:
+        pg_conn.close()
+    return manifest_row == (source_name, source_etag)
+
+
+def invalidate_source_load(target_table):
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute("DELETE FROM load_manifest WHERE target_table = %s", (target_table,))
+        pg_conn.commit()
+    finally:
+        pg_conn.close()
+
+
+def record_source_load(target_table, source_name, source_etag, source_last_modified, row_count):
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO load_manifest (
+                    target_table, source_name, source_etag, source_last_modified, row_count, loaded_at
+                )
+                VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (target_table) DO UPDATE SET
+                    source_name = EXCLUDED.source_name,
+                    source_etag = EXCLUDED.source_etag,
+                    source_last_modified = EXCLUDED.source_last_modified,
+                    row_count = EXCLUDED.row_count,
+                    loaded_at = CURRENT_TIMESTAMP
+                """,
+                (target_table, source_name, source_etag, source_last_modified, row_count),
+            )
+        pg_conn.commit()
+    finally:
+        pg_conn.close()
+
+
+def is_force_reload(body, target_table):
+    # force_reload may be true (every source) or a list of table names
+    force_reload = body.get("force_reload", False)
+    if isinstance(force_reload, list):
+        return target_table in force_reload
+    return bool(force_reload)
+
+
+def load_blob_source_if_changed(body, target_table, filename, load):
+    """
+    Run `load` only when the source blob's ETag differs from the one recorded
+    in load_manifest for target_table, then record the new ETag and row count.
+    Returns True if the source was loaded.
+    """
+    try:
+        source_etag, source_last_modified = get_blob_fingerprint(filename)
+    except Exception as e:
+        logger.warning(f"Could not read properties of {filename} for {target_table}: {e}")
+        return False
+
+    if not is_force_reload(body, target_table) and is_source_unchanged(
+        target_table, filename, source_etag
+    ):
+        logger.info(f"Skipping {target_table}: {filename} is unchanged since the last load")
+        return False
+
+    # A failed load must not leave a manifest entry that would skip the retry
+    invalidate_source_load(target_table)
+    row_count = load()
+    if row_count is None:
+        return False
+
+    record_source_load(target_table, filename, source_etag, source_last_modified, row_count)
+    return True
+
+
+def start_pipeline_run(run_id, body):
+    # Re-invoking with an existing run id resumes it
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO pipeline_runs (run_id, status, request_body)
+                VALUES (%s, 'running', %s)
+                ON CONFLICT (run_id) DO UPDATE SET
+                    status = 'running',
+                    request_body = EXCLUDED.request_body,
+                    attempts = pipeline_runs.attempts + 1,
+                    updated_at = CURRENT_TIMESTAMP,
+                    finished_at = NULL,
+                    error_message = NULL
+                RETURNING attempts
+                """,
+                (run_id, json.dumps(body)),
+            )
+            attempts = cursor.fetchone()[0]
+        pg_conn.commit()
+    finally:
+        pg_conn.close()
+    return attempts
+
+
+def finish_pipeline_run(run_id, status, error_message=None):
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE pipeline_runs
+                SET status = %s, error_message = %s,
+                    updated_at = CURRENT_TIMESTAMP, finished_at = CURRENT_TIMESTAMP
+                WHERE run_id = %s
+                """,
+                (status, error_message, run_id),
+            )
+        pg_conn.commit()
+    finally:
+        pg_conn.close()
+
+
+def record_checkpoint(
+    cursor,
+    run_id,
+    stage_name,
+    chunk_key="",
+    source_name=None,
+    row_group=None,
+    row_offset=None,
+    rows_committed=None,
+    source_etag=None,
+):
+    # Runs on the caller's cursor so the checkpoint commits with the chunk it records
+    cursor.execute(
+        """
+        INSERT INTO pipeline_checkpoints (
+            run_id, stage_name, chunk_key, source_name, row_group, row_offset, rows_committed,
+            source_etag
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (run_id, stage_name, chunk_key) DO UPDATE SET
+            source_name = EXCLUDED.source_name,
+            row_group = EXCLUDED.row_group,
+            row_offset = EXCLUDED.row_offset,
+            rows_committed = EXCLUDED.rows_committed,
+            source_etag = EXCLUDED.source_etag,
+            committed_at = CURRENT_TIMESTAMP
+        """,
+        (
+            run_id, stage_name, chunk_key, source_name, row_group, row_offset, rows_committed,
+            source_etag,
+        ),
+    )
+
+
+def discard_stale_checkpoints(cursor, run_id, stage_name, source_etag):
+    # Chunk checkpoints taken from another version of the source blob point
+    # into a different file; dropping them makes the load start over
+    cursor.execute(
+        """
+        DELETE FROM pipeline_checkpoints
+        WHERE run_id = %s AND stage_name = %s AND chunk_key <> ''
+          AND source_etag IS DISTINCT FROM %s
+        """,
+        (run_id, stage_name, source_etag),
+    )
+    return cursor.rowcount
+
+
+def get_run_checkpoints(run_id, stage_name):
+    # (chunk_key, row_group, row_offset, rows_committed) of each checkpoint
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT chunk_key, row_group, row_offset, rows_committed
+                FROM pipeline_checkpoints
+                WHERE run_id = %s AND stage_name = %s
+                """,
+                (run_id, stage_name),
+            )
+            return cursor.fetchall()
+    finally:
+        pg_conn.close()
+
+
+def count_run_rejects(run_id, target_table):
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM load_rejects WHERE run_id = %s AND target_table = %s",
+                (run_id, target_table),
+            )
+            return cursor.fetchone()[0]
+    finally:
+        pg_conn.close()
+
+
+def staging_rows_match_checkpoints(run_id, stage_name, staging_table, committed_rows):
+    """
+    A crash empties an unlogged staging table, while the checkpoints of the
+    rows it held survive. Compare its row count with the rows the run's
+    checkpoints committed, and drop those checkpoints when they disagree so
+    the load starts over. Returns True if they agree.
+    """
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {staging_table}")
+            staged_rows = cursor.fetchone()[0]
+            if staged_rows == committed_rows:
+                return True
+            cursor.execute(
+                """
+                DELETE FROM pipeline_checkpoints
+                WHERE run_id = %s AND stage_name = %s AND chunk_key <> ''
+                """,
+                (run_id, stage_name),
+            )
+        pg_conn.commit()
+    finally:
+        pg_conn.close()
+    logger.warning(
+        f"{staging_table} holds {staged_rows:,} rows but run {run_id} checkpointed "
+        f"{committed_rows:,}; restarting the {stage_name} load"
+    )
+    return False
+
+
+def discard_source_checkpoints_if_changed(run_id, stage_name, source_name, source_etag):
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            discarded = discard_stale_checkpoints(cursor, run_id, stage_name, source_etag)
+        pg_conn.commit()
+    finally:
+        pg_conn.close()
+    if discarded:
+        logger.info(
+            f"{source_name} was replaced since run {run_id} started loading {stage_name}; "
+            f"discarded {discarded} checkpoints and starting over"
+        )
+
+
+def get_completed_stages(run_id):
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT stage_name FROM pipeline_checkpoints WHERE run_id = %s AND chunk_key = ''",
+                (run_id,),
+            )
+            return {row[0] for row in cursor.fetchall()}
+    finally:
+        pg_conn.close()
+
+
+def checkpointed_stage(run_id, name, stage, completed_stages):
+    # Skip stages an earlier attempt of the run finished
+    if name in completed_stages:
+        logger.info(f"Skipping stage {name}: completed by an earlier attempt of run {run_id}")
+        return
+    stage()
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            record_checkpoint(cursor, run_id, name)
+        pg_conn.commit()
+    finally:
+        pg_conn.close()
+
+
+def record_pipeline_run_metrics(run_id, attempt, stage_metrics):
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            for metrics in stage_metrics.values():
+                stage = metrics.as_dict()
+                counters = stage["counters"]
+                cursor.execute(
+                    """
+                    INSERT INTO pipeline_run_metrics (
+                        run_id, attempt, stage_name, status, started_at, wall_seconds,
+                        rows_copied, copy_bytes, blob_bytes_read, blob_bytes_written,
+                        db_round_trips, peak_rss_mb, counters, db_notices
+                    )
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (run_id, attempt, stage_name) DO UPDATE SET
+                        status = EXCLUDED.status,
+                        started_at = EXCLUDED.started_at,
+                        wall_seconds = EXCLUDED.wall_seconds,
+                        rows_copied = EXCLUDED.rows_copied,
+                        copy_bytes = EXCLUDED.copy_bytes,
+                        blob_bytes_read = EXCLUDED.blob_bytes_read,
+                        blob_bytes_written = EXCLUDED.blob_bytes_written,
+                        db_round_trips = EXCLUDED.db_round_trips,
+                        peak_rss_mb = EXCLUDED.peak_rss_mb,
+                        counters = EXCLUDED.counters,
+                        db_notices = EXCLUDED.db_notices,
+                        recorded_at = CURRENT_TIMESTAMP
+                    """,
+                    (
+                        run_id,
+                        attempt,
+                        stage["stage"],
+                        stage["status"],
+                        stage["started_at"],
+                        stage["wall_seconds"],
+                        counters.get("rows_copied", 0),
+                        counters.get("copy_bytes", 0),
+                        counters.get("blob_bytes_read", 0),
+                        counters.get("blob_bytes_written", 0),
+                        counters.get("db_round_trips", 0),
+                        stage["peak_rss_mb"],
+                        json.dumps(counters),
+                        json.dumps(stage["db_notices"]),
+                    ),
+                )
+        pg_conn.commit()
+    finally:
+        pg_conn.close()
+
+
+def json_response(payload, status_code=200):
+    return func.HttpResponse(
+        json.dumps(payload, default=str), status_code=status_code, mimetype="application/json"
+    )
+
+
+def run_stage_graph(stages, max_workers=3, stage_metrics=None):
+    """
+    Run pipeline stages as soon as their dependencies have finished, at most
+    `max_workers` at a time. `stages` maps a stage name to a
+    (dependencies, callable) pair. Returns the duration of each stage in seconds;
+    the StageMetrics of each stage that ran are added to `stage_metrics`.
+    """
+    if stage_metrics is None:
+        stage_metrics = {}
+    for name, (dependencies, _) in stages.items():
+        unknown = [dep for dep in dependencies if dep not in stages]
+        if unknown:
+            raise ValueError(f"Stage {name} depends on unknown stages: {unknown}")
+
+    def timed_stage(name, stage, metrics):
+        logger.info(f"Stage {name} started")
+        with measure_stage(name, metrics):
+            stage()
+        logger.info(f"Stage {name} completed in {metrics.wall_seconds:.2f} seconds")
+        return metrics.wall_seconds
+
+    durations = {}
+    pending = dict(stages)
+    running = {}
+    failure = None
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            if failure is None:
+                ready = [
+                    name
+                    for name, (dependencies, _) in pending.items()
+                    if all(dep in durations for dep in dependencies)
+                ]
+                for name in ready:
+                    _, stage = pending.pop(name)
+                    stage_metrics[name] = StageMetrics(name)
+                    running[
+                        executor.submit(timed_stage, name, stage, stage_metrics[name])
+                    ] = name
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    durations[name] = future.result()
+                except Exception as e:
+                    logger.error(f"Stage {name} failed: {e}")
+                    if failure is None:
+                        failure = e
+
+    if failure is not None:
+        raise failure
+    if pending:
+        raise ValueError(f"Stages with unresolvable dependencies: {sorted(pending)}")
+    return durations
+
+
+def load_census_population_stage(body):
+    census_table = "census_county_population"
+    force_reload = is_force_reload(body, census_table)
+    api_data, content_hash = fetch_census_data_cached(force_refresh=force_reload)
+
+    # ACS data changes yearly; skip the reload when the payload is identical
+    if not force_reload and is_source_unchanged(census_table, CENSUS_SOURCE_NAME, content_hash):
+        logger.info(f"Skipping {census_table}: census payload is unchanged since the last load")
+        return
+
+    invalidate_source_load(census_table)
+    row_count = load_api_data(api_data)
+    record_source_load(census_table, CENSUS_SOURCE_NAME, content_hash, None, row_count)
+
+
+def convert_nppes_csv_stage(body):
+    # One-time CSV -> NPI-sorted Parquet conversion, redone only when the CSV changes
+    csv_source_file = body.get("nppes_csv_file")
+    parquet_target_file = body.get("parquet_target_file")
+    nppes_parquet_target = "nppes_parquet"
+
+    blob_client = get_blob_service_client().get_blob_client(
+        container="nppes", blob=parquet_target_file
+    )
+    if not blob_client.exists():
+        # A manifest entry without its output file must not skip the conversion
+        invalidate_source_load(nppes_parquet_target)
+
+    def load():
+        return convert_nppes_csv_to_parquet(
+            csv_source_file,
+            parquet_target_file,
+            row_group_size=body.get("convert_row_group_size", 250_000),
+            bucket_count=body.get("convert_bucket_count", 32),
+        )
+
+    load_blob_source_if_changed(body, nppes_parquet_target, csv_source_file, load)
+
+
+def load_nppes_providers_stage(body):
+    # First & Large Data Target
+    parquet_target_file = body.get("parquet_target_file")
+    nppes_providers_table = "nppes_providers"
+    load_parallelism = body.get("load_parallelism", 1)
+    # Unlogged, unindexed staging with the indexes built once at the end
+    bulk_load = body.get("bulk_load", False)
+
+    # Chunks committed under this run id are not loaded again
+    run_id = body.get("run_id")
+
+    def load():
+        if load_parallelism > 1:
+            return load_parquet_blob_parallel_to_postgres(
+                parquet_target_file,
+                target_table=nppes_providers_table,
+                max_workers=load_parallelism,
+                bulk_load=bulk_load,
+                run_id=run_id,
+            )
+        lazy_df_1 = extract_parquet_data_from_blob(parquet_target_file)
+        if lazy_df_1 is not None:
+            return load_chunked_blob_data_to_postgres(
+                lazy_df_1,
+                target_table=nppes_providers_table,
+                chunk_size=100_000,
+                bulk_load=bulk_load,
+                run_id=run_id,
+                source_name=parquet_target_file,
+                # Row groups already committed are skipped by their footer row counts
+                resume_source=lambda rows_committed: extract_parquet_data_from_blob(
+                    parquet_target_file, skip_rows=rows_committed
+                ),
+            )
+
+    load_blob_source_if_changed(body, nppes_providers_table, parquet_target_file, load)
+
+
+def load_zip_county_stage(body):
+    # Additional Data Target 1
+    csv_target_file_1 = body.get("csv_target_file_1")
+    zip_county_table = "zip_county"
+    zip_county_relevant_columns = [
+        "ZIP",
+        "COUNTY",
+        "USPS_ZIP_PREF_CITY",
+        "USPS_ZIP_PREF_STATE",
+        "RES_RATIO",
+        "BUS_RATIO",
+        "OTH_RATIO",
+        "TOT_RATIO",
+    ]
+    zip_county_column_mapping = {
+        "ZIP": "zip",
+        "COUNTY": "county",
+        "USPS_ZIP_PREF_CITY": "usps_zip_pref_city",
+        "USPS_ZIP_PREF_STATE": "usps_zip_pref_state",
+        "RES_RATIO": "res_ratio",
+        "BUS_RATIO": "bus_ratio",
+        "OTH_RATIO": "oth_ratio",
+        "TOT_RATIO": "tot_ratio",
+    }
+    # Add schema overrides to ensure ZIP codes are treated as strings
+    zip_county_schema_overrides = {
+        "ZIP": polars.Utf8,
+        "COUNTY": polars.Utf8,
+        "USPS_ZIP_PREF_CITY": polars.Utf8,
+        "USPS_ZIP_PREF_STATE": polars.Utf8,
+    }
+
+    def load():
+        lazy_df_2 = extract_csv_data_from_blob(
+            csv_target_file_1, zip_county_relevant_columns, zip_county_column_mapping, zip_county_schema_overrides
+        )
+        if lazy_df_2 is not None:
+            return load_chunked_blob_data_to_postgres(
+                lazy_df_2,
+                target_table=zip_county_table,
+                chunk_size=100_000,
+                source_name=csv_target_file_1,
+            )
+
+    load_blob_source_if_changed(body, zip_county_table, csv_target_file_1, load)
+
+
+def load_ssa_fips_state_county_stage(body):
+    # Additional Data Target 2
+    csv_target_file_2 = body.get("csv_target_file_2")
+    ssa_fips_state_county_table = "ssa_fips_state_county"
+    ssa_relevant_columns = []
+    ssa_column_mapping = {}
+    ssa_schema_overrides = {
+        "ssa_code": polars.Utf8,
+        "fipscounty": polars.Utf8,
+        "cbsa_code": polars.Utf8,
+    }
+
+    def load():
+        lazy_df_3 = extract_csv_data_from_blob(
             csv_target_file_2,
             ssa_relevant_columns,
             ssa_column_mapping,
             ssa_schema_overrides,
         )
         if lazy_df_3 is not None:
-            load_chunked_blob_data_to_postgres(
-                lazy_df_3, target_table=ssa_fips_state_county_table, chunk_size=100_000
-            )
-
-        # Additional Data Target 3
-        csv_target_file_3 = body.get("csv_target_file_3")
-        nucc_taxonomy_table = "nucc_taxonomy"
-        taxonomy_relevant_columns = [
-            "Code",
-            "Grouping",
-            "Classification",
-            "Specialization",
-        ]
-        taxonomy_column_mapping = {
-            "Code": "code",
-            "Grouping": "grouping",
-            "Classification": "classification",
-            "Specialization": "specialization",
-        }
-        taxonomy_schema_overrides = {
-            "Code": polars.Utf8,
-            "Grouping": polars.Utf8,
-            "Classification": polars.Utf8,
-            "Specialization": polars.Utf8,
-        }
+            return load_chunked_blob_data_to_postgres(
+                lazy_df_3,
+                target_table=ssa_fips_state_county_table,
+                chunk_size=100_000,
+                source_name=csv_target_file_2,
+            )
+
+    load_blob_source_if_changed(body, ssa_fips_state_county_table, csv_target_file_2, load)
+
+
+def load_nucc_taxonomy_stage(body):
+    # Additional Data Target 3
+    csv_target_file_3 = body.get("csv_target_file_3")
+    nucc_taxonomy_table = "nucc_taxonomy"
+    taxonomy_relevant_columns = [
+        "Code",
+        "Grouping",
+        "Classification",
+        "Specialization",
+    ]
+    taxonomy_column_mapping = {
+        "Code": "code",
+        "Grouping": "grouping",
+        "Classification": "classification",
+        "Specialization": "specialization",
+    }
+    taxonomy_schema_overrides = {
+        "Code": polars.Utf8,
+        "Grouping": polars.Utf8,
+        "Classification": polars.Utf8,
+        "Specialization": polars.Utf8,
+    }
 
+    def load():
         lazy_df_4 = extract_csv_data_from_blob(
             csv_target_file_3,
             taxonomy_relevant_columns,
@@ -496,126 +2793,914 @@ def NPPES_Data_Cleaning(req: func.HttpRequest) -> func.HttpResponse:
             taxonomy_schema_overrides,
         )
         if lazy_df_4 is not None:
-            load_chunked_blob_data_to_postgres(
-                lazy_df_4, target_table=nucc_taxonomy_table, chunk_size=100_000
+            return load_chunked_blob_data_to_postgres(
+                lazy_df_4,
+                target_table=nucc_taxonomy_table,
+                chunk_size=100_000,
+                source_name=csv_target_file_3,
+            )
+
+    load_blob_source_if_changed(body, nucc_taxonomy_table, csv_target_file_3, load)
+
+
+NPI_DEACTIVATION_COLUMN_MAPPING = {
+    "NPI": "npi",
+    "NPPES Deactivation Date": "deactivated_on",
+}
+
+
+def extract_npi_deactivation_file_from_blob(filename):
+    # CMS ships the deactivated NPI report as a spreadsheet; it is loaded as CSV
+    lazy_df = extract_csv_data_from_blob(
+        filename,
+        list(NPI_DEACTIVATION_COLUMN_MAPPING),
+        NPI_DEACTIVATION_COLUMN_MAPPING,
+        {column: polars.Utf8 for column in NPI_DEACTIVATION_COLUMN_MAPPING},
+    )
+    if lazy_df is None:
+        return None
+    deactivation_date = polars.col("deactivated_on").str.strip_chars()
+    return (
+        lazy_df.with_columns(
+            polars.col("npi").str.strip_chars(),
+            # Dates are MM/DD/YYYY in the CMS report, ISO once re-saved
+            polars.coalesce(
+                deactivation_date.str.to_date("%m/%d/%Y", strict=False),
+                deactivation_date.str.to_date("%Y-%m-%d", strict=False),
+            ).alias("deactivated_on"),
+        )
+        .unique(subset="npi", keep="last")
+    )
+
+
+def load_npi_deactivation_stage(body):
+    # Deactivated NPI list; merged into nppes_providers_clean by the cleaning stage
+    deactivation_file = body.get("deactivation_file")
+    npi_deactivation_table = "npi_deactivation"
+    if not deactivation_file:
+        logger.info(f"No deactivation_file provided, keeping the current {npi_deactivation_table}")
+        return False
+
+    def load():
+        lazy_df = extract_npi_deactivation_file_from_blob(deactivation_file)
+        if lazy_df is not None:
+            return load_chunked_blob_data_to_postgres(
+                lazy_df,
+                target_table=npi_deactivation_table,
+                chunk_size=100_000,
+                source_name=deactivation_file,
+            )
+
+    return load_blob_source_if_changed(body, npi_deactivation_table, deactivation_file, load)
+
+
+ZIP_COUNTY_SOURCE_TABLES = ("census_county_population", "ssa_fips_state_county", "zip_county")
+
+
+def get_source_tables_fingerprint(target_tables):
+    # Hash of the source versions in load_manifest, or None if any is not loaded
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT target_table, source_etag FROM load_manifest
+                WHERE target_table = ANY(%s)
+                ORDER BY target_table
+                """,
+                (list(target_tables),),
+            )
+            manifest_rows = cursor.fetchall()
+    finally:
+        pg_conn.close()
+    if len(manifest_rows) < len(target_tables):
+        return None
+    return hashlib.sha256(repr(manifest_rows).encode("utf-8")).hexdigest()
+
+
+def build_zip_primary_county_stage(body):
+    # One county per ZIP, rebuilt only when a crosswalk/census source or the strategy changes
+    zip_primary_county_table = "zip_primary_county"
+    strategy = body.get("county_assignment_strategy", "population")
+    sources_fingerprint = get_source_tables_fingerprint(ZIP_COUNTY_SOURCE_TABLES)
+
+    if (
+        sources_fingerprint is not None
+        and not is_force_reload(body, zip_primary_county_table)
+        and is_source_unchanged(zip_primary_county_table, strategy, sources_fingerprint)
+    ):
+        logger.info(f"Skipping {zip_primary_county_table}: sources and strategy are unchanged")
+        return
+
+    invalidate_source_load(zip_primary_county_table)
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute("CALL build_zip_primary_county(%s, NULL)", (strategy,))
+            row_count = cursor.fetchone()[0]
+        pg_conn.commit()
+    finally:
+        pg_conn.close()
+    logger.info(f"Built {zip_primary_county_table} with {row_count} ZIPs ({strategy} strategy)")
+
+    if sources_fingerprint is not None:
+        record_source_load(zip_primary_county_table, strategy, sources_fingerprint, None, row_count)
+
+
+def load_nppes_providers_clean_stage(body):
+    # In-pipeline cleaning: the NPPES file goes straight to nppes_providers_clean
+    parquet_target_file = body.get("parquet_target_file")
+    lazy_df = extract_parquet_data_from_blob(parquet_target_file)
+    if lazy_df is None:
+        raise ValueError(f"Could not read NPPES file: {parquet_target_file}")
+    load_clean_nppes_providers_to_postgres(
+        lazy_df,
+        chunk_size=100_000,
+        bulk_load=body.get("bulk_load", False),
+        source_name=parquet_target_file,
+    )
+
+
+# NPI ranges the raw table is split into for parallel cleaning
+CLEAN_NPI_RANGE_COUNT = 16
+
+
+def get_clean_npi_ranges(range_count=CLEAN_NPI_RANGE_COUNT):
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT npi_from, npi_to FROM get_clean_npi_ranges(%s) ORDER BY range_index",
+                (range_count,),
+            )
+            return cursor.fetchall()
+    finally:
+        pg_conn.close()
+
+
+def begin_clean_rebuild(run_id=None, bulk_load=False):
+    # Once per run: the ranges replace their own rows, but a full rebuild
+    # starts from an empty table rather than deleting every row. A bulk
+    # rebuild starts from an empty staging copy instead (see begin_bulk_rebuild)
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            if bulk_load:
+                cursor.execute("CALL begin_bulk_rebuild(%s)", ("nppes_providers_clean",))
+            else:
+                cursor.execute("TRUNCATE TABLE nppes_providers_clean")
+            if run_id is not None:
+                record_checkpoint(cursor, run_id, "clean_nppes_data", "truncated")
+        pg_conn.commit()
+    finally:
+        pg_conn.close()
+
+
+def clean_nppes_npi_range(
+    range_index,
+    npi_from,
+    npi_to,
+    max_attempts=3,
+    backoff_seconds=5.0,
+    run_id=None,
+    target_table="nppes_providers_clean",
+):
+    # Each range commits on its own, so only a failed one is retried
+    for attempt in range(1, max_attempts + 1):
+        pg_conn = get_psycopg2_connection()
+        try:
+            with pg_conn.cursor() as cursor:
+                cursor.execute(
+                    "CALL clean_nppes_npi_range(%s, %s, NULL, %s)",
+                    (npi_from, npi_to, target_table),
+                )
+                processed_count = cursor.fetchone()[0]
+                if run_id is not None:
+                    record_checkpoint(
+                        cursor,
+                        run_id,
+                        "clean_nppes_data",
+                        f"npi_range:{range_index}",
+                        rows_committed=processed_count,
+                    )
+            pg_conn.commit()
+            return processed_count
+        except Exception as e:
+            pg_conn.rollback()
+            if attempt == max_attempts:
+                raise
+            logger.warning(f"Attempt {attempt} to clean NPI range {range_index} failed: {e}, retrying")
+        finally:
+            pg_conn.close()
+        time.sleep(backoff_seconds * 2 ** (attempt - 1))
+
+
+def clean_nppes_data_partitioned(
+    max_workers=4, run_id=None, range_count=CLEAN_NPI_RANGE_COUNT, bulk_load=False
+):
+    """
+    Rebuild nppes_providers_clean one NPI range of nppes_providers at a time,
+    several at once over separate connections. Each range reads only its
+    slice of the raw primary key, so the raw table is read once in total.
+    Raises after all ranges have run if any failed; the ranges that succeeded
+    stay committed. With a run_id, ranges an earlier attempt of the run
+    cleaned are skipped and the table is not truncated again. With bulk_load
+    the ranges fill an unindexed staging copy that is swapped in once every
+    range is in.
+    """
+    checkpoints = {}
+    if run_id is not None:
+        checkpoints = {
+            chunk_key: rows_committed
+            for chunk_key, _, _, rows_committed in get_run_checkpoints(run_id, "clean_nppes_data")
+        }
+    total_processed = sum(
+        rows_committed or 0
+        for chunk_key, rows_committed in checkpoints.items()
+        if chunk_key.startswith("npi_range:")
+    )
+    if "swapped" in checkpoints:
+        # An earlier attempt of the run already swapped its staging copy in
+        return total_processed
+    if "truncated" not in checkpoints:
+        begin_clean_rebuild(run_id, bulk_load)
+    target_table = "nppes_providers_clean_staging" if bulk_load else "nppes_providers_clean"
+    npi_ranges = [
+        (range_index, npi_from, npi_to)
+        for range_index, (npi_from, npi_to) in enumerate(get_clean_npi_ranges(range_count))
+        if f"npi_range:{range_index}" not in checkpoints
+    ]
+    logger.info(f"Cleaning {len(npi_ranges)} NPI ranges with {max_workers} workers")
+
+    failures = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            submit_in_context(
+                executor,
+                clean_nppes_npi_range,
+                range_index,
+                npi_from,
+                npi_to,
+                run_id=run_id,
+                target_table=target_table,
+            ): range_index
+            for range_index, npi_from, npi_to in npi_ranges
+        }
+        for future in as_completed(futures):
+            range_index = futures[future]
+            try:
+                processed_count = future.result()
+                total_processed += processed_count
+                logger.info(f"[SUCCESS] Cleaned NPI range {range_index} ({processed_count:,} rows)")
+            except Exception as e:
+                logger.error(f"Error cleaning NPI range {range_index}: {e}")
+                failures.append((range_index, e))
+
+    if failures:
+        failed_ranges = sorted(range_index for range_index, _ in failures)
+        raise RuntimeError(
+            f"Cleaning failed for NPI ranges {failed_ranges}: {failures[0][1]}"
+        )
+
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            if bulk_load:
+                cursor.execute("CALL finish_bulk_rebuild(%s)", ("nppes_providers_clean",))
+                if run_id is not None:
+                    record_checkpoint(cursor, run_id, "clean_nppes_data", "swapped")
+            else:
+                cursor.execute("ANALYZE nppes_providers_clean")
+        pg_conn.commit()
+    finally:
+        pg_conn.close()
+    return total_processed
+
+
+def clean_nppes_data_stage(body):
+    # Run data cleaning and transformation after all raw data is loaded
+    logger.info("Running data cleaning and transformation...")
+    clean_in_pipeline = body.get("clean_in_pipeline", False)
+    clean_parallelism = body.get("clean_parallelism", 1)
+    if not clean_in_pipeline and clean_parallelism > 1:
+        clean_nppes_data_partitioned(
+            max_workers=clean_parallelism,
+            run_id=body.get("run_id"),
+            bulk_load=body.get("bulk_load", False),
+        )
+
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            # Execute stored procedures using psycopg2
+            if not clean_in_pipeline and clean_parallelism <= 1:
+                cursor.execute(
+                    "CALL clean_and_populate_nppes_data(%s)", (body.get("bulk_load", False),)
+                )
+            # Cleaned rows start out active; re-flag deactivated NPIs before
+            # the summary, which counts only active providers, is rebuilt
+            cursor.execute("CALL apply_npi_deactivations(NULL, FALSE)")
+            # Every county may have changed, so the summary is rebuilt in full
+            cursor.execute("CALL refresh_county_provider_summary(NULL, NULL)")
+            cursor.execute("CALL create_export_view()")
+            pg_conn.commit()
+    finally:
+        pg_conn.close()
+    logger.info("Data cleaning and transformation completed")
+
+
+def export_clean_csv_stage(body):
+    logger.info("Starting CSV export of clean data...")
+    csv_filename = body.get("csv_filename", "nppes_clean_export.csv")
+    csv_chunk_size = body.get("csv_chunk_size", 50000)
+
+    export_success = export_clean_data_to_csv_chunked(
+        csv_chunk_size, csv_filename, active_only=body.get("export_active_only", False)
+    )
+    if export_success:
+        logger.info(f"CSV export completed: {csv_filename}")
+    else:
+        logger.warning("CSV export failed, but continuing...")
+
+
+def export_clean_parquet_stage(body):
+    logger.info("Starting Parquet export of clean data...")
+    parquet_prefix = body.get("parquet_export_prefix", "nppes_clean_export")
+
+    export_success = export_clean_data_to_parquet_partitioned(
+        body.get("parquet_chunk_size", 50000),
+        parquet_prefix,
+        row_group_size=body.get("parquet_row_group_size", 100_000),
+        active_only=body.get("export_active_only", False),
+    )
+    if export_success:
+        logger.info(f"Parquet export completed: {parquet_prefix}/")
+    else:
+        logger.warning("Parquet export failed, but continuing...")
+
+
+MAX_DB_CONNECTIONS = int(os.getenv("MAX_DB_CONNECTIONS", "10"))
+
+
+def pipeline_db_connections(body):
+    """
+    Upper bound on the Postgres connections a pipeline run holds at once,
+    from its stage concurrency and the parallelism of the NPPES load and clean.
+    """
+    max_concurrent_stages = body.get("max_concurrent_stages", 3)
+    load_parallelism = body.get("load_parallelism", 1)
+    clean_parallelism = body.get("clean_parallelism", 1)
+    # Source loads run side by side, one connection each; the parallel NPPES
+    # load adds one per worker to the one swapping its staging tables
+    nppes_load = load_parallelism + 1 if load_parallelism > 1 else 1
+    load_phase = max_concurrent_stages - 1 + nppes_load
+    # Cleaning waits for every load and runs alone, one connection per range worker
+    clean_phase = max(clean_parallelism, 1)
+    # Plus the short-lived connection recording checkpoints
+    return max(load_phase, clean_phase) + 1
+
+
+@app.route(route="NPPES_Data_Cleaning")
+def NPPES_Data_Cleaning(req: func.HttpRequest) -> func.HttpResponse:
+    start_time = time.time()  # Tick
+    run_id = None
+    attempts = None
+    stage_metrics = {}
+    try:
+        body = req.get_json()
+        # Stage concurrency and worker counts multiply into DB connections;
+        # the cap is a server setting the request body cannot raise
+        db_connections = pipeline_db_connections(body)
+        if db_connections > MAX_DB_CONNECTIONS:
+            return json_response(
+                {
+                    "error": f"max_concurrent_stages, load_parallelism and clean_parallelism "
+                    f"need up to {db_connections} DB connections, more than "
+                    f"MAX_DB_CONNECTIONS ({MAX_DB_CONNECTIONS})"
+                },
+                status_code=400,
             )
+        # Pass the run_id of a failed run to resume it from its checkpoints
+        run_id = str(body.get("run_id") or uuid.uuid4())
+        body["run_id"] = run_id
+        attempts = start_pipeline_run(run_id, body)
+        completed_stages = get_completed_stages(run_id) if attempts > 1 else set()
 
-        # Run data cleaning and transformation after all raw data is loaded
-        print("Running data cleaning and transformation...")
-        pg_conn = get_psycopg2_connection()
-        with pg_conn.cursor() as cursor:
-            # Execute stored procedures using psycopg2
-            cursor.execute("CALL clean_and_populate_nppes_data()")
-            cursor.execute("CALL create_export_view()")
-            pg_conn.commit()
-        pg_conn.close()
-        print("Data cleaning and transformation completed")
+        source_loads = {
+            "census_county_population": load_census_population_stage,
+            "nppes_providers": load_nppes_providers_stage,
+            "zip_county": load_zip_county_stage,
+            "ssa_fips_state_county": load_ssa_fips_state_county_stage,
+            "nucc_taxonomy": load_nucc_taxonomy_stage,
+            "npi_deactivation": load_npi_deactivation_stage,
+        }
+        # Source loads are independent; cleaning needs all of them
+        stages = {
+            name: ((), functools.partial(stage, body))
+            for name, stage in source_loads.items()
+        }
+        # Optional: Convert the raw CMS CSV to the Parquet file the NPPES load reads
+        nppes_dependencies = ()
+        if body.get("nppes_csv_file"):
+            body.setdefault(
+                "parquet_target_file", os.path.splitext(body["nppes_csv_file"])[0] + ".parquet"
+            )
+            stages["nppes_parquet"] = ((), functools.partial(convert_nppes_csv_stage, body))
+            nppes_dependencies = ("nppes_parquet",)
+            stages["nppes_providers"] = (nppes_dependencies, stages["nppes_providers"][1])
+        stages["zip_primary_county"] = (
+            ZIP_COUNTY_SOURCE_TABLES,
+            functools.partial(build_zip_primary_county_stage, body),
+        )
+        if body.get("clean_in_pipeline", False):
+            # Clean in Polars and skip the raw nppes_providers round-trip;
+            # the transform joins the taxonomy and county lookups
+            del stages["nppes_providers"]
+            stages["nppes_providers_clean"] = (
+                ("nucc_taxonomy", "zip_primary_county", *nppes_dependencies),
+                functools.partial(load_nppes_providers_clean_stage, body),
+            )
+        stages["clean_nppes_data"] = (
+            tuple(stages),
+            functools.partial(clean_nppes_data_stage, body),
+        )
 
         # Optional: Export clean data to CSV (can be controlled via request parameter)
         export_csv = body.get("export_csv", True)  # Default to True
         if export_csv:
-            print("Starting CSV export of clean data...")
-            csv_filename = body.get("csv_filename", "nppes_clean_export.csv")
-            csv_chunk_size = body.get("csv_chunk_size", 50000)
-            
-            export_success = export_clean_data_to_csv_chunked(csv_chunk_size, csv_filename)
-            if export_success:
-                print(f"CSV export completed: {csv_filename}")
-            else:
-                print("CSV export failed, but continuing...")
+            stages["export_clean_csv"] = (
+                ("clean_nppes_data",),
+                functools.partial(export_clean_csv_stage, body),
+            )
+        # Optional: State-partitioned Parquet export, alongside the CSV one
+        if body.get("export_parquet", False):
+            stages["export_clean_parquet"] = (
+                ("clean_nppes_data",),
+                functools.partial(export_clean_parquet_stage, body),
+            )
+
+        stages = {
+            name: (
+                dependencies,
+                functools.partial(checkpointed_stage, run_id, name, stage, completed_stages),
+            )
+            for name, (dependencies, stage) in stages.items()
+        }
+
+        # Caps how many stages run at once; each opens its own DB connections,
+        # and their total is bounded by the MAX_DB_CONNECTIONS check above
+        max_concurrent_stages = body.get("max_concurrent_stages", 3)
+        run_stage_graph(stages, max_workers=max_concurrent_stages, stage_metrics=stage_metrics)
+        record_pipeline_run_metrics(run_id, attempts, stage_metrics)
+        finish_pipeline_run(run_id, "completed")
+        invalidate_query_caches()
 
         elapsed = time.time() - start_time  # Tock
-        response = f"Data processing completed in {elapsed:.2f} seconds"
-        return func.HttpResponse(response, status_code=200)
+        log_event("pipeline_completed", run_id=run_id, elapsed_seconds=elapsed)
+        return json_response(
+            {
+                "status": "completed",
+                "run_id": run_id,
+                "attempt": attempts,
+                "elapsed_seconds": elapsed,
+                "stages": [metrics.as_dict() for metrics in stage_metrics.values()],
+            }
+        )
     except Exception as e:
         error_message = f"Internal server error: {str(e)}"
-        return func.HttpResponse(error_message, status_code=500)
+        if run_id is not None:
+            # Stages committed before the failure may have changed the data
+            invalidate_query_caches()
+            try:
+                if stage_metrics:
+                    record_pipeline_run_metrics(run_id, attempts, stage_metrics)
+                finish_pipeline_run(run_id, "failed", str(e))
+            except Exception as record_error:
+                logger.warning(f"Could not record failure of run {run_id}: {record_error}")
+            error_message += f" (resume with run_id {run_id})"
+        elapsed = time.time() - start_time
+        log_event("pipeline_failed", run_id=run_id, elapsed_seconds=elapsed, error=str(e))
+        return json_response(
+            {
+                "status": "failed",
+                "error": error_message,
+                "run_id": run_id,
+                "attempt": attempts,
+                "elapsed_seconds": elapsed,
+                "stages": [metrics.as_dict() for metrics in stage_metrics.values()],
+            },
+            status_code=500,
+        )
+
 
+def extract_nppes_update_file_from_blob(filename):
+    # CMS ships weekly updates as CSV; converted files may be Parquet
+    if filename.lower().endswith(".parquet"):
+        return extract_parquet_data_from_blob(filename)
+    update_schema_overrides = {column: polars.Utf8 for column in NPPES_RELEVANT_COLUMNS}
+    return extract_csv_data_from_blob(
+        filename, NPPES_RELEVANT_COLUMNS, NPPES_COLUMN_MAPPING, update_schema_overrides
+    )
 
-def export_clean_data_to_csv_chunked(chunk_size=50000, output_filename="nppes_clean_export.csv"):
+
+def apply_nppes_weekly_update(filename):
     """
-    Export clean NPPES data to CSV - simple and efficient.
+    Load one NPPES weekly update file into nppes_providers_delta and merge only
+    those NPIs into nppes_providers and nppes_providers_clean.
     """
+    delta_table = "nppes_providers_delta"
+    lazy_df = extract_nppes_update_file_from_blob(filename)
+    if lazy_df is None:
+        raise ValueError(f"Could not read weekly update file: {filename}")
+
+    rows_loaded = load_chunked_blob_data_to_postgres(
+        lazy_df, target_table=delta_table, chunk_size=100_000, source_name=filename
+    )
+    if not rows_loaded:
+        # Nothing reached the delta table. An empty file leaves it untruncated,
+        # holding the previous update, which must not be re-applied; a file
+        # whose rows were all rejected leaves it truncated and empty
+        logger.info(f"Weekly update file {filename} has no valid rows, nothing to apply")
+        return
+
+    pg_conn = get_psycopg2_connection()
     try:
-        print(f"Starting CSV export to file: {output_filename}")
-        
+        with pg_conn.cursor() as cursor:
+            cursor.execute("CALL apply_nppes_weekly_update()")
+        pg_conn.commit()
+    finally:
+        pg_conn.close()
+    logger.info(f"Weekly update applied: {filename}")
+
+
+def apply_npi_deactivations(body):
+    """
+    Load the deactivated NPI list named by body["deactivation_file"] and merge
+    it into nppes_providers_clean as is_active/deactivated_on flags, without
+    re-running the cleaning procedure. Returns the number of changed rows.
+    """
+    load_npi_deactivation_stage(body)
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute("CALL apply_npi_deactivations(NULL, TRUE)")
+            processed_count = cursor.fetchone()[0]
+        pg_conn.commit()
+    finally:
+        pg_conn.close()
+    logger.info(f"NPI deactivations applied: {processed_count:,} providers changed")
+    return processed_count
+
+
+@app.route(route="NPPES_Weekly_Update")
+def NPPES_Weekly_Update(req: func.HttpRequest) -> func.HttpResponse:
+    start_time = time.time()
+    run_id = None
+    file_metrics = {}
+    try:
+        body = req.get_json()
+        # Apply oldest first so later files win
+        update_files = body.get("update_files", [])
+        deactivation_file = body.get("deactivation_file")
+        if not update_files and not deactivation_file:
+            return json_response(
+                {"error": "No update_files or deactivation_file provided"}, status_code=400
+            )
+
+        # Recorded as a pipeline run, whose finish tells every worker's
+        # query caches that the data changed (see sync_query_caches)
+        run_id = f"weekly-{uuid.uuid4()}"
+        attempts = start_pipeline_run(run_id, body)
+        for filename in update_files:
+            with measure_stage(filename) as metrics:
+                file_metrics[filename] = metrics
+                apply_nppes_weekly_update(filename)
+
+        # After the updates, so NPIs they inserted are flagged too
+        if deactivation_file:
+            with measure_stage(deactivation_file) as metrics:
+                file_metrics[deactivation_file] = metrics
+                apply_npi_deactivations(body)
+        record_pipeline_run_metrics(run_id, attempts, file_metrics)
+        finish_pipeline_run(run_id, "completed")
+        invalidate_query_caches()
+
+        elapsed = time.time() - start_time
+        return json_response(
+            {
+                "status": "completed",
+                "run_id": run_id,
+                "update_files": update_files,
+                "elapsed_seconds": elapsed,
+                "stages": [metrics.as_dict() for metrics in file_metrics.values()],
+            }
+        )
+    except Exception as e:
+        error_message = f"Internal server error: {str(e)}"
+        if run_id is not None:
+            # Files applied before the failure stay committed
+            invalidate_query_caches()
+            try:
+                if file_metrics:
+                    record_pipeline_run_metrics(run_id, attempts, file_metrics)
+                finish_pipeline_run(run_id, "failed", str(e))
+            except Exception as record_error:
+                logger.warning(f"Could not record failure of run {run_id}: {record_error}")
+        return json_response(
+            {
+                "status": "failed",
+                "run_id": run_id,
+                "error": error_message,
+                "elapsed_seconds": time.time() - start_time,
+                "stages": [metrics.as_dict() for metrics in file_metrics.values()],
+            },
+            status_code=500,
+        )
+
+
+EXPORT_COLUMNS = [
+    "npi",
+    "entity_type",
+    "entity_name",
+    "provider_location_address_1",
+    "provider_location_address_2",
+    "provider_city",
+    "provider_state",
+    "provider_postal_code_clean",
+    "county_name",
+    "state_name",
+    "primary_taxonomy_code",
+    "taxonomy_grouping",
+    "taxonomy_classification",
+    "taxonomy_specialization",
+    "data_quality_score",
+]
+
+
+def build_export_copy_query(cursor, after_npi, page_end, active_only=False):
+    select_list = []
+    for col in EXPORT_COLUMNS:
+        if col == "provider_postal_code_clean":
+            # Preserve leading zeros in ZIP codes
+            value = f"LPAD({col}, 5, '0')"
+        else:
+            value = f"{col}::TEXT"
+        # NULLs are written as quoted empty strings, like the old export
+        select_list.append(f"COALESCE({value}, '') AS {col}")
+
+    active_filter = " AND is_active" if active_only else ""
+    query = (
+        f"COPY (SELECT {', '.join(select_list)} FROM nppes_export_view "
+        f"WHERE npi > %s AND npi <= %s{active_filter} ORDER BY npi) "
+        "TO STDOUT WITH (FORMAT CSV, FORCE_QUOTE *, ENCODING 'UTF8')"
+    )
+    return cursor.mogrify(query, (after_npi, page_end)).decode()
+
+
+def export_clean_data_to_csv_chunked(
+    chunk_size=50000, output_filename="nppes_clean_export.csv", active_only=False
+):
+    """
+    Export clean NPPES data to CSV, streaming keyset-paged COPY output
+    straight into staged block uploads. With active_only, deactivated NPIs
+    are left out.
+    """
+    CONTAINER_NAME = "nppes"
+    try:
+        logger.info(f"Starting CSV export to file: {output_filename}")
+
         pg_conn = get_psycopg2_connection()
-        
-        # Initialize CSV content
-        csv_content = []
-        processed_count = 0
-        
+        blob_service_client = get_blob_service_client()
+        blob_client = blob_service_client.get_blob_client(
+            container=CONTAINER_NAME, blob=output_filename
+        )
+        writer = BlobBlockWriter(blob_client)
+
         # Add headers
-        headers = [
-            'npi', 'entity_type', 'entity_name', 'provider_location_address_1', 
-            'provider_location_address_2', 'provider_city', 'provider_state', 
-            'provider_postal_code_clean', 'county_name', 'state_name',
-            'primary_taxonomy_code', 'taxonomy_grouping', 'taxonomy_classification', 
-            'taxonomy_specialization', 'data_quality_score'
-        ]
-        csv_content.append(','.join(f'"{col}"' for col in headers))
-        
-        # Export data in chunks
-        chunk_start = 0
+        writer.write(",".join(f'"{col}"' for col in EXPORT_COLUMNS) + "\n")
+
+        processed_count = 0
+        last_npi = ""
         while True:
-            print(f"Processing chunk starting at record {chunk_start:,}")
-            
+            logger.info(f"Processing chunk after NPI '{last_npi}'")
+
             with pg_conn.cursor() as cursor:
-                # Get chunked data from the stored function
-                cursor.execute("SELECT npi, entity_type, entity_name, provider_location_address_1, provider_location_address_2, provider_city, provider_state, provider_postal_code_clean, county_name, state_name, primary_taxonomy_code, taxonomy_grouping, taxonomy_classification, taxonomy_specialization, data_quality_score FROM get_export_chunk(%s, %s)", (chunk_size, chunk_start))
-                rows = cursor.fetchall()
-                
-                if not rows:
-                    print(f"No more records found. Export complete.")
-                    break
-                
-                print(f"Retrieved {len(rows)} rows in this chunk")
-                
-                # Convert rows to CSV format
-                for row in rows:
-                    escaped_row = []
-                    for i, value in enumerate(row):
-                        if value is None:
-                            escaped_row.append('""')
-                        else:
-                            # Special handling for ZIP codes to preserve leading zeros
-                            if headers[i] == 'provider_postal_code_clean' and value is not None:
-                                str_value = str(value).zfill(5)
-                            else:
-                                str_value = str(value)
-                            
-                            # Escape quotes and wrap in quotes
-                            str_value = str_value.replace('"', '""')
-                            escaped_row.append(f'"{str_value}"')
-                    csv_content.append(','.join(escaped_row))
-                
-                processed_count += len(rows)
-                chunk_start += chunk_size
-                print(f"Processed {processed_count:,} records so far")
-                
-                # If we got less than the chunk size, we're done
-                if len(rows) < chunk_size:
+                cursor.execute(
+                    "SELECT page_end, page_rows FROM get_export_page_end(%s, %s, %s)",
+                    (last_npi, chunk_size, active_only),
+                )
+                page_end, page_rows = cursor.fetchone()
+
+                if page_end is None:
+                    logger.info("No more records found. Export complete.")
                     break
-        
+
+                cursor.copy_expert(
+                    build_export_copy_query(cursor, last_npi, page_end, active_only), writer
+                )
+
+            processed_count += page_rows
+            last_npi = page_end
+            logger.info(f"Processed {processed_count:,} records so far")
+
+            # If we got less than the chunk size, we're done
+            if page_rows < chunk_size:
+                break
+
         pg_conn.close()
-        
-        # Join all CSV content
-        final_csv = '\n'.join(csv_content)
-        
-        # Upload to Azure Blob
-        print(f"Uploading CSV file: {output_filename}")
-        upload_success = upload_csv_to_azure_blob(output_filename, final_csv)
-        
-        if upload_success is None:
-            print(f"Successfully exported {processed_count:,} records to {output_filename}")
-            return True
-        else:
-            print("Upload failed")
-            return False
-            
+
+        # Commit the staged blocks as the final blob
+        logger.info(f"Committing CSV file: {output_filename}")
+        total_bytes = writer.commit()
+        logger.info(
+            f"Successfully exported {processed_count:,} records ({total_bytes:,} bytes) to {output_filename}"
+        )
+        return True
+
+    except Exception as e:
+        logger.error(f"Error during CSV export: {e}")
+        if "pg_conn" in locals():
+            pg_conn.close()
+        return False
+
+
+# Parquet export schema; state_name is the partition key and lives in the path
+PARQUET_EXPORT_SCHEMA = pyarrow.schema(
+    [
+        (col, pyarrow.int32() if col == "data_quality_score" else pyarrow.string())
+        for col in EXPORT_COLUMNS
+        if col != "state_name"
+    ]
+)
+
+# Hive name for the partition of rows without a state
+PARQUET_NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+def build_export_state_page_query(cursor, state_name, after_npi, page_size, active_only=False):
+    select_list = [
+        f"LPAD({col}, 5, '0') AS {col}" if col == "provider_postal_code_clean" else col
+        for col in PARQUET_EXPORT_SCHEMA.names
+    ]
+    state_filter = "state_name IS NULL" if state_name is None else "state_name = %s"
+    if active_only:
+        state_filter += " AND is_active"
+    params = (after_npi, page_size) if state_name is None else (state_name, after_npi, page_size)
+    query = (
+        f"COPY (SELECT {', '.join(select_list)} FROM nppes_providers_clean "
+        f"WHERE {state_filter} AND npi > %s ORDER BY npi LIMIT %s) "
+        "TO STDOUT WITH (FORMAT CSV, ENCODING 'UTF8')"
+    )
+    return cursor.mogrify(query, params).decode()
+
+
+def read_export_page(cursor, state_name, after_npi, page_size, active_only=False):
+    page = io.BytesIO()
+    cursor.copy_expert(
+        build_export_state_page_query(cursor, state_name, after_npi, page_size, active_only), page
+    )
+    if not page.tell():
+        # pyarrow rejects a CSV without any rows
+        return PARQUET_EXPORT_SCHEMA.empty_table()
+    page.seek(0)
+    return pyarrow.csv.read_csv(
+        page,
+        read_options=pyarrow.csv.ReadOptions(column_names=PARQUET_EXPORT_SCHEMA.names),
+        convert_options=pyarrow.csv.ConvertOptions(
+            column_types=PARQUET_EXPORT_SCHEMA,
+            # COPY writes NULL unquoted and '' quoted
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+
+
+def export_state_to_parquet(
+    pg_conn,
+    container_client,
+    state_name,
+    blob_name,
+    page_size,
+    row_group_size,
+    compression_level,
+    active_only=False,
+):
+    """
+    Stream one state's rows in keyset pages into a zstd Parquet blob with row
+    groups of row_group_size rows. Returns the number of rows written; a
+    state without rows writes no blob.
+    """
+    writer = None
+    parquet_writer = None
+    pending = []
+    pending_rows = 0
+    rows_written = 0
+    last_npi = ""
+    while True:
+        with pg_conn.cursor() as cursor:
+            page = read_export_page(cursor, state_name, last_npi, page_size, active_only)
+        if page.num_rows:
+            pending.append(page)
+            pending_rows += page.num_rows
+            last_npi = page.column("npi")[-1].as_py()
+
+        # Write full row groups as they fill; the remainder goes out at the end
+        done = page.num_rows < page_size
+        while pending_rows >= row_group_size or (done and pending_rows):
+            buffered = pyarrow.concat_tables(pending)
+            row_group = buffered.slice(0, row_group_size)
+            if parquet_writer is None:
+                writer = BlobBlockWriter(container_client.get_blob_client(blob_name))
+                parquet_writer = pyarrow.parquet.ParquetWriter(
+                    writer,
+                    PARQUET_EXPORT_SCHEMA,
+                    compression="zstd",
+                    compression_level=compression_level,
+                    write_statistics=True,
+                )
+            parquet_writer.write_table(row_group, row_group_size=row_group_size)
+            rows_written += row_group.num_rows
+            pending = [buffered.slice(row_group_size)]
+            pending_rows = pending[0].num_rows
+        if done:
+            break
+
+    if parquet_writer is not None:
+        parquet_writer.close()
+        writer.commit()
+    return rows_written
+
+
+def export_clean_data_to_parquet_partitioned(
+    page_size=50000,
+    output_prefix="nppes_clean_export",
+    row_group_size=100_000,
+    compression_level=3,
+    active_only=False,
+):
+    """
+    Export clean NPPES data as zstd Parquet files partitioned by state_name
+    (<output_prefix>/state_name=<state>/part-00000.parquet, the state
+    percent-encoded as Hive readers expect). Each state is streamed from
+    Postgres in keyset pages into its own block blob upload. Files left from
+    an earlier export for states that are gone are deleted. With active_only,
+    deactivated NPIs are left out.
+    """
+    CONTAINER_NAME = "nppes"
+    try:
+        logger.info(f"Starting Parquet export to {output_prefix}/")
+
+        pg_conn = get_psycopg2_connection()
+        container_client = get_blob_service_client().get_container_client(CONTAINER_NAME)
+
+        with pg_conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT DISTINCT state_name FROM nppes_providers_clean"
+                + (" WHERE is_active" if active_only else "")
+            )
+            state_names = sorted(
+                (row[0] for row in cursor.fetchall()), key=lambda state: (state is None, state)
+            )
+
+        written_blobs = set()
+        processed_count = 0
+        for state_name in state_names:
+            # A "/" or "=" in the value would otherwise change the path
+            partition = PARQUET_NULL_PARTITION if state_name is None else quote(state_name, safe=" ")
+            blob_name = f"{output_prefix}/state_name={partition}/part-00000.parquet"
+            state_rows = export_state_to_parquet(
+                pg_conn,
+                container_client,
+                state_name,
+                blob_name,
+                page_size,
+                row_group_size,
+                compression_level,
+                active_only,
+            )
+            if not state_rows:
+                # Its rows went away since the states were listed
+                continue
+            written_blobs.add(blob_name)
+            processed_count += state_rows
+            logger.info(f"Exported {state_rows:,} rows to {blob_name}")
+
+        pg_conn.close()
+
+        for blob in container_client.list_blobs(name_starts_with=f"{output_prefix}/"):
+            if blob.name not in written_blobs:
+                container_client.delete_blob(blob.name)
+                logger.info(f"Deleted stale export file {blob.name}")
+
+        logger.info(
+            f"Successfully exported {processed_count:,} records in {len(written_blobs)} "
+            f"state partitions to {output_prefix}/"
+        )
+        return True
+
     except Exception as e:
-        print(f"Error during CSV export: {e}")
-        if 'pg_conn' in locals():
+        logger.error(f"Error during Parquet export: {e}")
+        if "pg_conn" in locals():
             pg_conn.close()
         return False
 
@@ -623,30 +3708,503 @@ def export_clean_data_to_csv_chunked(chunk_size=50000, output_filename="nppes_cl
 @app.route(route="export_clean_csv")
 def export_clean_csv(req: func.HttpRequest) -> func.HttpResponse:
     """
-    Azure Function endpoint to export clean NPPES data to CSV
+    Azure Function endpoint to export clean NPPES data to CSV, or to
+    state-partitioned Parquet with {"format": "parquet"}
     """
     start_time = time.time()
+    # Named in error messages, so a failed Parquet export is not reported as CSV
+    format_name = "CSV"
     
     try:
         # Get optional parameters from request
         body = req.get_json() if req.get_body() else {}
         chunk_size = body.get('chunk_size', 50000)
-        output_filename = body.get('output_filename', 'nppes_clean_export.csv')
-        
-        print(f"Starting CSV export with chunk_size={chunk_size}, filename={output_filename}")
+        export_format = body.get('format', 'csv')
+        if export_format == 'parquet':
+            format_name = "Parquet"
+        # Leave out deactivated NPIs
+        active_only = body.get('active_only', False)
         
         # Run the export
-        success = export_clean_data_to_csv_chunked(chunk_size, output_filename)
+        if export_format == 'parquet':
+            output_filename = body.get('output_prefix', 'nppes_clean_export')
+            logger.info(f"Starting Parquet export with chunk_size={chunk_size}, prefix={output_filename}")
+            with measure_stage("export_clean_parquet") as metrics:
+                success = export_clean_data_to_parquet_partitioned(
+                    chunk_size,
+                    output_filename,
+                    row_group_size=body.get('row_group_size', 100_000),
+                    active_only=active_only,
+                )
+        else:
+            output_filename = body.get('output_filename', 'nppes_clean_export.csv')
+            logger.info(f"Starting CSV export with chunk_size={chunk_size}, filename={output_filename}")
+            with measure_stage("export_clean_csv") as metrics:
+                success = export_clean_data_to_csv_chunked(
+                    chunk_size, output_filename, active_only=active_only
+                )
         
         elapsed = time.time() - start_time
+        payload = {
+            "file": output_filename,
+            "elapsed_seconds": elapsed,
+            "stages": [metrics.as_dict()],
+        }
         
         if success:
-            response_message = f"CSV export completed successfully in {elapsed:.2f} seconds. File: {output_filename}"
-            return func.HttpResponse(response_message, status_code=200)
+            return json_response({"status": "completed", **payload})
         else:
-            return func.HttpResponse("CSV export failed. Check logs for details.", status_code=500)
+            return json_response(
+                {
+                    "status": "failed",
+                    "error": f"{format_name} export failed. Check logs for details.",
+                    **payload,
+                },
+                status_code=500,
+            )
             
     except Exception as e:
         elapsed = time.time() - start_time
-        error_message = f"CSV export error after {elapsed:.2f} seconds: {str(e)}"
-        return func.HttpResponse(error_message, status_code=500)
+        error_message = f"{format_name} export error after {elapsed:.2f} seconds: {str(e)}"
+        return json_response({"status": "failed", "error": error_message}, status_code=500)
+
+
+PROVIDER_QUERY_COLUMNS = EXPORT_COLUMNS + [
+    "county_fips",
+    "entity_type_code",
+    "is_active",
+    "deactivated_on",
+]
+
+# Query parameter -> (WHERE condition, value parser). Each condition can use
+# one of the idx_nppes_clean_* indexes; the equality filters have a
+# (column, npi) index that returns their keyset pages already in NPI order
+PROVIDER_QUERY_FILTERS = {
+    "state": ("provider_state = %s", lambda value: value.strip().upper()),
+    "state_name": ("state_name = %s", lambda value: value.strip().upper()),
+    "county_fips": ("county_fips = %s", lambda value: value.strip()),
+    "taxonomy_code": ("primary_taxonomy_code = %s", lambda value: value.strip().upper()),
+    "taxonomy_grouping": ("taxonomy_grouping = %s", lambda value: value.strip()),
+    "entity_type": (
+        "entity_type_code = %s",
+        lambda value: {"1": 1, "2": 2, "provider": 1, "facility": 2}[value.strip().lower()],
+    ),
+    "min_quality": ("data_quality_score >= %s", int),
+    "active": (
+        "is_active = %s",
+        lambda value: {"true": True, "1": True, "false": False, "0": False}[value.strip().lower()],
+    ),
+}
+
+PROVIDER_QUERY_DEFAULT_LIMIT = 1000
+PROVIDER_QUERY_MAX_LIMIT = 10_000
+
+
+def parse_provider_filters(params):
+    filters = {}
+    for name, (_, parse) in PROVIDER_QUERY_FILTERS.items():
+        value = params.get(name)
+        if value is None or value == "":
+            continue
+        try:
+            filters[name] = parse(value)
+        except (KeyError, ValueError):
+            raise ValueError(f"Invalid value for {name}: {value!r}")
+    return filters
+
+
+def provider_filters_digest(filters):
+    # Ties a cursor to the filters it was issued for
+    return hashlib.sha256(json.dumps(filters, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def encode_provider_cursor(after_npi, filters):
+    payload = json.dumps({"after": after_npi, "filters": provider_filters_digest(filters)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_provider_cursor(cursor_token, filters):
+    try:
+        padded = cursor_token + "=" * (-len(cursor_token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        after_npi = payload["after"]
+        filters_digest = payload["filters"]
+        # The NPI is compared to the text npi column, so anything but a
+        # 10-digit string would page from the wrong place
+        if not isinstance(after_npi, str) or not re.fullmatch(r"[0-9]{10}", after_npi):
+            raise ValueError(after_npi)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if filters_digest != provider_filters_digest(filters):
+        raise ValueError("Cursor was issued for different filters")
+    return after_npi
+
+
+def build_provider_query(filters, after_npi, limit):
+    conditions = ["npi > %s"]
+    params = [after_npi]
+    for name, value in filters.items():
+        conditions.append(PROVIDER_QUERY_FILTERS[name][0])
+        params.append(value)
+    # One extra row tells whether there is a next page
+    query = (
+        f"SELECT {', '.join(PROVIDER_QUERY_COLUMNS)} FROM nppes_providers_clean "
+        f"WHERE {' AND '.join(conditions)} ORDER BY npi LIMIT %s"
+    )
+    return query, params + [limit + 1]
+
+
+def query_providers(filters, after_npi="", limit=PROVIDER_QUERY_DEFAULT_LIMIT):
+    """
+    Return up to `limit` clean providers matching `filters` with NPIs after
+    after_npi, in NPI order, and the NPI to continue from (None on the last page).
+    """
+    query, params = build_provider_query(filters, after_npi, limit)
+    with query_connection() as pg_conn:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+    next_after = rows[limit - 1][0] if len(rows) > limit else None
+    return rows[:limit], next_after
+
+
+def format_query_rows(columns, rows, output_format):
+    if output_format == "csv":
+        buffer = StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(columns)
+        writer.writerows(rows)
+        return buffer.getvalue(), "text/csv"
+    lines = [json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows]
+    return "".join(lines), "application/x-ndjson"
+
+
+@app.route(route="providers", methods=["GET"])
+def providers(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Query clean providers by state, county_fips, taxonomy_code,
+    taxonomy_grouping, entity_type, min_quality and active. Returns one page as NDJSON
+    (default) or CSV (format=csv); pass the X-Next-Cursor header value back as
+    `cursor` for the next page.
+    """
+    try:
+        filters = parse_provider_filters(req.params)
+        output_format = req.params.get("format", "ndjson").lower()
+        if output_format not in ("ndjson", "csv"):
+            raise ValueError(f"Unsupported format: {output_format}")
+        limit = int(req.params.get("limit", PROVIDER_QUERY_DEFAULT_LIMIT))
+        if not 1 <= limit <= PROVIDER_QUERY_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {PROVIDER_QUERY_MAX_LIMIT}")
+        cursor_token = req.params.get("cursor")
+        after_npi = decode_provider_cursor(cursor_token, filters) if cursor_token else ""
+    except ValueError as e:
+        return json_response({"error": str(e)}, status_code=400)
+
+    try:
+        rows, next_after = query_providers(filters, after_npi, limit)
+    except Exception as e:
+        logger.error(f"Provider query failed: {e}")
+        return json_response({"error": f"Internal server error: {str(e)}"}, status_code=500)
+
+    body, mimetype = format_query_rows(PROVIDER_QUERY_COLUMNS, rows, output_format)
+    headers = {"X-Row-Count": str(len(rows))}
+    if next_after is not None:
+        headers["X-Next-Cursor"] = encode_provider_cursor(next_after, filters)
+    return func.HttpResponse(body, status_code=200, mimetype=mimetype, headers=headers)
+
+
+COUNTY_SUMMARY_COLUMNS = [
+    "county_fips",
+    "county_name",
+    "state_name",
+    "entity_type",
+    "taxonomy_grouping",
+    "provider_count",
+    "county_population",
+    "providers_per_100k",
+]
+
+COUNTY_SUMMARY_FILTERS = {
+    "state_name": ("state_name = %s", lambda value: value.strip().upper()),
+    "county_fips": ("county_fips = %s", lambda value: value.strip()),
+    "entity_type": (
+        "entity_type = %s",
+        lambda value: {
+            "1": "Individual", "2": "Organization", "individual": "Individual",
+            "organization": "Organization", "provider": "Individual", "facility": "Organization",
+        }[value.strip().lower()],
+    ),
+    "taxonomy_grouping": ("taxonomy_grouping = %s", lambda value: value.strip()),
+}
+
+
+def query_county_provider_summary(filters):
+    conditions = [COUNTY_SUMMARY_FILTERS[name][0] for name in filters]
+    query = f"SELECT {', '.join(COUNTY_SUMMARY_COLUMNS)} FROM county_provider_summary"
+    if conditions:
+        query += f" WHERE {' AND '.join(conditions)}"
+    query += " ORDER BY county_fips, entity_type, taxonomy_grouping"
+    with query_connection() as pg_conn:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(query, list(filters.values()))
+            return cursor.fetchall()
+
+
+@app.route(route="county_provider_summary", methods=["GET"])
+def county_provider_summary(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Providers per county by entity type and taxonomy grouping, with population
+    and per-100k rates, served from the county_provider_summary aggregate.
+    Filters: state_name, county_fips, entity_type, taxonomy_grouping.
+    """
+    try:
+        filters = {}
+        for name, (_, parse) in COUNTY_SUMMARY_FILTERS.items():
+            value = req.params.get(name)
+            if value:
+                try:
+                    filters[name] = parse(value)
+                except KeyError:
+                    raise ValueError(f"Invalid value for {name}: {value!r}")
+        output_format = req.params.get("format", "ndjson").lower()
+        if output_format not in ("ndjson", "csv"):
+            raise ValueError(f"Unsupported format: {output_format}")
+    except ValueError as e:
+        return json_response({"error": str(e)}, status_code=400)
+
+    try:
+        rows = query_county_provider_summary(filters)
+    except Exception as e:
+        logger.error(f"County summary query failed: {e}")
+        return json_response({"error": f"Internal server error: {str(e)}"}, status_code=500)
+
+    body, mimetype = format_query_rows(COUNTY_SUMMARY_COLUMNS, rows, output_format)
+    return func.HttpResponse(
+        body, status_code=200, mimetype=mimetype, headers={"X-Row-Count": str(len(rows))}
+    )
+
+
+PROVIDER_SEARCH_COLUMNS = PROVIDER_QUERY_COLUMNS + ["score"]
+PROVIDER_SEARCH_DEFAULT_LIMIT = 25
+PROVIDER_SEARCH_MAX_LIMIT = 100
+# Shorter queries have no trigram the index can look up
+PROVIDER_SEARCH_MIN_QUERY_LENGTH = 3
+
+
+def normalize_search_query(text):
+    # search_text is lower-cased; trigrams ignore punctuation and word order
+    return " ".join(text.lower().split())
+
+
+def build_provider_search_query(search_query, filters, limit):
+    # <% (word similarity above pg_trgm.word_similarity_threshold) is served
+    # by idx_nppes_clean_search_trgm; only its matches are ranked
+    conditions = ["%s <%% search_text"]
+    params = [search_query]
+    for name, value in filters.items():
+        conditions.append(PROVIDER_QUERY_FILTERS[name][0])
+        params.append(value)
+    query = (
+        f"SELECT {', '.join(PROVIDER_QUERY_COLUMNS)}, word_similarity(%s, search_text) AS score "
+        f"FROM nppes_providers_clean WHERE {' AND '.join(conditions)} "
+        "ORDER BY score DESC, data_quality_score DESC, npi LIMIT %s"
+    )
+    return query, [search_query] + params + [limit]
+
+
+def search_providers(search_query, filters, limit=PROVIDER_SEARCH_DEFAULT_LIMIT):
+    """
+    Return up to `limit` clean providers whose name or taxonomy is similar to
+    search_query, best match first, each with its word similarity score.
+    """
+    query, params = build_provider_search_query(search_query, filters, limit)
+    with query_connection() as pg_conn:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+
+@app.route(route="provider_search", methods=["GET"])
+def provider_search(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Search clean providers by partial or misspelled name, such as
+    `q=smith john cardio`. Matches are ranked by trigram word similarity
+    against the provider name, other organization name and taxonomy, and
+    can be narrowed with the `providers` filters (state, taxonomy_code, ...).
+    Returns NDJSON (default) or CSV (format=csv).
+    """
+    try:
+        search_query = normalize_search_query(req.params.get("q", ""))
+        if len(search_query) < PROVIDER_SEARCH_MIN_QUERY_LENGTH:
+            raise ValueError(
+                f"q must be at least {PROVIDER_SEARCH_MIN_QUERY_LENGTH} characters"
+            )
+        filters = parse_provider_filters(req.params)
+        output_format = req.params.get("format", "ndjson").lower()
+        if output_format not in ("ndjson", "csv"):
+            raise ValueError(f"Unsupported format: {output_format}")
+        limit = int(req.params.get("limit", PROVIDER_SEARCH_DEFAULT_LIMIT))
+        if not 1 <= limit <= PROVIDER_SEARCH_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {PROVIDER_SEARCH_MAX_LIMIT}")
+    except ValueError as e:
+        return json_response({"error": str(e)}, status_code=400)
+
+    try:
+        rows = search_providers(search_query, filters, limit)
+    except Exception as e:
+        logger.error(f"Provider search failed: {e}")
+        return json_response({"error": f"Internal server error: {str(e)}"}, status_code=500)
+
+    body, mimetype = format_query_rows(PROVIDER_SEARCH_COLUMNS, rows, output_format)
+    return func.HttpResponse(
+        body, status_code=200, mimetype=mimetype, headers={"X-Row-Count": str(len(rows))}
+    )
+
+
+NPI_LOOKUP_MAX_NPIS = int(os.getenv("NPI_LOOKUP_MAX_NPIS", "5000"))
+NPI_CACHE_MAX_ENTRIES = int(os.getenv("NPI_CACHE_MAX_ENTRIES", "100000"))
+NPI_CACHE_TTL_SECONDS = float(os.getenv("NPI_CACHE_TTL_SECONDS", "900"))
+REFERENCE_CACHE_TTL_SECONDS = float(os.getenv("REFERENCE_CACHE_TTL_SECONDS", "3600"))
+# How often a worker checks pipeline_runs for a run completed by another worker
+QUERY_CACHE_VERSION_CHECK_SECONDS = float(os.getenv("QUERY_CACHE_VERSION_CHECK_SECONDS", "60"))
+
+# Per-worker caches: clean provider rows by NPI (None for unknown NPIs) and
+# whole small reference tables by table name
+npi_cache = TTLLRUCache(NPI_CACHE_MAX_ENTRIES, NPI_CACHE_TTL_SECONDS)
+reference_cache = TTLLRUCache(8, REFERENCE_CACHE_TTL_SECONDS)
+_query_cache_version = {"data_version": None, "checked_at": None}
+
+# Reference table -> (key column, value columns)
+REFERENCE_TABLES = {
+    "nucc_taxonomy": ("code", ["grouping", "classification", "specialization"]),
+    "ssa_fips_state_county": ("fipscounty", ["ssa_code", "cbsa_code", "cbsa_name"]),
+}
+
+NPI_PATTERN = re.compile(r"^\d{10}$")
+
+
+def invalidate_query_caches():
+    npi_cache.clear()
+    reference_cache.clear()
+    logger.info("Query caches invalidated")
+
+
+def sync_query_caches(cursor):
+    # Pipeline runs and weekly updates finished by other workers clear this
+    # worker's caches too; failed ones count, as their committed stages stay
+    now = time.monotonic()
+    checked_at = _query_cache_version["checked_at"]
+    if checked_at is not None and now - checked_at < QUERY_CACHE_VERSION_CHECK_SECONDS:
+        return
+    cursor.execute("SELECT MAX(finished_at) FROM pipeline_runs")
+    data_version = cursor.fetchone()[0]
+    if checked_at is not None and data_version != _query_cache_version["data_version"]:
+        invalidate_query_caches()
+    _query_cache_version.update(data_version=data_version, checked_at=now)
+
+
+def get_reference_table(cursor, table_name):
+    # Small tables are read whole and kept until their TTL or the next pipeline run
+    generation = reference_cache.generation
+    table = reference_cache.get(table_name)
+    if table is TTLLRUCache.MISSING:
+        key_column, value_columns = REFERENCE_TABLES[table_name]
+        cursor.execute(f"SELECT {key_column}, {', '.join(value_columns)} FROM {table_name}")
+        table = {row[0]: dict(zip(value_columns, row[1:])) for row in cursor.fetchall()}
+        reference_cache.put(table_name, table, generation)
+    return table
+
+
+def build_npi_lookup_query():
+    # Taxonomy codes come along in the same round trip, primary first
+    columns = ", ".join(f"c.{col}" for col in PROVIDER_QUERY_COLUMNS)
+    return (
+        f"SELECT {columns}, ARRAY(SELECT pt.code FROM provider_taxonomy pt "
+        "WHERE pt.npi = c.npi ORDER BY pt.is_primary DESC, pt.slot) AS taxonomy_codes "
+        "FROM nppes_providers_clean c WHERE c.npi = ANY(%s)"
+    )
+
+
+def build_npi_record(row, taxonomy_table, ssa_table):
+    record = dict(zip(PROVIDER_QUERY_COLUMNS, row))
+    record["taxonomies"] = [
+        {"code": code, **taxonomy_table.get(code, dict.fromkeys(REFERENCE_TABLES["nucc_taxonomy"][1]))}
+        for code in row[len(PROVIDER_QUERY_COLUMNS)]
+    ]
+    record.update(
+        ssa_table.get(record["county_fips"], dict.fromkeys(REFERENCE_TABLES["ssa_fips_state_county"][1]))
+    )
+    return record
+
+
+def lookup_npis(npis):
+    """
+    Resolve NPIs to clean provider records with their taxonomies and SSA/CBSA
+    codes. Hot NPIs come from npi_cache; the rest are read in one
+    `npi = ANY(...)` query. Returns ({npi: record or None}, cache hits).
+    """
+    with query_connection() as pg_conn:
+        with pg_conn.cursor() as cursor:
+            sync_query_caches(cursor)
+            generation = npi_cache.generation
+            rows = npi_cache.get_many(npis)
+            cache_hits = len(rows)
+            missing = [npi for npi in npis if npi not in rows]
+            if missing:
+                cursor.execute(build_npi_lookup_query(), (missing,))
+                found = {row[0]: row for row in cursor.fetchall()}
+                fetched = {npi: found.get(npi) for npi in missing}
+                npi_cache.put_many(fetched, generation)
+                rows.update(fetched)
+            taxonomy_table = get_reference_table(cursor, "nucc_taxonomy")
+            ssa_table = get_reference_table(cursor, "ssa_fips_state_county")
+
+    records = {
+        npi: None if row is None else build_npi_record(row, taxonomy_table, ssa_table)
+        for npi, row in rows.items()
+    }
+    return records, cache_hits
+
+
+def parse_npi_list(npis):
+    if not isinstance(npis, list) or not npis:
+        raise ValueError("npis must be a non-empty list")
+    if len(npis) > NPI_LOOKUP_MAX_NPIS:
+        raise ValueError(f"At most {NPI_LOOKUP_MAX_NPIS} npis per request")
+    normalized = [str(npi).strip() for npi in npis]
+    invalid = [npi for npi in normalized if not NPI_PATTERN.match(npi)]
+    if invalid:
+        raise ValueError(f"Invalid NPIs: {invalid[:10]}")
+    # Duplicates are looked up once
+    return list(dict.fromkeys(normalized))
+
+
+@app.route(route="npi_lookup", methods=["POST"])
+def npi_lookup(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Batch NPI lookup for enrichment jobs. POST {"npis": [...]} with up to
+    NPI_LOOKUP_MAX_NPIS NPIs; returns the clean provider record of each, in
+    request order, and the NPIs that were not found.
+    """
+    try:
+        try:
+            body = req.get_json()
+        except ValueError:
+            raise ValueError("Request body must be JSON")
+        npis = parse_npi_list(body.get("npis") if isinstance(body, dict) else None)
+    except ValueError as e:
+        return json_response({"error": str(e)}, status_code=400)
+
+    try:
+        records, cache_hits = lookup_npis(npis)
+    except Exception as e:
+        logger.error(f"NPI lookup failed: {e}")
+        return json_response({"error": f"Internal server error: {str(e)}"}, status_code=500)
+
+    return json_response(
+        {
+            "providers": [records[npi] for npi in npis if records[npi] is not None],
+            "not_found": [npi for npi in npis if records[npi] is None],
+            "cache_hits": cache_hits,
+        }
+    )
@@ -1,4 +1,10 @@
--- Create the cleaned NPPES providers table with proper constraints
+-- Create the cleaned NPPES providers table with proper constraints.
+-- Hash-partitioned by NPI so the NPI ranges cleaned over separate connections
+-- (see clean_nppes_npi_range in 08) spread their writes over all partitions;
+-- the primary key on npi, and so ON CONFLICT (npi), still holds across the
+-- whole table
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 CREATE TABLE IF NOT EXISTS nppes_providers_clean (
     npi VARCHAR(10) PRIMARY KEY,
     entity_type_code INTEGER NOT NULL CHECK (entity_type_code IN (1, 2)),
@@ -42,11 +48,38 @@ CREATE TABLE IF NOT EXISTS nppes_providers_clean (
     has_primary_taxonomy BOOLEAN DEFAULT FALSE,
     has_county_info BOOLEAN DEFAULT FALSE,
     
+    -- Deactivation (CMS deactivated NPI report, merged by apply_npi_deactivations in 25)
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    deactivated_on DATE,
+    
+    -- Name search (provider_search endpoint, see 26)
+    search_text TEXT GENERATED ALWAYS AS (
+        lower(
+            COALESCE(entity_name, '') || ' ' ||
+            COALESCE(provider_other_organization_name, '') || ' ' ||
+            COALESCE(taxonomy_classification, '') || ' ' ||
+            COALESCE(taxonomy_specialization, '')
+        )
+    ) STORED,
+    
     -- Metadata
     data_quality_score INTEGER DEFAULT 0, -- 0-100 score
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+) PARTITION BY HASH (npi);
+
+-- 16 partitions: nppes_providers_clean_p00 .. nppes_providers_clean_p15
+DO $$
+BEGIN
+    FOR partition_remainder IN 0 .. 15 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF nppes_providers_clean FOR VALUES WITH (MODULUS 16, REMAINDER %s)',
+            'nppes_providers_clean_p' || lpad(partition_remainder::TEXT, 2, '0'),
+            partition_remainder
+        );
+    END LOOP;
+END;
+$$;
 
 -- Create performance indexes
 CREATE INDEX IF NOT EXISTS idx_nppes_clean_state_city ON nppes_providers_clean (provider_state, provider_city);
@@ -54,5 +87,16 @@ CREATE INDEX IF NOT EXISTS idx_nppes_clean_entity_type ON nppes_providers_clean
 CREATE INDEX IF NOT EXISTS idx_nppes_clean_taxonomy ON nppes_providers_clean (primary_taxonomy_code);
 CREATE INDEX IF NOT EXISTS idx_nppes_clean_zip ON nppes_providers_clean (provider_postal_code_clean);
 CREATE INDEX IF NOT EXISTS idx_nppes_clean_quality ON nppes_providers_clean (data_quality_score);
-CREATE INDEX IF NOT EXISTS idx_nppes_clean_county ON nppes_providers_clean (county_fips);
-CREATE INDEX IF NOT EXISTS idx_nppes_clean_state ON nppes_providers_clean (state_name);
+-- (filter, npi) indexes serve the keyset pages of the providers endpoint;
+-- (state_name, npi) also serves the per-state keyset pages of the Parquet export
+DROP INDEX IF EXISTS idx_nppes_clean_state;
+DROP INDEX IF EXISTS idx_nppes_clean_county;
+CREATE INDEX IF NOT EXISTS idx_nppes_clean_state_npi ON nppes_providers_clean (state_name, npi);
+CREATE INDEX IF NOT EXISTS idx_nppes_clean_provider_state_npi ON nppes_providers_clean (provider_state, npi);
+CREATE INDEX IF NOT EXISTS idx_nppes_clean_county_npi ON nppes_providers_clean (county_fips, npi);
+CREATE INDEX IF NOT EXISTS idx_nppes_clean_taxonomy_grouping_npi ON nppes_providers_clean (taxonomy_grouping, npi);
+-- Active-only keyset pages, and the few deactivated rows checked for reactivation
+CREATE INDEX IF NOT EXISTS idx_nppes_clean_active_npi ON nppes_providers_clean (npi) WHERE is_active;
+CREATE INDEX IF NOT EXISTS idx_nppes_clean_inactive_npi ON nppes_providers_clean (npi) WHERE NOT is_active;
+-- Trigram index for partial and misspelled name search
+CREATE INDEX IF NOT EXISTS idx_nppes_clean_search_trgm ON nppes_providers_clean USING GIN (search_text gin_trgm_ops);
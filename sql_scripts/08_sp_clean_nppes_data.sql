@@ -1,20 +1,42 @@
 -- =====================================================
--- Main Cleaning Stored Procedure
+-- Cleaning Upsert for a Raw Source Table
 -- =====================================================
-CREATE OR REPLACE PROCEDURE clean_and_populate_nppes_data()
+-- Cleans every row of source_table (nppes_providers or a staging table with
+-- the same columns, such as nppes_providers_delta) and upserts the result
+-- into nppes_providers_clean. Only the NPIs present in source_table are touched.
+-- With npi_from/npi_to, only the source NPIs in [npi_from, npi_to) are
+-- cleaned (NULL leaves that side open). target_table is the clean table or
+-- its bulk rebuild copy, nppes_providers_clean_staging (see 16).
+DROP PROCEDURE IF EXISTS upsert_clean_nppes_providers(TEXT, INTEGER);
+DROP PROCEDURE IF EXISTS upsert_clean_nppes_providers(TEXT, INTEGER, INTEGER);
+DROP PROCEDURE IF EXISTS upsert_clean_nppes_providers(TEXT, INTEGER, TEXT, TEXT);
+
+-- Condition for an NPI range; on the untrimmed npi, so a range of the raw
+-- primary key is read by an index range scan
+CREATE OR REPLACE FUNCTION npi_range_filter(npi_from TEXT, npi_to TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT CONCAT(
+        CASE WHEN npi_from IS NOT NULL THEN format(' AND npi >= %L', npi_from) END,
+        CASE WHEN npi_to IS NOT NULL THEN format(' AND npi < %L', npi_to) END
+    )
+$$;
+
+CREATE OR REPLACE PROCEDURE upsert_clean_nppes_providers(
+    source_table TEXT,
+    INOUT processed_count INTEGER DEFAULT NULL,
+    npi_from TEXT DEFAULT NULL,
+    npi_to TEXT DEFAULT NULL,
+    target_table TEXT DEFAULT 'nppes_providers_clean'
+)
 LANGUAGE plpgsql
 AS $$
-DECLARE
-    processed_count INTEGER;
-    start_time TIMESTAMP;
 BEGIN
-    start_time := CLOCK_TIMESTAMP();
-    RAISE NOTICE 'Starting NPPES data cleaning at %', start_time;
-    
-    -- Truncate clean table for fresh load
-    TRUNCATE TABLE nppes_providers_clean;
-    
+
     -- Main cleaning and transformation with optimized CTEs
+    EXECUTE format($sql$
     WITH cleaned_raw_data AS (
         SELECT 
             TRIM(npi) AS npi,
@@ -60,7 +82,7 @@ BEGIN
                 healthcare_provider_taxonomy_code_15, healthcare_provider_primary_taxonomy_switch_15
             ) AS primary_taxonomy_code
             
-        FROM nppes_providers
+        FROM %I
         WHERE TRIM(npi) IS NOT NULL 
           AND TRIM(npi) != ''
           AND LENGTH(TRIM(npi)) = 10
@@ -68,6 +90,7 @@ BEGIN
           AND TRIM(entity_type_code) IS NOT NULL
           AND TRIM(entity_type_code) != ''
           AND TRIM(entity_type_code) ~ '^\d+$' -- Only numeric entity codes
+          %s
     ),
     enriched_data AS (
         SELECT 
@@ -116,39 +139,22 @@ BEGIN
         LEFT JOIN nucc_taxonomy nt ON crd.primary_taxonomy_code = nt.code
     ),
     county_enriched_data AS (
-        -- Add county information using ZIP-county crosswalk
-        -- For ZIPs that span multiple counties, select the one with largest population (per Note 2)
+        -- Add county information from the precomputed ZIP -> county lookup.
+        -- zip_primary_county already holds one county per ZIP (larger population
+        -- per Note 2 by default, see build_zip_primary_county), so this join is 1:1
         SELECT 
             ed.*,
-            zc.county AS county_fips,
-            sfc.countyname_fips AS county_name,
-            sfc.state_name,
-            zc.tot_ratio AS zip_county_ratio,
-            ccp.population AS county_population,
+            zpc.county_fips,
+            zpc.county_name,
+            zpc.state_name,
+            zpc.zip_county_ratio,
+            zpc.county_population,
             
             -- County info quality flag
-            (zc.county IS NOT NULL AND sfc.countyname_fips IS NOT NULL) AS has_county_info,
-            
-            -- Rank counties by POPULATION for each ZIP (per README Note 2: "assign the county with the larger population")
-            ROW_NUMBER() OVER (
-                PARTITION BY ed.npi 
-                ORDER BY ccp.population DESC NULLS LAST, zc.tot_ratio DESC NULLS LAST
-            ) AS county_rank
+            (zpc.county_fips IS NOT NULL AND zpc.county_name IS NOT NULL) AS has_county_info
             
         FROM enriched_data ed
-        LEFT JOIN zip_county zc ON ed.provider_postal_code_clean = zc.zip
-        LEFT JOIN ssa_fips_state_county sfc ON zc.county = sfc.fipscounty
-        LEFT JOIN census_county_population ccp ON (
-            LEFT(sfc.fipscounty, 2) = ccp.state_fips AND 
-            RIGHT(sfc.fipscounty, 3) = ccp.county_fips
-        )
-    ),
-    final_enriched_data AS (
-        -- Select only the primary county for each provider (highest ratio)
-        SELECT 
-            ced.*
-        FROM county_enriched_data ced
-        WHERE ced.county_rank = 1
+        LEFT JOIN zip_primary_county zpc ON ed.provider_postal_code_clean = zpc.zip
     ),
     scored_data AS (
         SELECT 
@@ -161,11 +167,11 @@ BEGIN
                 CASE WHEN has_primary_taxonomy THEN 20 ELSE 0 END +
                 CASE WHEN has_county_info THEN 20 ELSE 0 END -- New county criterion
             ) AS data_quality_score
-        FROM final_enriched_data
+        FROM county_enriched_data
     )
     
     -- Insert into clean table with UPSERT
-    INSERT INTO nppes_providers_clean (
+    INSERT INTO %3$I (
         npi, entity_type_code, entity_type, entity_name,
         provider_organization_name, provider_last_name, provider_first_name,
         provider_middle_name, provider_name_prefix, provider_name_suffix,
@@ -221,12 +227,114 @@ BEGIN
         has_primary_taxonomy = EXCLUDED.has_primary_taxonomy,
         has_county_info = EXCLUDED.has_county_info,
         data_quality_score = EXCLUDED.data_quality_score,
-        updated_at = CURRENT_TIMESTAMP;
+        updated_at = CURRENT_TIMESTAMP
+    $sql$, source_table, npi_range_filter(npi_from, npi_to), target_table);
     
     GET DIAGNOSTICS processed_count = ROW_COUNT;
+END;
+$$;
+
+-- =====================================================
+-- NPI Range Cleaning
+-- =====================================================
+-- range_count NPI ranges of about equal width between the lowest and highest
+-- raw NPI (both read from the primary key). NPIs are issued sequentially, so
+-- the ranges hold similar row counts. The first range is open below and the
+-- last open above, so every raw row falls in exactly one. The ranges only
+-- change when nppes_providers does, so a resumed run gets the same ones.
+CREATE OR REPLACE FUNCTION get_clean_npi_ranges(range_count INTEGER)
+RETURNS TABLE (range_index INTEGER, npi_from VARCHAR(10), npi_to VARCHAR(10))
+LANGUAGE plpgsql
+STABLE
+AS $$
+DECLARE
+    lowest TEXT;
+    highest TEXT;
+    low BIGINT := 1000000000;
+    high BIGINT := 3000000000;
+BEGIN
+    SELECT MIN(p.npi), MAX(p.npi) INTO lowest, highest FROM nppes_providers p;
+    IF lowest ~ '^\d{10}$' AND highest ~ '^\d{10}$' THEN
+        low := lowest::BIGINT;
+        high := highest::BIGINT + 1;
+    END IF;
+
+    RETURN QUERY
+    SELECT
+        i,
+        CASE WHEN i > 0 THEN lpad((low + (high - low) * i / range_count)::TEXT, 10, '0') END::VARCHAR(10),
+        CASE WHEN i < range_count - 1 THEN lpad((low + (high - low) * (i + 1) / range_count)::TEXT, 10, '0') END::VARCHAR(10)
+    FROM generate_series(0, range_count - 1) AS i;
+END;
+$$;
+
+-- Cleans the raw NPIs in [npi_from, npi_to) in its own transaction, so several
+-- ranges can be cleaned at once and a failed one retried alone. Each range
+-- reads only its slice of the raw primary key; the cleaned rows are routed to
+-- the hash partitions of nppes_providers_clean, or of its bulk rebuild copy
+-- given as target_table. The range's clean rows are replaced, so a range can
+-- also be re-cleaned on its own.
+DROP PROCEDURE IF EXISTS clean_nppes_partition(INTEGER, INTEGER);
+DROP PROCEDURE IF EXISTS clean_nppes_npi_range(TEXT, TEXT, INTEGER);
+
+CREATE OR REPLACE PROCEDURE clean_nppes_npi_range(
+    npi_from TEXT,
+    npi_to TEXT,
+    INOUT processed_count INTEGER DEFAULT NULL,
+    target_table TEXT DEFAULT 'nppes_providers_clean'
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time TIMESTAMP := CLOCK_TIMESTAMP();
+BEGIN
+    EXECUTE format('DELETE FROM %I WHERE TRUE', target_table) || npi_range_filter(npi_from, npi_to);
+    CALL upsert_clean_nppes_providers(
+        'nppes_providers', processed_count, npi_from, npi_to, target_table
+    );
+
+    RAISE NOTICE 'NPI range [%, %) cleaned. Records processed: %. Duration: %',
+        COALESCE(npi_from, '-'), COALESCE(npi_to, '-'), processed_count, CLOCK_TIMESTAMP() - start_time;
+END;
+$$;
+
+-- =====================================================
+-- Main Cleaning Stored Procedure
+-- =====================================================
+
+-- bulk_load rebuilds into a copy without secondary indexes, builds them once
+-- and swaps the copy's partitions in at the end (see begin_bulk_rebuild in 16)
+DROP PROCEDURE IF EXISTS clean_and_populate_nppes_data();
+
+CREATE OR REPLACE PROCEDURE clean_and_populate_nppes_data(bulk_load BOOLEAN DEFAULT FALSE)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    processed_count INTEGER;
+    start_time TIMESTAMP;
+BEGIN
+    start_time := CLOCK_TIMESTAMP();
+    RAISE NOTICE 'Starting NPPES data cleaning at %', start_time;
+    
+    -- Truncate clean table for fresh load; readers wait on the TRUNCATE lock
+    -- until commit, so they never see a partially rebuilt table. A bulk
+    -- rebuild leaves the live table readable until the final swap
+    IF bulk_load THEN
+        CALL begin_bulk_rebuild('nppes_providers_clean');
+        CALL upsert_clean_nppes_providers(
+            'nppes_providers', processed_count, NULL, NULL, 'nppes_providers_clean_staging'
+        );
+    ELSE
+        TRUNCATE TABLE nppes_providers_clean;
+        CALL upsert_clean_nppes_providers('nppes_providers', processed_count);
+    END IF;
     
     -- Update statistics
-    ANALYZE nppes_providers_clean;
+    IF bulk_load THEN
+        CALL finish_bulk_rebuild('nppes_providers_clean');
+    ELSE
+        ANALYZE nppes_providers_clean;
+    END IF;
     
     RAISE NOTICE 'NPPES data cleaning completed at %. Records processed: %. Duration: %', 
         CLOCK_TIMESTAMP(), 
@@ -17,7 +17,9 @@ SELECT
     taxonomy_grouping, 
     taxonomy_classification, 
     taxonomy_specialization,
-    data_quality_score
+    data_quality_score,
+    is_active,
+    deactivated_on
 FROM nppes_providers_clean 
 ORDER BY npi;
 
@@ -22,7 +22,9 @@ BEGIN
         taxonomy_grouping, 
         taxonomy_classification, 
         taxonomy_specialization,
-        data_quality_score
+        data_quality_score,
+        is_active,
+        deactivated_on
     FROM nppes_providers_clean 
     ORDER BY npi;
 
@@ -1,7 +1,12 @@
 -- Create a stored procedure to get chunked export data
+-- With active_only, deactivated NPIs (see 25) are left out; the filter is
+-- added to the query text so the plan can use idx_nppes_clean_active_npi
+DROP FUNCTION IF EXISTS get_export_chunk(INTEGER, INTEGER);
+
 CREATE OR REPLACE FUNCTION get_export_chunk(
     chunk_size INTEGER,
-    chunk_offset INTEGER
+    chunk_offset INTEGER,
+    active_only BOOLEAN DEFAULT FALSE
 )
 RETURNS TABLE(
     npi VARCHAR(10),
@@ -23,7 +28,7 @@ RETURNS TABLE(
 LANGUAGE plpgsql
 AS $$
 BEGIN
-    RETURN QUERY
+    RETURN QUERY EXECUTE format('
     SELECT 
         c.npi, 
         c.entity_type, 
@@ -41,7 +46,10 @@ BEGIN
         c.taxonomy_specialization,
         c.data_quality_score
     FROM nppes_providers_clean c
+    %s
     ORDER BY c.npi
-    LIMIT chunk_size OFFSET chunk_offset;
+    LIMIT $1 OFFSET $2',
+        CASE WHEN active_only THEN 'WHERE c.is_active' ELSE '' END)
+    USING chunk_size, chunk_offset;
 END;
 $$;
\ No newline at end of file
@@ -0,0 +1,47 @@
+-- Keyset page boundary for chunked exports
+-- Returns the last NPI of the next page after after_npi (use '' for the first page)
+-- and the number of rows in that page, so each page can be streamed with
+-- COPY ... WHERE npi > after_npi AND npi <= page_end instead of LIMIT/OFFSET.
+-- With active_only the page counts only active NPIs (see 25), read from
+-- idx_nppes_clean_active_npi
+DROP FUNCTION IF EXISTS get_export_page_end(VARCHAR, INTEGER);
+
+CREATE OR REPLACE FUNCTION get_export_page_end(
+    after_npi VARCHAR(10),
+    page_size INTEGER,
+    active_only BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE(
+    page_end VARCHAR(10),
+    page_rows BIGINT
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF active_only THEN
+        RETURN QUERY
+        SELECT 
+            MAX(page.npi)::VARCHAR(10),
+            COUNT(*)
+        FROM (
+            SELECT c.npi
+            FROM nppes_providers_clean c
+            WHERE c.npi > after_npi AND c.is_active
+            ORDER BY c.npi
+            LIMIT page_size
+        ) page;
+    ELSE
+        RETURN QUERY
+        SELECT 
+            MAX(page.npi)::VARCHAR(10),
+            COUNT(*)
+        FROM (
+            SELECT c.npi
+            FROM nppes_providers_clean c
+            WHERE c.npi > after_npi
+            ORDER BY c.npi
+            LIMIT page_size
+        ) page;
+    END IF;
+END;
+$$;
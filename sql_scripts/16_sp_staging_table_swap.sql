@@ -0,0 +1,265 @@
+-- =====================================================
+-- Staging Table Procedures for All-or-Nothing Loads
+-- =====================================================
+-- Loads write into <table>_staging; the live table is only replaced once the
+-- whole load has succeeded, so readers never see a half-loaded table.
+
+DROP PROCEDURE IF EXISTS prepare_staging_table(TEXT);
+
+-- Create an empty staging copy of a table (same columns, defaults and indexes).
+-- For a bulk load the copy is UNLOGGED and has no indexes; swap_staging_table
+-- makes it logged and builds the indexes once, after the last row is loaded
+CREATE OR REPLACE PROCEDURE prepare_staging_table(table_name TEXT, bulk_load BOOLEAN DEFAULT FALSE)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    staging_name TEXT := table_name || '_staging';
+BEGIN
+    EXECUTE format('DROP TABLE IF EXISTS %I', staging_name);
+    IF bulk_load THEN
+        EXECUTE format('CREATE UNLOGGED TABLE %I (LIKE %I INCLUDING ALL EXCLUDING INDEXES)',
+            staging_name, table_name);
+    ELSE
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING ALL)', staging_name, table_name);
+    END IF;
+    RAISE NOTICE 'Staging table % prepared (bulk load: %)', staging_name, bulk_load;
+END;
+$$;
+
+-- Build on the staging table every live index it does not have yet,
+-- re-attaching primary key and unique constraints to their indexes
+CREATE OR REPLACE PROCEDURE build_staging_indexes(table_name TEXT)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    staging_name TEXT := table_name || '_staging';
+    live_index RECORD;
+    staged_index_name TEXT;
+BEGIN
+    FOR live_index IN
+        SELECT
+            live.relname AS index_name,
+            li.indisunique,
+            con.contype,
+            regexp_replace(pg_get_indexdef(li.indexrelid), '^.* USING ', '') AS index_body
+        FROM pg_index li
+        JOIN pg_class live ON live.oid = li.indexrelid
+        LEFT JOIN pg_constraint con ON con.conindid = li.indexrelid AND con.conrelid = li.indrelid
+        WHERE li.indrelid = table_name::regclass
+          AND NOT EXISTS (
+              SELECT 1
+              FROM pg_index si
+              WHERE si.indrelid = staging_name::regclass
+                AND si.indisunique = li.indisunique
+                AND si.indisprimary = li.indisprimary
+                AND regexp_replace(pg_get_indexdef(si.indexrelid), '^.* USING ', '')
+                  = regexp_replace(pg_get_indexdef(li.indexrelid), '^.* USING ', '')
+          )
+    LOOP
+        -- Renamed to the live name by swap_staging_table
+        staged_index_name := left(live_index.index_name, 55) || '_staging';
+        EXECUTE format('CREATE %s INDEX %I ON %I USING %s',
+            CASE WHEN live_index.indisunique THEN 'UNIQUE' ELSE '' END,
+            staged_index_name, staging_name, live_index.index_body);
+
+        IF live_index.contype IN ('p', 'u') THEN
+            EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I %s USING INDEX %I',
+                staging_name, staged_index_name,
+                CASE live_index.contype WHEN 'p' THEN 'PRIMARY KEY' ELSE 'UNIQUE' END,
+                staged_index_name);
+        END IF;
+    END LOOP;
+END;
+$$;
+
+-- Discard a staging table after a failed load
+CREATE OR REPLACE PROCEDURE drop_staging_table(table_name TEXT)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    EXECUTE format('DROP TABLE IF EXISTS %I', table_name || '_staging');
+    RAISE NOTICE 'Staging table for % dropped', table_name;
+END;
+$$;
+
+-- Atomically replace a table with its staging copy, keeping index and sequence names
+CREATE OR REPLACE PROCEDURE swap_staging_table(table_name TEXT)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    staging_name TEXT := table_name || '_staging';
+    index_pair RECORD;
+    owned_sequence RECORD;
+    live_index_names TEXT[] := '{}';
+    staged_index_names TEXT[] := '{}';
+    start_time TIMESTAMP := CLOCK_TIMESTAMP();
+BEGIN
+    -- A bulk-loaded staging table is logged and indexed only now, in one pass each
+    IF (SELECT relpersistence FROM pg_class WHERE oid = staging_name::regclass) = 'u' THEN
+        EXECUTE format('ALTER TABLE %I SET LOGGED', staging_name);
+    END IF;
+    CALL build_staging_indexes(table_name);
+
+    EXECUTE format('ANALYZE %I', staging_name);
+    EXECUTE format('LOCK TABLE %I IN ACCESS EXCLUSIVE MODE', table_name);
+
+    -- Pair each staged index with the live index that has the same definition
+    FOR index_pair IN
+        SELECT live.relname AS live_index, staged.relname AS staged_index
+        FROM pg_index li
+        JOIN pg_class live ON live.oid = li.indexrelid
+        JOIN pg_index si ON si.indrelid = staging_name::regclass
+            AND si.indisunique = li.indisunique
+            AND si.indisprimary = li.indisprimary
+            AND regexp_replace(pg_get_indexdef(si.indexrelid), '^.* USING ', '')
+              = regexp_replace(pg_get_indexdef(li.indexrelid), '^.* USING ', '')
+        JOIN pg_class staged ON staged.oid = si.indexrelid
+        WHERE li.indrelid = table_name::regclass
+    LOOP
+        live_index_names := live_index_names || index_pair.live_index::TEXT;
+        staged_index_names := staged_index_names || index_pair.staged_index::TEXT;
+    END LOOP;
+
+    -- Serial columns share the live table's sequence; hand it over before the drop
+    FOR owned_sequence IN
+        SELECT seq.relname AS sequence_name, att.attname AS column_name
+        FROM pg_depend d
+        JOIN pg_class seq ON seq.oid = d.objid AND seq.relkind = 'S'
+        JOIN pg_attribute att ON att.attrelid = d.refobjid AND att.attnum = d.refobjsubid
+        WHERE d.refobjid = table_name::regclass
+          AND d.deptype = 'a'
+    LOOP
+        EXECUTE format('ALTER SEQUENCE %I OWNED BY %I.%I',
+            owned_sequence.sequence_name, staging_name, owned_sequence.column_name);
+    END LOOP;
+
+    EXECUTE format('DROP TABLE %I', table_name);
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', staging_name, table_name);
+
+    FOR i IN 1 .. COALESCE(array_length(live_index_names, 1), 0) LOOP
+        EXECUTE format('ALTER INDEX %I RENAME TO %I', staged_index_names[i], live_index_names[i]);
+    END LOOP;
+
+    RAISE NOTICE 'Table % replaced by its staging copy. Duration: %',
+        table_name, CLOCK_TIMESTAMP() - start_time;
+END;
+$$;
+
+-- =====================================================
+-- Bulk Rebuild Through a Staging Copy
+-- =====================================================
+-- For a full rebuild in the caller's transaction: begin_bulk_rebuild creates
+-- <table>_staging, an empty copy without the secondary indexes, partitioned
+-- like the table; the caller fills it, and finish_bulk_rebuild builds the
+-- indexes once and swaps it in. The live table stays readable throughout.
+-- The copy is logged: an UNLOGGED one would be rewritten into the WAL by
+-- SET LOGGED at the end, giving back most of what it saved.
+--
+-- A partitioned table (nppes_providers_clean, which views depend on) is not
+-- replaced as a whole: each staging partition is swapped in for the live
+-- partition with the same bounds, so the parent, its views and grants stay.
+-- Primary key and unique constraints are kept on the copy for ON CONFLICT.
+DROP TABLE IF EXISTS deferred_index_builds;
+
+CREATE OR REPLACE PROCEDURE begin_bulk_rebuild(table_name TEXT)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    staging_name TEXT := table_name || '_staging';
+    key_constraint RECORD;
+    live_partition RECORD;
+BEGIN
+    EXECUTE format('DROP TABLE IF EXISTS %I', staging_name);
+    IF (SELECT relkind FROM pg_class WHERE oid = table_name::regclass) <> 'p' THEN
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING ALL EXCLUDING INDEXES)',
+            staging_name, table_name);
+        RAISE NOTICE 'Bulk rebuild of % started', table_name;
+        RETURN;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING ALL EXCLUDING INDEXES) PARTITION BY %s',
+        staging_name, table_name, pg_get_partkeydef(table_name::regclass));
+    FOR key_constraint IN
+        SELECT con.conname, pg_get_constraintdef(con.oid) AS definition
+        FROM pg_constraint con
+        WHERE con.conrelid = table_name::regclass AND con.contype IN ('p', 'u')
+    LOOP
+        EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I %s',
+            staging_name, left(key_constraint.conname, 55) || '_staging', key_constraint.definition);
+    END LOOP;
+    FOR live_partition IN
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) AS bound
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = table_name::regclass
+    LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I %s',
+            left(live_partition.relname, 55) || '_staging', staging_name, live_partition.bound);
+    END LOOP;
+    RAISE NOTICE 'Bulk rebuild of % started', table_name;
+END;
+$$;
+
+CREATE OR REPLACE PROCEDURE finish_bulk_rebuild(table_name TEXT)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    staging_name TEXT := table_name || '_staging';
+    partition_pair RECORD;
+    start_time TIMESTAMP := CLOCK_TIMESTAMP();
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = table_name::regclass) <> 'p' THEN
+        -- Builds the indexes, then replaces the table
+        CALL swap_staging_table(table_name);
+        RAISE NOTICE 'Bulk rebuild of % finished. Duration: %', table_name, CLOCK_TIMESTAMP() - start_time;
+        RETURN;
+    END IF;
+
+    -- Built on the partitioned copy, so every staging partition gets an index
+    -- matching the live one, which ATTACH PARTITION then adopts
+    CALL build_staging_indexes(table_name);
+    EXECUTE format('ANALYZE %I', staging_name);
+
+    -- A CHECK constraint equal to the partition constraint lets ATTACH skip its
+    -- validation scan; adding it scans the staging partition, before any lock
+    -- on the live table is taken
+    FOR partition_pair IN
+        SELECT staged.relname AS staged_name, live.oid AS live_oid
+        FROM pg_inherits li
+        JOIN pg_class live ON live.oid = li.inhrelid
+        JOIN pg_inherits si ON si.inhparent = staging_name::regclass
+        JOIN pg_class staged ON staged.oid = si.inhrelid
+            AND pg_get_expr(staged.relpartbound, staged.oid) = pg_get_expr(live.relpartbound, live.oid)
+        WHERE li.inhparent = table_name::regclass
+    LOOP
+        EXECUTE format('ALTER TABLE %I ADD CONSTRAINT partition_bound_check CHECK (%s)',
+            partition_pair.staged_name, pg_get_partition_constraintdef(partition_pair.live_oid));
+    END LOOP;
+
+    -- Readers wait only for the exchange below, not for the rebuild
+    EXECUTE format('LOCK TABLE %I IN ACCESS EXCLUSIVE MODE', table_name);
+    FOR partition_pair IN
+        SELECT
+            live.relname AS live_name,
+            staged.relname AS staged_name,
+            pg_get_expr(live.relpartbound, live.oid) AS bound
+        FROM pg_inherits li
+        JOIN pg_class live ON live.oid = li.inhrelid
+        JOIN pg_inherits si ON si.inhparent = staging_name::regclass
+        JOIN pg_class staged ON staged.oid = si.inhrelid
+            AND pg_get_expr(staged.relpartbound, staged.oid) = pg_get_expr(live.relpartbound, live.oid)
+        WHERE li.inhparent = table_name::regclass
+    LOOP
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', table_name, partition_pair.live_name);
+        EXECUTE format('DROP TABLE %I', partition_pair.live_name);
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', staging_name, partition_pair.staged_name);
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', partition_pair.staged_name, partition_pair.live_name);
+        EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I %s',
+            table_name, partition_pair.live_name, partition_pair.bound);
+        EXECUTE format('ALTER TABLE %I DROP CONSTRAINT partition_bound_check', partition_pair.live_name);
+    END LOOP;
+    EXECUTE format('DROP TABLE %I', staging_name);
+
+    RAISE NOTICE 'Bulk rebuild of % finished. Duration: %', table_name, CLOCK_TIMESTAMP() - start_time;
+END;
+$$;
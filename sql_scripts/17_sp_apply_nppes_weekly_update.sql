@@ -0,0 +1,119 @@
+-- =====================================================
+-- Weekly Update (Delta) Ingest
+-- =====================================================
+-- NPPES weekly update files are loaded into nppes_providers_delta, then only
+-- the NPIs in that file are merged into the raw and clean tables, and the
+-- county summary (24) is refreshed for the counties those NPIs left or joined.
+-- Deactivation flags (25) of the merged NPIs are kept.
+
+CREATE TABLE IF NOT EXISTS nppes_providers_delta (
+    LIKE nppes_providers INCLUDING DEFAULTS,
+    PRIMARY KEY (npi)
+);
+
+COMMENT ON TABLE nppes_providers_delta IS 'Staging table for one NPPES weekly update file. Same columns as nppes_providers; truncated before each file is loaded.';
+
+CREATE OR REPLACE PROCEDURE apply_nppes_weekly_update()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    delta_count INTEGER;
+    processed_count INTEGER;
+    column_list TEXT;
+    update_list TEXT;
+    start_time TIMESTAMP;
+    touched_counties VARCHAR(5)[];
+    summary_count INTEGER;
+BEGIN
+    start_time := CLOCK_TIMESTAMP();
+    RAISE NOTICE 'Starting NPPES weekly update at %', start_time;
+
+    -- Upsert the raw rows so nppes_providers stays a full, current copy
+    SELECT
+        string_agg(format('%I', attname), ', ' ORDER BY attnum),
+        string_agg(format('%1$I = EXCLUDED.%1$I', attname), ', ' ORDER BY attnum)
+            FILTER (WHERE attname <> 'npi')
+    INTO column_list, update_list
+    FROM pg_attribute
+    WHERE attrelid = 'nppes_providers_delta'::regclass
+      AND attnum > 0
+      AND NOT attisdropped
+      AND attname NOT IN ('created_at', 'updated_at');
+
+    EXECUTE format(
+        'INSERT INTO nppes_providers (%s) SELECT %s FROM nppes_providers_delta
+         ON CONFLICT (npi) DO UPDATE SET %s, updated_at = CURRENT_TIMESTAMP',
+        column_list, column_list, update_list
+    );
+    GET DIAGNOSTICS delta_count = ROW_COUNT;
+
+    -- Replace the provider_taxonomy rows of every NPI in the update file
+    DELETE FROM provider_taxonomy pt
+    USING nppes_providers_delta d
+    WHERE pt.npi = TRIM(d.npi);
+
+    INSERT INTO provider_taxonomy (npi, slot, code, is_primary)
+    SELECT TRIM(d.npi), t.slot, TRIM(t.code), COALESCE(t.switch = 'Y', FALSE)
+    FROM nppes_providers_delta d
+    CROSS JOIN LATERAL (VALUES
+        (1, d.healthcare_provider_taxonomy_code_1, d.healthcare_provider_primary_taxonomy_switch_1),
+        (2, d.healthcare_provider_taxonomy_code_2, d.healthcare_provider_primary_taxonomy_switch_2),
+        (3, d.healthcare_provider_taxonomy_code_3, d.healthcare_provider_primary_taxonomy_switch_3),
+        (4, d.healthcare_provider_taxonomy_code_4, d.healthcare_provider_primary_taxonomy_switch_4),
+        (5, d.healthcare_provider_taxonomy_code_5, d.healthcare_provider_primary_taxonomy_switch_5),
+        (6, d.healthcare_provider_taxonomy_code_6, d.healthcare_provider_primary_taxonomy_switch_6),
+        (7, d.healthcare_provider_taxonomy_code_7, d.healthcare_provider_primary_taxonomy_switch_7),
+        (8, d.healthcare_provider_taxonomy_code_8, d.healthcare_provider_primary_taxonomy_switch_8),
+        (9, d.healthcare_provider_taxonomy_code_9, d.healthcare_provider_primary_taxonomy_switch_9),
+        (10, d.healthcare_provider_taxonomy_code_10, d.healthcare_provider_primary_taxonomy_switch_10),
+        (11, d.healthcare_provider_taxonomy_code_11, d.healthcare_provider_primary_taxonomy_switch_11),
+        (12, d.healthcare_provider_taxonomy_code_12, d.healthcare_provider_primary_taxonomy_switch_12),
+        (13, d.healthcare_provider_taxonomy_code_13, d.healthcare_provider_primary_taxonomy_switch_13),
+        (14, d.healthcare_provider_taxonomy_code_14, d.healthcare_provider_primary_taxonomy_switch_14),
+        (15, d.healthcare_provider_taxonomy_code_15, d.healthcare_provider_primary_taxonomy_switch_15)
+    ) AS t(slot, code, switch)
+    WHERE TRIM(t.code) <> '';
+
+    -- Counties the updated NPIs are counted in before the upsert...
+    SELECT array_agg(DISTINCT c.county_fips)
+    INTO touched_counties
+    FROM nppes_providers_clean c
+    JOIN nppes_providers_delta d ON c.npi = TRIM(d.npi)
+    WHERE c.county_fips IS NOT NULL;
+
+    -- Re-clean, enrich and score only the NPIs in the update file
+    CALL upsert_clean_nppes_providers('nppes_providers_delta', processed_count);
+
+    -- New rows are inserted as active; re-flag any that are on the
+    -- deactivated NPI list (25)
+    UPDATE nppes_providers_clean c
+    SET is_active = FALSE,
+        deactivated_on = dn.deactivated_on
+    FROM nppes_providers_delta d
+    JOIN npi_deactivation dn ON dn.npi = TRIM(d.npi)
+    WHERE c.npi = dn.npi
+      AND c.is_active;
+
+    -- ...and after it
+    SELECT array_agg(DISTINCT county_fips)
+    INTO touched_counties
+    FROM (
+        SELECT unnest(touched_counties) AS county_fips
+        UNION
+        SELECT c.county_fips
+        FROM nppes_providers_clean c
+        JOIN nppes_providers_delta d ON c.npi = TRIM(d.npi)
+        WHERE c.county_fips IS NOT NULL
+    ) counties;
+
+    IF touched_counties IS NOT NULL THEN
+        CALL refresh_county_provider_summary(touched_counties, summary_count);
+    END IF;
+
+    RAISE NOTICE 'NPPES weekly update completed at %. Raw rows merged: %. Clean rows upserted: %. Duration: %',
+        CLOCK_TIMESTAMP(),
+        delta_count,
+        processed_count,
+        CLOCK_TIMESTAMP() - start_time;
+END;
+$$;
@@ -0,0 +1,17 @@
+-- Load Manifest
+-- One row per loaded table recording which source version it was loaded from,
+-- so unchanged source blobs can be skipped on the next pipeline run
+CREATE TABLE IF NOT EXISTS load_manifest (
+    target_table VARCHAR(100) PRIMARY KEY,          -- Table the source is loaded into
+    source_name VARCHAR(500) NOT NULL,              -- Blob name, API source name or build parameters
+    source_etag VARCHAR(200),                       -- Blob ETag or content hash at load time
+    source_last_modified TIMESTAMPTZ,               -- Blob last-modified time at load time
+    row_count BIGINT,                               -- Rows loaded from the source
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP   -- When the load completed
+);
+
+COMMENT ON TABLE load_manifest IS 'Source version of each loaded table. A load is skipped when the source ETag matches; the row is removed while a reload is in progress.';
+
+-- Census loads were once recorded under the API URL, which carries the API key
+UPDATE load_manifest SET source_name = 'census_acs5_county_population'
+WHERE target_table = 'census_county_population';
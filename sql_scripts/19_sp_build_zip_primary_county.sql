@@ -0,0 +1,72 @@
+-- ZIP -> Primary County Lookup
+-- One row per ZIP with the county a provider in that ZIP is assigned to.
+-- Built once whenever the crosswalk or census tables reload, so the cleaning
+-- procedure joins 1:1 instead of ranking every provider's county fan-out.
+CREATE TABLE IF NOT EXISTS zip_primary_county (
+    zip VARCHAR(7) PRIMARY KEY,
+    county_fips VARCHAR(7),
+    county_name VARCHAR(128),
+    state_name VARCHAR(50),
+    zip_county_ratio DECIMAL(15,10),                -- Share of the ZIP's addresses in this county
+    county_population INTEGER,
+    assignment_strategy VARCHAR(20) NOT NULL,       -- Rule used to pick the county (see below)
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Rebuild the lookup. Strategies for ZIPs that span multiple counties:
+--   'population' - county with the larger population (per README Note 2), then largest tot_ratio
+--   'ratio'      - county holding the largest share of the ZIP's addresses (tot_ratio)
+--   'residential'- county holding the largest share of residential addresses (res_ratio)
+CREATE OR REPLACE PROCEDURE build_zip_primary_county(
+    strategy TEXT DEFAULT 'population',
+    INOUT processed_count INTEGER DEFAULT NULL
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    order_clause TEXT;
+    start_time TIMESTAMP := CLOCK_TIMESTAMP();
+BEGIN
+    order_clause := CASE strategy
+        WHEN 'population' THEN 'ccp.population DESC NULLS LAST, zc.tot_ratio DESC NULLS LAST'
+        WHEN 'ratio' THEN 'zc.tot_ratio DESC NULLS LAST, ccp.population DESC NULLS LAST'
+        WHEN 'residential' THEN 'zc.res_ratio DESC NULLS LAST, zc.tot_ratio DESC NULLS LAST'
+    END;
+
+    IF order_clause IS NULL THEN
+        RAISE EXCEPTION 'Unknown county assignment strategy: %', strategy;
+    END IF;
+
+    TRUNCATE TABLE zip_primary_county;
+
+    EXECUTE format($sql$
+        INSERT INTO zip_primary_county (
+            zip, county_fips, county_name, state_name,
+            zip_county_ratio, county_population, assignment_strategy
+        )
+        SELECT DISTINCT ON (zc.zip)
+            zc.zip,
+            zc.county,
+            sfc.countyname_fips,
+            sfc.state_name,
+            zc.tot_ratio,
+            ccp.population,
+            %L
+        FROM zip_county zc
+        LEFT JOIN ssa_fips_state_county sfc ON zc.county = sfc.fipscounty
+        LEFT JOIN census_county_population ccp ON (
+            LEFT(sfc.fipscounty, 2) = ccp.state_fips AND
+            RIGHT(sfc.fipscounty, 3) = ccp.county_fips
+        )
+        WHERE zc.zip IS NOT NULL
+        ORDER BY zc.zip, %s, zc.county
+    $sql$, strategy, order_clause);
+
+    GET DIAGNOSTICS processed_count = ROW_COUNT;
+
+    ANALYZE zip_primary_county;
+
+    RAISE NOTICE 'Built zip_primary_county with % ZIPs using % strategy. Duration: %',
+        processed_count, strategy, CLOCK_TIMESTAMP() - start_time;
+END;
+$$;
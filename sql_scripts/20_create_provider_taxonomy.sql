@@ -0,0 +1,16 @@
+-- Provider Taxonomy (Normalized)
+-- One row per non-empty healthcare_provider_taxonomy_code_N slot of each provider,
+-- filled in bulk by the loader alongside nppes_providers so secondary-taxonomy
+-- questions are index lookups instead of 15-way OR scans over the wide table
+CREATE TABLE IF NOT EXISTS provider_taxonomy (
+    npi VARCHAR(10) NOT NULL,                       -- Provider NPI (trimmed, joins nppes_providers_clean)
+    slot SMALLINT NOT NULL,                         -- Source column pair, 1-15
+    code VARCHAR(20) NOT NULL,                      -- Healthcare provider taxonomy code
+    is_primary BOOLEAN NOT NULL DEFAULT FALSE,      -- Primary taxonomy switch was 'Y'
+    PRIMARY KEY (npi, slot)                         -- Also serves lookups by NPI
+);
+
+-- varchar_pattern_ops also serves prefix searches such as code LIKE '207Q%'
+CREATE INDEX IF NOT EXISTS idx_provider_taxonomy_code ON provider_taxonomy (code varchar_pattern_ops, npi);
+
+COMMENT ON TABLE provider_taxonomy IS 'Unpivoted taxonomy code/switch pairs of nppes_providers. Rebuilt by each full load; weekly updates replace the rows of the NPIs they contain.';
@@ -0,0 +1,26 @@
+-- =====================================================
+-- Migration: Hash-Partitioned nppes_providers_clean
+-- =====================================================
+-- For databases created before 07 partitioned the clean table. The clean
+-- table is derived from nppes_providers, so it is dropped and recreated
+-- rather than copied; rerun the cleaning afterwards.
+--
+--   psql -d your_database -f 21_migrate_nppes_providers_clean_partitions.sql
+--   psql -d your_database -c "CALL clean_and_populate_nppes_data();"
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_class
+        WHERE oid = to_regclass('nppes_providers_clean') AND relkind = 'r'
+    ) THEN
+        DROP VIEW IF EXISTS nppes_export_view;
+        DROP VIEW IF EXISTS nppes_final_export;
+        DROP TABLE nppes_providers_clean;
+        RAISE NOTICE 'Dropped unpartitioned nppes_providers_clean';
+    END IF;
+END;
+$$;
+
+\ir 07_create_nppes_providers_clean.sql
+\ir 09_create_nppes_final_report_view.sql
+\ir 09_create_export_view.sql
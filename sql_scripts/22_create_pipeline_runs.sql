@@ -0,0 +1,32 @@
+-- Pipeline Runs and Checkpoints
+-- Each NPPES_Data_Cleaning invocation runs under a run id. Stages and load
+-- chunks record a checkpoint when they commit, so re-invoking with the same
+-- run id resumes after the last committed chunk instead of starting over
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    run_id VARCHAR(64) PRIMARY KEY,                 -- Caller-supplied or generated run id
+    status VARCHAR(20) NOT NULL,                    -- running, completed or failed
+    request_body JSONB,                             -- Request body of the latest attempt
+    attempts INTEGER NOT NULL DEFAULT 1,            -- Invocations under this run id
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- First invocation
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- Latest status change
+    finished_at TIMESTAMP,                          -- When the run completed or failed
+    error_message TEXT                              -- Error of the latest failed attempt
+);
+
+CREATE TABLE IF NOT EXISTS pipeline_checkpoints (
+    run_id VARCHAR(64) NOT NULL REFERENCES pipeline_runs (run_id) ON DELETE CASCADE,
+    stage_name VARCHAR(100) NOT NULL,               -- Pipeline stage (target table for loads)
+    chunk_key VARCHAR(100) NOT NULL DEFAULT '',     -- '' once the whole stage is done, else the chunk
+    source_name VARCHAR(500),                       -- Blob the chunk was read from
+    source_etag VARCHAR(200),                       -- ETag of that blob; a changed blob restarts the load
+    row_group INTEGER,                              -- Parquet row group of the chunk
+    row_offset BIGINT,                              -- First source row of the chunk
+    rows_committed BIGINT,                          -- Rows committed with the chunk
+    committed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (run_id, stage_name, chunk_key)
+);
+
+-- Existing databases
+ALTER TABLE pipeline_checkpoints ADD COLUMN IF NOT EXISTS source_etag VARCHAR(200);
+
+COMMENT ON TABLE pipeline_checkpoints IS 'Committed stages and load chunks of each pipeline run. Chunk checkpoints are written in the same transaction as the chunk data.';
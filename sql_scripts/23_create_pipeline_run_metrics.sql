@@ -0,0 +1,24 @@
+-- Pipeline Run Metrics
+-- One row per stage of each pipeline run attempt: wall time, row and byte
+-- counters, DB round trips, memory high-water mark and the stored procedure
+-- notices (with their reported durations) raised while the stage ran
+CREATE TABLE IF NOT EXISTS pipeline_run_metrics (
+    run_id VARCHAR(64) NOT NULL,                    -- pipeline_runs.run_id
+    attempt INTEGER NOT NULL DEFAULT 1,             -- pipeline_runs.attempts when recorded
+    stage_name VARCHAR(100) NOT NULL,               -- Pipeline stage
+    status VARCHAR(20) NOT NULL,                    -- completed or failed
+    started_at TIMESTAMPTZ,                         -- Stage start
+    wall_seconds DOUBLE PRECISION,                  -- Stage wall time
+    rows_copied BIGINT,                             -- Rows sent to Postgres with COPY
+    copy_bytes BIGINT,                              -- COPY payload bytes
+    blob_bytes_read BIGINT,                         -- Bytes downloaded from blob storage
+    blob_bytes_written BIGINT,                      -- Bytes uploaded to blob storage
+    db_round_trips INTEGER,                         -- Statements and COPYs sent to Postgres
+    peak_rss_mb DOUBLE PRECISION,                   -- Highest RSS sampled while the stage ran
+    counters JSONB,                                 -- Every counter, including the ones above
+    db_notices JSONB,                               -- RAISE NOTICE messages and their durations
+    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (run_id, attempt, stage_name)
+);
+
+COMMENT ON TABLE pipeline_run_metrics IS 'Per-stage timings and counters of each pipeline run attempt; see pipeline_runs.';
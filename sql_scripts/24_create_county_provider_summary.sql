@@ -0,0 +1,71 @@
+-- =====================================================
+-- County Provider Summary
+-- =====================================================
+-- Active providers per county by entity type and taxonomy grouping, with the county
+-- population and a per-100k rate, maintained from nppes_providers_clean so
+-- dashboards read a few thousand rows instead of grouping the whole table.
+-- Refreshed in full after a cleaning run and per touched county after a
+-- weekly update (see 17).
+CREATE TABLE IF NOT EXISTS county_provider_summary (
+    county_fips VARCHAR(5) NOT NULL,                -- 5-digit state + county FIPS
+    county_name VARCHAR(100),
+    state_name VARCHAR(50),
+    entity_type VARCHAR(20) NOT NULL,               -- Individual or Organization
+    taxonomy_grouping VARCHAR(100) NOT NULL,        -- 'Unknown' when the taxonomy is not in NUCC
+    provider_count INTEGER NOT NULL,
+    county_population INTEGER,                      -- census_county_population
+    providers_per_100k NUMERIC(12,2),               -- NULL without a population
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (county_fips, entity_type, taxonomy_grouping)
+);
+
+CREATE INDEX IF NOT EXISTS idx_county_provider_summary_state ON county_provider_summary (state_name);
+
+-- Recompute the rows of the given counties, or of every county when
+-- county_list is NULL
+CREATE OR REPLACE PROCEDURE refresh_county_provider_summary(
+    county_list VARCHAR(5)[] DEFAULT NULL,
+    INOUT processed_count INTEGER DEFAULT NULL
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time TIMESTAMP := CLOCK_TIMESTAMP();
+BEGIN
+    IF county_list IS NULL THEN
+        TRUNCATE TABLE county_provider_summary;
+    ELSE
+        DELETE FROM county_provider_summary WHERE county_fips = ANY(county_list);
+    END IF;
+
+    INSERT INTO county_provider_summary (
+        county_fips, county_name, state_name, entity_type, taxonomy_grouping,
+        provider_count, county_population, providers_per_100k
+    )
+    SELECT
+        c.county_fips,
+        MAX(c.county_name),
+        MAX(c.state_name),
+        c.entity_type,
+        COALESCE(c.taxonomy_grouping, 'Unknown'),
+        COUNT(*),
+        ccp.population,
+        ROUND(COUNT(*) * 100000.0 / NULLIF(ccp.population, 0), 2)
+    FROM nppes_providers_clean c
+    LEFT JOIN census_county_population ccp ON (
+        ccp.state_fips = LEFT(c.county_fips, 2) AND
+        ccp.county_fips = RIGHT(c.county_fips, 3)
+    )
+    WHERE c.county_fips IS NOT NULL
+      AND c.is_active
+      AND (county_list IS NULL OR c.county_fips = ANY(county_list))
+    GROUP BY c.county_fips, c.entity_type, COALESCE(c.taxonomy_grouping, 'Unknown'), ccp.population;
+
+    GET DIAGNOSTICS processed_count = ROW_COUNT;
+
+    RAISE NOTICE 'County provider summary refreshed for % counties. Rows: %. Duration: %',
+        COALESCE(array_length(county_list, 1)::TEXT, 'all'),
+        processed_count,
+        CLOCK_TIMESTAMP() - start_time;
+END;
+$$;
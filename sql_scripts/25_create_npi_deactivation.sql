@@ -0,0 +1,81 @@
+-- =====================================================
+-- Deactivated NPIs
+-- =====================================================
+-- CMS publishes the list of deactivated NPIs with their deactivation dates.
+-- The list is loaded into npi_deactivation and merged into
+-- nppes_providers_clean as is_active/deactivated_on flags, so deactivated
+-- providers keep their records and active-only reads use a partial index.
+CREATE TABLE IF NOT EXISTS npi_deactivation (
+    npi VARCHAR(10) PRIMARY KEY,
+    deactivated_on DATE,                            -- NPPES Deactivation Date
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE npi_deactivation IS 'CMS deactivated NPI report. Replaced on each load; apply_npi_deactivations() merges it into nppes_providers_clean.';
+
+-- Existing databases: the flag columns and indexes are also in 07
+ALTER TABLE nppes_providers_clean ADD COLUMN IF NOT EXISTS is_active BOOLEAN NOT NULL DEFAULT TRUE;
+ALTER TABLE nppes_providers_clean ADD COLUMN IF NOT EXISTS deactivated_on DATE;
+CREATE INDEX IF NOT EXISTS idx_nppes_clean_active_npi ON nppes_providers_clean (npi) WHERE is_active;
+CREATE INDEX IF NOT EXISTS idx_nppes_clean_inactive_npi ON nppes_providers_clean (npi) WHERE NOT is_active;
+
+-- Flag the listed NPIs as deactivated with one join update and clear the
+-- flags of NPIs that are no longer listed (reactivated). Only rows whose
+-- flags change are written. Unless refresh_summary is FALSE, the county
+-- summary (24) is refreshed for the counties of the changed rows.
+CREATE OR REPLACE PROCEDURE apply_npi_deactivations(
+    INOUT processed_count INTEGER DEFAULT NULL,
+    refresh_summary BOOLEAN DEFAULT TRUE
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time TIMESTAMP := CLOCK_TIMESTAMP();
+    deactivated_count INTEGER;
+    reactivated_count INTEGER;
+    touched_counties VARCHAR(5)[];
+    summary_count INTEGER;
+BEGIN
+    WITH deactivated AS (
+        UPDATE nppes_providers_clean c
+        SET is_active = FALSE,
+            deactivated_on = d.deactivated_on,
+            updated_at = CURRENT_TIMESTAMP
+        FROM npi_deactivation d
+        WHERE c.npi = d.npi
+          AND (c.is_active OR c.deactivated_on IS DISTINCT FROM d.deactivated_on)
+        RETURNING c.county_fips
+    ),
+    reactivated AS (
+        UPDATE nppes_providers_clean c
+        SET is_active = TRUE,
+            deactivated_on = NULL,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE NOT c.is_active
+          AND NOT EXISTS (SELECT 1 FROM npi_deactivation d WHERE d.npi = c.npi)
+        RETURNING c.county_fips
+    )
+    SELECT
+        (SELECT COUNT(*) FROM deactivated),
+        (SELECT COUNT(*) FROM reactivated),
+        (SELECT array_agg(DISTINCT county_fips)
+         FROM (
+             SELECT county_fips FROM deactivated
+             UNION ALL
+             SELECT county_fips FROM reactivated
+         ) changed
+         WHERE county_fips IS NOT NULL)
+    INTO deactivated_count, reactivated_count, touched_counties;
+
+    processed_count := deactivated_count + reactivated_count;
+
+    IF refresh_summary AND touched_counties IS NOT NULL THEN
+        CALL refresh_county_provider_summary(touched_counties, summary_count);
+    END IF;
+
+    RAISE NOTICE 'NPI deactivations applied. Deactivated: %. Reactivated: %. Duration: %',
+        deactivated_count,
+        reactivated_count,
+        CLOCK_TIMESTAMP() - start_time;
+END;
+$$;
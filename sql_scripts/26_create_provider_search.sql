@@ -0,0 +1,30 @@
+-- =====================================================
+-- Provider Name Search
+-- =====================================================
+-- search_text holds the lower-cased provider name, other organization name
+-- and taxonomy description of each clean provider, maintained by Postgres
+-- as a generated column. A pg_trgm GIN index on it serves the partial and
+-- misspelled name lookups of the provider_search endpoint:
+--
+--   SELECT npi, entity_name, word_similarity('smith john cardio', search_text) AS score
+--   FROM nppes_providers_clean
+--   WHERE 'smith john cardio' <% search_text
+--   ORDER BY score DESC
+--   LIMIT 25;
+--
+-- Adding the column rewrites an existing clean table once.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Existing databases: the column and index are also in 07
+ALTER TABLE nppes_providers_clean ADD COLUMN IF NOT EXISTS search_text TEXT
+    GENERATED ALWAYS AS (
+        lower(
+            COALESCE(entity_name, '') || ' ' ||
+            COALESCE(provider_other_organization_name, '') || ' ' ||
+            COALESCE(taxonomy_classification, '') || ' ' ||
+            COALESCE(taxonomy_specialization, '')
+        )
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_nppes_clean_search_trgm
+    ON nppes_providers_clean USING GIN (search_text gin_trgm_ops);
@@ -0,0 +1,24 @@
+-- Load Rejects
+-- Rows the loaders' validation rules turned away, with the first rule each
+-- row failed, instead of being filtered out silently. Written with binary
+-- COPY in the same transaction as the accepted rows of the batch; reloading
+-- a source replaces its earlier rejects.
+CREATE TABLE IF NOT EXISTS load_rejects (
+    reject_id BIGSERIAL PRIMARY KEY,
+    target_table VARCHAR(100) NOT NULL,             -- Table the row was loaded for
+    source_name VARCHAR(500),                       -- Blob or API the row was read from
+    run_id VARCHAR(64),                             -- Pipeline run, if any
+    reason_code VARCHAR(50) NOT NULL,               -- Validation rule, e.g. npi_not_10_digits
+    record_key VARCHAR(100),                        -- NPI, ZIP, code or FIPS of the row
+    record TEXT,                                    -- The rejected row as JSON (cast to JSONB to query)
+    rejected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_load_rejects_source ON load_rejects (target_table, source_name);
+CREATE INDEX IF NOT EXISTS idx_load_rejects_reason ON load_rejects (reason_code);
+
+COMMENT ON TABLE load_rejects IS 'Rows rejected by load validation rules, with their reason codes. Per-rule counts are also recorded as rejected:<reason_code> counters in pipeline_run_metrics.';
+
+-- Census rejects were once recorded under the API URL, which carries the API key
+UPDATE load_rejects SET source_name = 'census_acs5_county_population'
+WHERE target_table = 'census_county_population';
@@ -0,0 +1,20 @@
+-- =====================================================
+-- Provider Filter Indexes
+-- =====================================================
+-- The providers endpoint pages through nppes_providers_clean with
+--
+--   WHERE <filter> = %s AND npi > %s ORDER BY npi LIMIT n
+--
+-- A (filter column, npi) index answers each page with one range scan in NPI
+-- order, where a single-column index has to fetch and sort every match of the
+-- filter first. (state_name, npi) is created by 07.
+--
+-- Existing databases: the indexes are also in 07
+CREATE INDEX IF NOT EXISTS idx_nppes_clean_taxonomy_grouping_npi
+    ON nppes_providers_clean (taxonomy_grouping, npi);
+CREATE INDEX IF NOT EXISTS idx_nppes_clean_provider_state_npi
+    ON nppes_providers_clean (provider_state, npi);
+-- Replaces the single-column county index
+CREATE INDEX IF NOT EXISTS idx_nppes_clean_county_npi
+    ON nppes_providers_clean (county_fips, npi);
+DROP INDEX IF EXISTS idx_nppes_clean_county;
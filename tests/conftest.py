@@ -0,0 +1,51 @@
+import collections
+import struct
+import pytest
+
+
+def _decode_binary_copy(payload):
+    """Split a binary COPY payload into rows of raw field bytes (None for NULL)."""
+    assert payload[:11] == b"PGCOPY\n\xff\r\n\x00"
+    position = 19
+    rows = []
+    while True:
+        (field_count,) = struct.unpack_from(">h", payload, position)
+        position += 2
+        if field_count == -1:
+            assert position == len(payload)
+            return rows
+        row = []
+        for _ in range(field_count):
+            (length,) = struct.unpack_from(">i", payload, position)
+            position += 4
+            if length == -1:
+                row.append(None)
+            else:
+                row.append(payload[position : position + length])
+                position += length
+        rows.append(tuple(row))
+
+
+@pytest.fixture
+def decode_binary_copy():
+    return _decode_binary_copy
+
+
+@pytest.fixture
+def text_column_types(mocker):
+    # Every target column is VARCHAR unless a test says otherwise
+    column_types = collections.defaultdict(lambda: "varchar")
+    mocker.patch("function_app.get_table_column_types", return_value=column_types)
+    return column_types
+
+
+@pytest.fixture
+def query_cursor(mocker):
+    # Cursor of the connection the query endpoints borrow from their pool
+    cursor = mocker.MagicMock()
+    conn = mocker.MagicMock()
+    conn.cursor.return_value.__enter__.return_value = cursor
+    pool = mocker.MagicMock()
+    pool.getconn.return_value = conn
+    mocker.patch("function_app.get_query_connection_pool", return_value=pool)
+    return cursor
@@ -0,0 +1,56 @@
+import json
+
+import azure.functions as func
+import polars as pl
+from function_app import apply_nppes_weekly_update, NPPES_Weekly_Update, NPPES_RELEVANT_COLUMNS
+
+
+def test_apply_nppes_weekly_update_merges_delta(mocker):
+    lazy_df = pl.DataFrame({"npi": ["1234567890"]}).lazy()
+    extract_csv = mocker.patch("function_app.extract_csv_data_from_blob", return_value=lazy_df)
+    load = mocker.patch("function_app.load_chunked_blob_data_to_postgres", return_value=1)
+    mock_cursor = mocker.MagicMock()
+    mock_conn = mocker.MagicMock()
+    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+    mocker.patch("function_app.get_psycopg2_connection", return_value=mock_conn)
+
+    apply_nppes_weekly_update("npidata_pfile_weekly.csv")
+
+    args, _ = extract_csv.call_args
+    assert args[1] == NPPES_RELEVANT_COLUMNS
+    assert all(dtype == pl.Utf8 for dtype in args[3].values())
+    assert load.call_args.kwargs["target_table"] == "nppes_providers_delta"
+    mock_cursor.execute.assert_called_once_with("CALL apply_nppes_weekly_update()")
+    assert mock_conn.commit.called
+    assert mock_conn.close.called
+
+
+def test_apply_nppes_weekly_update_skips_empty_file(mocker):
+    lazy_df = pl.DataFrame({"npi": []}, schema={"npi": pl.Utf8}).lazy()
+    mocker.patch("function_app.extract_parquet_data_from_blob", return_value=lazy_df)
+    mocker.patch("function_app.load_chunked_blob_data_to_postgres", return_value=0)
+    get_connection = mocker.patch("function_app.get_psycopg2_connection")
+
+    apply_nppes_weekly_update("npidata_pfile_weekly.parquet")
+
+    assert not get_connection.called
+
+
+def test_nppes_weekly_update_records_pipeline_run(mocker):
+    mocker.patch("function_app.apply_nppes_weekly_update")
+    start_run = mocker.patch("function_app.start_pipeline_run", return_value=1)
+    finish_run = mocker.patch("function_app.finish_pipeline_run")
+    mocker.patch("function_app.record_pipeline_run_metrics")
+    invalidate = mocker.patch("function_app.invalidate_query_caches")
+    body = {"update_files": ["npidata_pfile_weekly.csv"]}
+
+    response = NPPES_Weekly_Update(
+        func.HttpRequest(method="POST", url="/api/nppes_weekly_update", body=json.dumps(body).encode())
+    )
+
+    payload = json.loads(response.get_body())
+    assert response.status_code == 200
+    assert payload["run_id"].startswith("weekly-")
+    start_run.assert_called_once_with(payload["run_id"], body)
+    finish_run.assert_called_once_with(payload["run_id"], "completed")
+    assert invalidate.called
@@ -0,0 +1,55 @@
+import pytest
+from function_app import build_zip_primary_county_stage
+
+
+@pytest.fixture
+def pg_cursor(mocker):
+    mock_conn = mocker.patch("function_app.get_psycopg2_connection").return_value
+    cursor = mock_conn.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = (41000,)
+    return cursor
+
+
+@pytest.fixture
+def manifest(mocker):
+    fingerprint = mocker.patch(
+        "function_app.get_source_tables_fingerprint", return_value="abc123"
+    )
+    unchanged = mocker.patch("function_app.is_source_unchanged", return_value=False)
+    invalidate = mocker.patch("function_app.invalidate_source_load")
+    record = mocker.patch("function_app.record_source_load")
+    return fingerprint, unchanged, invalidate, record
+
+
+def test_builds_with_requested_strategy(pg_cursor, manifest):
+    _, _, invalidate, record = manifest
+
+    build_zip_primary_county_stage({"county_assignment_strategy": "ratio"})
+
+    pg_cursor.execute.assert_called_once_with(
+        "CALL build_zip_primary_county(%s, NULL)", ("ratio",)
+    )
+    invalidate.assert_called_once_with("zip_primary_county")
+    record.assert_called_once_with("zip_primary_county", "ratio", "abc123", None, 41000)
+
+
+def test_unchanged_sources_skip_rebuild(pg_cursor, manifest):
+    _, unchanged, _, record = manifest
+    unchanged.return_value = True
+
+    build_zip_primary_county_stage({})
+
+    unchanged.assert_called_once_with("zip_primary_county", "population", "abc123")
+    assert not pg_cursor.execute.called
+    assert not record.called
+
+
+def test_unloaded_source_always_rebuilds_without_recording(pg_cursor, manifest):
+    fingerprint, unchanged, _, record = manifest
+    fingerprint.return_value = None
+    unchanged.return_value = True
+
+    build_zip_primary_county_stage({})
+
+    assert pg_cursor.execute.called
+    assert not record.called
@@ -0,0 +1,107 @@
+import threading
+import pytest
+from function_app import clean_nppes_data_partitioned
+
+NPI_RANGES = [
+    (None, "1250000000"),
+    ("1250000000", "1500000000"),
+    ("1500000000", "1750000000"),
+    ("1750000000", None),
+]
+
+
+@pytest.fixture
+def range_connections(mocker):
+    lock = threading.Lock()
+    state = {"calls": [], "targets": set(), "statements": [], "failures": {}}
+
+    def new_connection():
+        cursor = mocker.MagicMock()
+        conn = mocker.MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cursor
+
+        def execute(sql, params=None):
+            with lock:
+                state["statements"].append(sql.split("(")[0])
+                if not sql.startswith("CALL clean_nppes_npi_range"):
+                    return
+                npi_range, target_table = params[:2], params[2]
+                state["calls"].append(npi_range)
+                state["targets"].add(target_table)
+                if state["failures"].get(npi_range, 0) > 0:
+                    state["failures"][npi_range] -= 1
+                    raise Exception(f"deadlock in NPI range {npi_range}")
+            cursor.fetchone.return_value = (100,)
+
+        cursor.execute.side_effect = execute
+        return conn
+
+    mocker.patch("function_app.get_psycopg2_connection", side_effect=new_connection)
+    mocker.patch("function_app.get_clean_npi_ranges", return_value=NPI_RANGES)
+    mocker.patch("function_app.time.sleep")
+    return state
+
+
+def test_each_npi_range_cleaned_once(range_connections):
+    assert clean_nppes_data_partitioned(max_workers=2) == 400
+    assert sorted(range_connections["calls"], key=str) == sorted(NPI_RANGES, key=str)
+    # One truncate up front and one ANALYZE once every range is in
+    assert range_connections["statements"][0] == "TRUNCATE TABLE nppes_providers_clean"
+    assert range_connections["statements"][-1] == "ANALYZE nppes_providers_clean"
+    assert range_connections["targets"] == {"nppes_providers_clean"}
+
+
+def test_bulk_load_cleans_ranges_into_staging_copy(range_connections):
+    assert clean_nppes_data_partitioned(max_workers=2, bulk_load=True) == 400
+    assert range_connections["targets"] == {"nppes_providers_clean_staging"}
+    # The copy is started before the ranges and swapped in after them
+    assert range_connections["statements"][0] == "CALL begin_bulk_rebuild"
+    assert range_connections["statements"][-1] == "CALL finish_bulk_rebuild"
+    assert "TRUNCATE TABLE nppes_providers_clean" not in range_connections["statements"]
+
+
+def test_failed_npi_range_is_retried_alone(range_connections):
+    range_connections["failures"] = {NPI_RANGES[2]: 1}
+
+    assert clean_nppes_data_partitioned(max_workers=2) == 400
+    assert len(range_connections["calls"]) == 5
+    assert range_connections["calls"].count(NPI_RANGES[2]) == 2
+
+
+def test_persistent_failure_names_npi_range(range_connections):
+    range_connections["failures"] = {NPI_RANGES[1]: 3}
+
+    with pytest.raises(RuntimeError, match=r"NPI ranges \[1\]"):
+        clean_nppes_data_partitioned(max_workers=2)
+    assert range_connections["calls"].count(NPI_RANGES[1]) == 3
+    assert "ANALYZE nppes_providers_clean" not in range_connections["statements"]
+
+
+def test_resumed_run_skips_truncate_and_cleaned_ranges(range_connections, mocker):
+    mocker.patch("function_app.record_checkpoint")
+    mocker.patch(
+        "function_app.get_run_checkpoints",
+        return_value=[
+            ("truncated", None, None, None),
+            ("npi_range:0", None, None, 100),
+            ("npi_range:3", None, None, 100),
+        ],
+    )
+
+    assert clean_nppes_data_partitioned(max_workers=2, run_id="run-1") == 400
+    assert sorted(range_connections["calls"]) == sorted(NPI_RANGES[1:3])
+    assert "TRUNCATE TABLE nppes_providers_clean" not in range_connections["statements"]
+
+
+def test_resumed_bulk_run_skips_finished_swap(range_connections, mocker):
+    mocker.patch(
+        "function_app.get_run_checkpoints",
+        return_value=[
+            ("truncated", None, None, None),
+            *((f"npi_range:{index}", None, None, 100) for index in range(4)),
+            ("swapped", None, None, None),
+        ],
+    )
+
+    assert clean_nppes_data_partitioned(max_workers=2, run_id="run-1", bulk_load=True) == 400
+    assert range_connections["statements"] == []
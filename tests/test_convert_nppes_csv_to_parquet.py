@@ -0,0 +1,76 @@
+import io
+import random
+import polars as pl
+import pyarrow.parquet as pq
+import pytest
+from function_app import NPPES_RELEVANT_COLUMNS, convert_nppes_csv_to_parquet
+
+
+class DummyBlobStream:
+    def __init__(self, data):
+        self.data = data
+
+    def chunks(self):
+        for start in range(0, len(self.data), 4096):
+            yield self.data[start : start + 4096]
+
+
+class DummyBlobClient:
+    def __init__(self, data=None):
+        self.data = data
+        self.staged = {}
+        self.committed = None
+
+    def download_blob(self):
+        return DummyBlobStream(self.data)
+
+    def stage_block(self, block_id, data):
+        self.staged[block_id] = data
+
+    def commit_block_list(self, block_list):
+        self.committed = b"".join(self.staged[block.id] for block in block_list)
+
+
+@pytest.fixture
+def nppes_csv(mocker):
+    # Shuffled NPIs across both leading digits, plus a column outside
+    # NPPES_RELEVANT_COLUMNS that must not be carried over
+    rng = random.Random(7)
+    npis = [f"1{rng.randrange(10**9):09d}" for _ in range(450)] + [
+        f"2{rng.randrange(10**9):09d}" for _ in range(50)
+    ]
+    rng.shuffle(npis)
+    df = pl.DataFrame({column: [""] * len(npis) for column in NPPES_RELEVANT_COLUMNS}).with_columns(
+        pl.Series("NPI", npis),
+        pl.Series("Entity Type Code", ["1"] * len(npis)),
+        pl.Series("Replacement NPI", ["x"] * len(npis)),
+    )
+    blobs = {"npidata_pfile.csv": DummyBlobClient(df.write_csv().encode())}
+
+    def get_blob_client(container, blob):
+        return blobs.setdefault(blob, DummyBlobClient())
+
+    blob_service_client = mocker.MagicMock()
+    blob_service_client.get_blob_client.side_effect = get_blob_client
+    mocker.patch("function_app.get_blob_service_client", return_value=blob_service_client)
+    return blobs, sorted(npis)
+
+
+def test_convert_nppes_csv_to_parquet_sorts_by_npi_in_full_row_groups(nppes_csv, tmp_path, monkeypatch):
+    blobs, sorted_npis = nppes_csv
+    monkeypatch.setenv("SPILL_DIR", str(tmp_path))
+
+    rows = convert_nppes_csv_to_parquet(
+        "npidata_pfile.csv", "npidata_pfile.parquet", row_group_size=200, bucket_count=8, chunk_size=64
+    )
+
+    assert rows == 500
+    parquet_file = pq.ParquetFile(io.BytesIO(blobs["npidata_pfile.parquet"].committed))
+    assert parquet_file.schema_arrow.names == NPPES_RELEVANT_COLUMNS
+    assert [parquet_file.metadata.row_group(i).num_rows for i in range(parquet_file.num_row_groups)] == [200, 200, 100]
+    first_group_npi = parquet_file.metadata.row_group(0).column(0)
+    assert first_group_npi.statistics.min == sorted_npis[0]
+    assert first_group_npi.statistics.max == sorted_npis[199]
+    assert parquet_file.read().column("NPI").to_pylist() == sorted_npis
+    # Spill files are removed with their directory
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,34 @@
+import json
+from decimal import Decimal
+import azure.functions as func
+from function_app import county_provider_summary
+
+
+def _get(**params):
+    return county_provider_summary(
+        func.HttpRequest(method="GET", url="/api/county_provider_summary", params=params, body=b"")
+    )
+
+
+def test_county_summary_filters_the_aggregate(query_cursor):
+    query_cursor.fetchall.return_value = [
+        ("47037", "Davidson", "TENNESSEE", "Individual", "Allopathic & Osteopathic Physicians",
+         4210, 715884, Decimal("588.08")),
+    ]
+
+    response = _get(county_fips="47037", entity_type="provider")
+
+    assert response.status_code == 200
+    sql, params = query_cursor.execute.call_args.args
+    assert "FROM county_provider_summary WHERE county_fips = %s AND entity_type = %s" in sql
+    assert params == ["47037", "Individual"]
+    (row,) = [json.loads(line) for line in response.get_body().decode().splitlines()]
+    assert row["provider_count"] == 4210
+    assert row["providers_per_100k"] == "588.08"
+
+
+def test_county_summary_rejects_unknown_entity_type(query_cursor):
+    response = _get(entity_type="hospital")
+
+    assert response.status_code == 400
+    assert not query_cursor.execute.called
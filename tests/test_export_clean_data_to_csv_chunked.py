@@ -0,0 +1,89 @@
+import base64
+import pytest
+from function_app import BlobBlockWriter, export_clean_data_to_csv_chunked
+
+
+class DummyBlockBlobClient:
+    def __init__(self):
+        self.staged = {}
+        self.committed = None
+
+    def stage_block(self, block_id, data):
+        self.staged[block_id] = data
+
+    def commit_block_list(self, block_list):
+        self.committed = b"".join(self.staged[block.id] for block in block_list)
+
+
+def test_blob_block_writer_stages_bounded_blocks():
+    blob_client = DummyBlockBlobClient()
+    writer = BlobBlockWriter(blob_client, block_size=4)
+
+    writer.write(b"abcdefghij")
+    writer.write("kl")
+
+    assert blob_client.committed is None
+    assert all(len(data) == 4 for data in blob_client.staged.values())
+    assert writer.commit() == 12
+    assert blob_client.committed == b"abcdefghijkl"
+    assert base64.b64decode(list(blob_client.staged)[0]) == b"00000000"
+
+
+@pytest.fixture
+def export_mocks(mocker):
+    blob_client = DummyBlockBlobClient()
+    blob_service_client = mocker.MagicMock()
+    blob_service_client.get_blob_client.return_value = blob_client
+    mocker.patch("function_app.get_blob_service_client", return_value=blob_service_client)
+
+    mock_cursor = mocker.MagicMock()
+    mock_conn = mocker.MagicMock()
+    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+    mocker.patch("function_app.get_psycopg2_connection", return_value=mock_conn)
+    mock_cursor.mogrify.side_effect = lambda query, params: (
+        query % tuple(f"'{p}'" for p in params)
+    ).encode()
+    return blob_client, mock_conn, mock_cursor
+
+
+def test_export_clean_data_to_csv_chunked_keyset_pages(export_mocks):
+    blob_client, mock_conn, mock_cursor = export_mocks
+    mock_cursor.fetchone.side_effect = [("1000000002", 2), ("1000000003", 1)]
+    pages = iter([b'"1000000001","Individual"\n"1000000002","Organization"\n', b'"1000000003",""\n'])
+    mock_cursor.copy_expert.side_effect = lambda sql, file: file.write(next(pages))
+
+    assert export_clean_data_to_csv_chunked(chunk_size=2, output_filename="out.csv") is True
+
+    page_queries = [call.args[1] for call in mock_cursor.execute.call_args_list]
+    assert page_queries == [("", 2, False), ("1000000002", 2, False)]
+    copy_sql = mock_cursor.copy_expert.call_args_list[1].args[0]
+    assert "WHERE npi > '1000000002' AND npi <= '1000000003'" in copy_sql
+    assert "LPAD(provider_postal_code_clean, 5, '0')" in copy_sql
+    assert "FORCE_QUOTE *" in copy_sql
+
+    lines = blob_client.committed.decode().splitlines()
+    assert lines[0].startswith('"npi","entity_type","entity_name"')
+    assert lines[1:] == ['"1000000001","Individual"', '"1000000002","Organization"', '"1000000003",""']
+    assert mock_conn.close.called
+
+
+def test_export_clean_data_to_csv_chunked_failure_leaves_blob_uncommitted(export_mocks):
+    blob_client, mock_conn, mock_cursor = export_mocks
+    mock_cursor.fetchone.return_value = ("1000000002", 2)
+    mock_cursor.copy_expert.side_effect = Exception("DB error")
+
+    assert export_clean_data_to_csv_chunked(chunk_size=2, output_filename="out.csv") is False
+    assert blob_client.committed is None
+    assert mock_conn.close.called
+
+
+def test_export_clean_data_to_csv_chunked_active_only(export_mocks):
+    blob_client, mock_conn, mock_cursor = export_mocks
+    mock_cursor.fetchone.side_effect = [("1000000001", 1)]
+    mock_cursor.copy_expert.side_effect = lambda sql, file: file.write(b'"1000000001"\n')
+
+    assert export_clean_data_to_csv_chunked(chunk_size=2, output_filename="out.csv", active_only=True) is True
+
+    assert mock_cursor.execute.call_args.args[1] == ("", 2, True)
+    copy_sql = mock_cursor.copy_expert.call_args.args[0]
+    assert "WHERE npi > '' AND npi <= '1000000001' AND is_active ORDER BY npi" in copy_sql
@@ -0,0 +1,169 @@
+import io
+import json
+import azure.functions as func
+import pyarrow.parquet as pq
+import pytest
+from function_app import export_clean_csv, export_clean_data_to_parquet_partitioned
+
+
+CLEAN_ROWS = [
+    # npi, state_name, postal code, quality score
+    ("1000000001", "TEXAS", "75001", 90),
+    ("1000000002", None, "02134", 40),
+    ("1000000003", "TEXAS", "", 70),
+    ("1000000004", "NEW YORK", "10001", None),
+    ("1000000005", "TEXAS", "75002", 100),
+]
+
+
+class DummyBlockBlobClient:
+    def __init__(self):
+        self.staged = {}
+        self.committed = None
+
+    def stage_block(self, block_id, data):
+        self.staged[block_id] = data
+
+    def commit_block_list(self, block_list):
+        self.committed = b"".join(self.staged[block.id] for block in block_list)
+
+
+class DummyBlob:
+    def __init__(self, name):
+        self.name = name
+
+
+class DummyContainerClient:
+    def __init__(self, existing):
+        self.blobs = {name: None for name in existing}
+        self.deleted = []
+
+    def get_blob_client(self, blob):
+        self.blobs[blob] = DummyBlockBlobClient()
+        return self.blobs[blob]
+
+    def list_blobs(self, name_starts_with):
+        return [DummyBlob(name) for name in self.blobs if name.startswith(name_starts_with)]
+
+    def delete_blob(self, name):
+        self.deleted.append(name)
+
+
+def _csv_field(value):
+    if value is None:
+        return ""
+    return f'"{value}"' if value == "" else str(value)
+
+
+@pytest.fixture
+def export_mocks(mocker):
+    container_client = DummyContainerClient(["exp/state_name=OHIO/part-00000.parquet"])
+    blob_service_client = mocker.MagicMock()
+    blob_service_client.get_container_client.return_value = container_client
+    mocker.patch("function_app.get_blob_service_client", return_value=blob_service_client)
+
+    cursor = mocker.MagicMock()
+    conn = mocker.MagicMock()
+    conn.cursor.return_value.__enter__.return_value = cursor
+    mocker.patch("function_app.get_psycopg2_connection", return_value=conn)
+    cursor.fetchall.return_value = [("TEXAS",), (None,), ("NEW YORK",)]
+
+    queries = []
+
+    def mogrify(query, params):
+        queries.append((query, params))
+        return query.encode()
+
+    def copy_expert(sql, file):
+        query, params = queries[-1]
+        state_name = None if "state_name IS NULL" in query else params[0]
+        after_npi, page_size = params[-2:]
+        page = [
+            row for row in CLEAN_ROWS if row[1] == state_name and row[0] > after_npi
+        ][:page_size]
+        for npi, _, postal_code, score in page:
+            fields = [npi, "Provider", f"NAME {npi}", None, None, "CITY", "TX", postal_code,
+                      "COUNTY", "207Q00000X", "Allopathic", "Family Medicine", None, score]
+            file.write((",".join(_csv_field(field) for field in fields) + "\n").encode())
+
+    cursor.mogrify.side_effect = mogrify
+    cursor.copy_expert.side_effect = copy_expert
+    return container_client, conn, queries
+
+
+def _read(container_client, state):
+    data = container_client.blobs[f"exp/state_name={state}/part-00000.parquet"].committed
+    return pq.ParquetFile(io.BytesIO(data))
+
+
+def test_parquet_export_partitions_by_state(export_mocks):
+    container_client, conn, queries = export_mocks
+
+    assert export_clean_data_to_parquet_partitioned(
+        page_size=2, output_prefix="exp", row_group_size=2
+    ) is True
+
+    texas = _read(container_client, "TEXAS")
+    assert texas.metadata.num_rows == 3
+    assert [texas.metadata.row_group(i).num_rows for i in range(texas.num_row_groups)] == [2, 1]
+    assert texas.metadata.row_group(0).column(0).compression == "ZSTD"
+    npi_stats = texas.metadata.row_group(0).column(0).statistics
+    assert (npi_stats.min, npi_stats.max) == ("1000000001", "1000000003")
+    table = texas.read()
+    assert "state_name" not in table.column_names
+    # Quoted empty strings stay empty, unquoted empties are NULL
+    assert table.column("provider_postal_code_clean").to_pylist() == ["75001", "", "75002"]
+    assert table.column("taxonomy_specialization").null_count == 3
+
+    assert _read(container_client, "NEW YORK").read().column("data_quality_score").to_pylist() == [None]
+    assert _read(container_client, "__HIVE_DEFAULT_PARTITION__").metadata.num_rows == 1
+
+    # Keyset pages per state, using the (state_name, npi) index
+    assert any("state_name IS NULL" in query for query, _ in queries)
+    assert ("TEXAS", "1000000003", 2) in [params for _, params in queries]
+    assert container_client.deleted == ["exp/state_name=OHIO/part-00000.parquet"]
+    assert conn.close.called
+
+
+def test_parquet_export_failure_commits_nothing(export_mocks, mocker):
+    container_client, conn, _ = export_mocks
+    conn.cursor.return_value.__enter__.return_value.copy_expert.side_effect = Exception("DB error")
+
+    assert export_clean_data_to_parquet_partitioned(page_size=2, output_prefix="exp") is False
+    assert all(
+        blob is None or blob.committed is None for blob in container_client.blobs.values()
+    )
+    assert container_client.deleted == []
+    assert conn.close.called
+
+
+def test_parquet_export_skips_empty_states_and_quotes_values(export_mocks, mocker):
+    container_client, conn, _ = export_mocks
+    cursor = conn.cursor.return_value.__enter__.return_value
+    # OHIO has no rows left; "TX/OK=1" would otherwise add a path segment
+    cursor.fetchall.return_value = [("TEXAS",), ("OHIO",), ("TX/OK=1",)]
+    CLEAN_ROWS.append(("1000000006", "TX/OK=1", "75003", 80))
+    try:
+        assert export_clean_data_to_parquet_partitioned(
+            page_size=2, output_prefix="exp", row_group_size=2
+        ) is True
+    finally:
+        CLEAN_ROWS.pop()
+
+    assert _read(container_client, "TX%2FOK%3D1").metadata.num_rows == 1
+    assert container_client.blobs["exp/state_name=OHIO/part-00000.parquet"] is None
+    assert container_client.deleted == ["exp/state_name=OHIO/part-00000.parquet"]
+
+
+def test_parquet_export_route_failure_names_parquet(mocker):
+    mocker.patch("function_app.export_clean_data_to_parquet_partitioned", return_value=False)
+    request = func.HttpRequest(
+        method="POST",
+        url="/api/export_clean_csv",
+        body=json.dumps({"format": "parquet"}).encode(),
+    )
+
+    response = export_clean_csv(request)
+
+    assert response.status_code == 500
+    assert json.loads(response.get_body())["error"].startswith("Parquet export failed")
@@ -0,0 +1,94 @@
+import io
+import pytest
+import polars as pl
+import pyarrow.parquet as pq
+from function_app import extract_parquet_data_from_blob
+
+
+SAMPLE_DF = pl.read_csv("nppes_sample.csv", infer_schema=False)
+
+
+def _parquet_bytes():
+    buffer = io.BytesIO()
+    SAMPLE_DF.write_parquet(buffer, row_group_size=250)
+    return buffer.getvalue()
+
+
+class DummyDownload:
+    def __init__(self, data):
+        self._data = data
+
+    def readall(self):
+        return self._data
+
+
+class DummyProperties:
+    def __init__(self, size):
+        self.size = size
+
+
+class DummyRangeBlobClient:
+    def __init__(self, data):
+        self.data = data
+        self.ranges = []
+
+    def get_blob_properties(self):
+        return DummyProperties(len(self.data))
+
+    def download_blob(self, offset=None, length=None):
+        if offset is None:
+            raise AssertionError("Parquet extraction must use ranged reads")
+        self.ranges.append((offset, length))
+        return DummyDownload(self.data[offset : offset + length])
+
+
+class DummyBlobServiceClient:
+    def __init__(self, blob_client):
+        self.blob_client = blob_client
+
+    def get_blob_client(self, container, blob):
+        return self.blob_client
+
+
+@pytest.fixture
+def range_blob(monkeypatch):
+    blob_client = DummyRangeBlobClient(_parquet_bytes())
+    monkeypatch.setattr(
+        "function_app.get_blob_service_client",
+        lambda: DummyBlobServiceClient(blob_client),
+    )
+    return blob_client
+
+
+def test_extract_parquet_data_from_blob_ranged_reads(range_blob):
+    lazy_df = extract_parquet_data_from_blob("fake.parquet")
+    df = lazy_df.collect()
+
+    assert df.height == SAMPLE_DF.height
+    assert df.columns[:2] == ["npi", "entity_type_code"]
+    assert df["npi"].to_list() == SAMPLE_DF["NPI"].to_list()
+    # No single read should pull the whole file
+    assert max(length for _, length in range_blob.ranges) < len(range_blob.data)
+
+
+def test_extract_parquet_data_from_blob_projection(range_blob):
+    lazy_df = extract_parquet_data_from_blob("fake.parquet")
+
+    range_blob.ranges.clear()
+    df = lazy_df.select("npi").collect()
+
+    assert df["npi"].to_list() == SAMPLE_DF["NPI"].to_list()
+    # Only the NPI column chunks are fetched, not the other 329 columns
+    assert sum(length for _, length in range_blob.ranges) < len(range_blob.data) // 10
+
+
+def test_extract_parquet_data_from_blob_skip_rows(range_blob, mocker):
+    read_row_group = mocker.spy(pq.ParquetFile, "read_row_group")
+
+    # Row groups of 250 rows: the first two are skipped from the footer alone
+    df = extract_parquet_data_from_blob("fake.parquet", skip_rows=600).collect()
+
+    assert df["npi"].to_list() == SAMPLE_DF["NPI"].to_list()[600:]
+    assert [call.args[1] for call in read_row_group.call_args_list] == list(
+        range(2, (SAMPLE_DF.height + 249) // 250)
+    )
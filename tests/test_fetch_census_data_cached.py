@@ -0,0 +1,141 @@
+import json
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from function_app import fetch_census_data_cached
+
+
+CENSUS_PAYLOAD = [
+    ["NAME", "B01001_001E", "state", "county"],
+    ["Davidson County, Tennessee", "709786", "47", "037"],
+]
+
+
+class StubCensusHandler(BaseHTTPRequestHandler):
+    # Class attributes are reset by the fixture for each test
+    requests_seen = []
+    failures_before_success = 0
+
+    def do_GET(self):
+        handler = type(self)
+        handler.requests_seen.append(dict(self.headers))
+        if handler.failures_before_success > 0:
+            handler.failures_before_success -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == '"acs-2023"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(CENSUS_PAYLOAD).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", '"acs-2023"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DummyDownload:
+    def __init__(self, data):
+        self._data = data
+
+    def readall(self):
+        return self._data
+
+
+class DummyCacheBlobClient:
+    def __init__(self):
+        self.data = None
+
+    def download_blob(self):
+        if self.data is None:
+            raise Exception("BlobNotFound")
+        return DummyDownload(self.data)
+
+    def upload_blob(self, data, overwrite=False):
+        self.data = data
+
+
+class DummyBlobServiceClient:
+    def __init__(self, blob_client):
+        self.blob_client = blob_client
+
+    def get_blob_client(self, container, blob):
+        return self.blob_client
+
+
+@pytest.fixture
+def census_server():
+    StubCensusHandler.requests_seen = []
+    StubCensusHandler.failures_before_success = 0
+    server = HTTPServer(("127.0.0.1", 0), StubCensusHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/data/2023/acs/acs5"
+    server.shutdown()
+
+
+@pytest.fixture
+def cache_blob(monkeypatch):
+    blob_client = DummyCacheBlobClient()
+    monkeypatch.setattr(
+        "function_app.get_blob_service_client",
+        lambda: DummyBlobServiceClient(blob_client),
+    )
+    monkeypatch.setattr("function_app.time.sleep", lambda seconds: None)
+    return blob_client
+
+
+def test_fetch_retries_transient_failures_and_caches(census_server, cache_blob):
+    StubCensusHandler.failures_before_success = 2
+
+    data, content_hash = fetch_census_data_cached(url=census_server)
+
+    assert data == CENSUS_PAYLOAD
+    assert len(StubCensusHandler.requests_seen) == 3
+    cache = json.loads(cache_blob.data)
+    assert cache["etag"] == '"acs-2023"'
+    assert cache["content_hash"] == content_hash
+
+
+def test_fresh_cache_skips_request(census_server, cache_blob):
+    first_data, first_hash = fetch_census_data_cached(url=census_server)
+    data, content_hash = fetch_census_data_cached(url=census_server, ttl_hours=24)
+
+    assert (data, content_hash) == (first_data, first_hash)
+    assert len(StubCensusHandler.requests_seen) == 1
+
+
+def test_expired_cache_is_revalidated(census_server, cache_blob):
+    _, first_hash = fetch_census_data_cached(url=census_server)
+    cache = json.loads(cache_blob.data)
+    cache["fetched_at"] = (datetime.now(timezone.utc) - timedelta(days=400)).isoformat()
+    cache_blob.data = json.dumps(cache).encode()
+
+    data, content_hash = fetch_census_data_cached(url=census_server, ttl_hours=24)
+
+    assert StubCensusHandler.requests_seen[-1]["If-None-Match"] == '"acs-2023"'
+    assert data == CENSUS_PAYLOAD
+    assert content_hash == first_hash
+
+
+def test_api_key_is_not_cached_or_logged(census_server, cache_blob, caplog):
+    StubCensusHandler.failures_before_success = 1
+    url = f"{census_server}?get=NAME&key=secret-census-key"
+
+    with caplog.at_level(logging.WARNING, logger="function_app"):
+        fetch_census_data_cached(url=url)
+
+    assert "retrying" in caplog.text
+    assert "secret-census-key" not in caplog.text
+    assert b"secret-census-key" not in cache_blob.data
+    # A fresh cache is still matched to its URL
+    fetch_census_data_cached(url=url, ttl_hours=24)
+    assert len(StubCensusHandler.requests_seen) == 2
@@ -1,9 +1,10 @@
+import json
 import pytest
 import polars
 from function_app import load_api_data
 
 
-def test_load_api_data_missing_population(mocker):
+def test_load_api_data_missing_population(mocker, decode_binary_copy, text_column_types):
     mock_data = [
     ["NAME", "B01001_001E", "state", "county"],
     ["Test County, USA", "12345", "47", "001"],
@@ -16,15 +17,26 @@ def test_load_api_data_missing_population(mocker):
     mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
 
     mocker.patch("function_app.get_psycopg2_connection", return_value=mock_conn)
+    text_column_types["population"] = "int4"
 
-    load_api_data(mock_data)
+    assert load_api_data(mock_data) == 2
 
-    assert mock_cursor.copy_from.called
-    args, kwargs = mock_cursor.copy_from.call_args
-    written_data = args[0].getvalue()  
-    lines = [line for line in written_data.strip().split("\n") if line]
-    assert len(lines) == 2
-    for line in lines:
-        assert "\t\t" not in line 
-    assert "Test County, USA\t12345\t47\t001" in lines[0]
-    assert "Another County, USA\t67890\t47\t003" in lines[1]
\ No newline at end of file
+    assert mock_cursor.copy_expert.called
+    sql, payload = mock_cursor.copy_expert.call_args.args
+    assert sql == (
+        "COPY census_county_population (name, population, state_fips, county_fips) "
+        "FROM STDIN WITH (FORMAT BINARY)"
+    )
+    rows = decode_binary_copy(payload.getvalue())
+    assert rows == [
+        (b"Test County, USA", (12345).to_bytes(4, "big"), b"47", b"001"),
+        (b"Another County, USA", (67890).to_bytes(4, "big"), b"47", b"003"),
+    ]
+
+    # The row without a population is kept in load_rejects with its reason
+    reject_sql, reject_payload = mock_cursor.copy_expert.call_args_list[0].args
+    assert reject_sql.startswith("COPY load_rejects (target_table, source_name, run_id, reason_code,")
+    (reject,) = decode_binary_copy(reject_payload.getvalue())
+    assert reject[0:2] == (b"census_county_population", b"census_acs5_county_population")
+    assert reject[3:5] == (b"population_not_numeric", b"003")
+    assert json.loads(reject[5])["name"] == "Another County, USA"
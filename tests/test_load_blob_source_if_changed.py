@@ -0,0 +1,53 @@
+import pytest
+from function_app import load_blob_source_if_changed
+
+
+@pytest.fixture
+def manifest(mocker):
+    mocker.patch(
+        "function_app.get_blob_fingerprint", return_value=('"0x8DC"', "2025-04-13")
+    )
+    unchanged = mocker.patch("function_app.is_source_unchanged", return_value=True)
+    invalidate = mocker.patch("function_app.invalidate_source_load")
+    record = mocker.patch("function_app.record_source_load")
+    return unchanged, invalidate, record
+
+
+def test_unchanged_source_is_skipped(manifest, mocker):
+    _, invalidate, record = manifest
+    load = mocker.MagicMock(return_value=10)
+
+    assert load_blob_source_if_changed({}, "nucc_taxonomy", "taxonomy.csv", load) is False
+    assert not load.called
+    assert not invalidate.called
+    assert not record.called
+
+
+def test_changed_source_is_loaded_and_recorded(manifest, mocker):
+    unchanged, invalidate, record = manifest
+    unchanged.return_value = False
+    load = mocker.MagicMock(return_value=10)
+
+    assert load_blob_source_if_changed({}, "nucc_taxonomy", "taxonomy.csv", load) is True
+    invalidate.assert_called_once_with("nucc_taxonomy")
+    record.assert_called_once_with("nucc_taxonomy", "taxonomy.csv", '"0x8DC"', "2025-04-13", 10)
+
+
+@pytest.mark.parametrize("force_reload", [True, ["nucc_taxonomy"]])
+def test_force_reload_overrides_manifest(manifest, mocker, force_reload):
+    load = mocker.MagicMock(return_value=10)
+
+    body = {"force_reload": force_reload}
+    assert load_blob_source_if_changed(body, "nucc_taxonomy", "taxonomy.csv", load) is True
+    assert load.called
+
+
+def test_failed_load_is_not_recorded(manifest, mocker):
+    unchanged, invalidate, record = manifest
+    unchanged.return_value = False
+    load = mocker.MagicMock(side_effect=Exception("DB error"))
+
+    with pytest.raises(Exception, match="DB error"):
+        load_blob_source_if_changed({}, "nucc_taxonomy", "taxonomy.csv", load)
+    assert invalidate.called
+    assert not record.called
@@ -0,0 +1,114 @@
+import polars as pl
+from function_app import load_chunked_blob_data_to_postgres
+
+
+def _mock_connection(mocker):
+    mock_cursor = mocker.MagicMock()
+    mock_conn = mocker.MagicMock()
+    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+    mocker.patch("function_app.get_psycopg2_connection", return_value=mock_conn)
+    return mock_conn, mock_cursor
+
+
+def test_load_chunked_blob_data_to_postgres_single_pass(mocker, text_column_types, decode_binary_copy):
+    mock_conn, mock_cursor = _mock_connection(mocker)
+    lazy_df = pl.DataFrame({"col1": [str(i) for i in range(250)]}).lazy()
+    collect_batches = mocker.spy(pl.LazyFrame, "collect_batches")
+
+    load_chunked_blob_data_to_postgres(lazy_df, target_table="test_table", chunk_size=100)
+
+    assert collect_batches.call_count == 1
+    assert mock_cursor.copy_expert.call_count == 3
+    copied_rows = [
+        len(decode_binary_copy(call.args[1].getvalue()))
+        for call in mock_cursor.copy_expert.call_args_list
+    ]
+    assert copied_rows == [100, 100, 50]
+    mock_cursor.execute.assert_called_once_with("CALL truncate_table(%s)", ("test_table",))
+    assert mock_conn.commit.call_count == 3
+    assert mock_conn.close.called
+
+
+def test_load_chunked_blob_data_to_postgres_empty_source(mocker, text_column_types):
+    mock_conn, mock_cursor = _mock_connection(mocker)
+    lazy_df = pl.DataFrame({"col1": []}, schema={"col1": pl.Utf8}).lazy()
+
+    load_chunked_blob_data_to_postgres(lazy_df, target_table="test_table", chunk_size=100)
+
+    assert not mock_cursor.execute.called
+    assert not mock_cursor.copy_expert.called
+    assert mock_conn.close.called
+
+
+def test_load_chunked_blob_data_to_postgres_bulk_load(mocker, text_column_types):
+    mock_conn, mock_cursor = _mock_connection(mocker)
+    lazy_df = pl.DataFrame({"col1": [str(i) for i in range(250)]}).lazy()
+
+    load_chunked_blob_data_to_postgres(
+        lazy_df, target_table="test_table", chunk_size=100, bulk_load=True
+    )
+
+    # Chunks go to the unlogged staging copy, which replaces the table at the end
+    assert [call.args for call in mock_cursor.execute.call_args_list] == [
+        ("CALL prepare_staging_table(%s, %s)", ("test_table", True)),
+        ("CALL swap_staging_table(%s)", ("test_table",)),
+    ]
+    assert all(
+        call.args[0].startswith("COPY test_table_staging ")
+        for call in mock_cursor.copy_expert.call_args_list
+    )
+    assert mock_conn.commit.call_count == 4
+
+
+def test_load_chunked_blob_data_to_postgres_resumes_run(mocker, text_column_types, decode_binary_copy):
+    mock_conn, mock_cursor = _mock_connection(mocker)
+    # Earlier attempts of the run rejected 7 rows
+    mock_cursor.fetchone.return_value = (7,)
+    mocker.patch(
+        "function_app.get_run_checkpoints",
+        return_value=[("offset:0", None, 0, 100), ("offset:100", None, 100, 100)],
+    )
+    lazy_df = pl.DataFrame({"col1": [str(i) for i in range(250)]}).lazy()
+
+    total = load_chunked_blob_data_to_postgres(
+        lazy_df, target_table="test_table", chunk_size=100, run_id="run-1"
+    )
+
+    # Only the uncommitted tail is copied and the table is not truncated again;
+    # the rows rejected by the whole run are left out of the total
+    assert total == 243
+    (copy_call,) = mock_cursor.copy_expert.call_args_list
+    rows = decode_binary_copy(copy_call.args[1].getvalue())
+    assert [row[0].decode() for row in rows] == [str(i) for i in range(200, 250)]
+    (checkpoint_call,) = [
+        call
+        for call in mock_cursor.execute.call_args_list
+        if "INSERT INTO pipeline_checkpoints" in call.args[0]
+    ]
+    assert checkpoint_call.args[1] == ("run-1", "test_table", "offset:200", None, None, 200, 50, None)
+
+
+def test_load_chunked_blob_data_to_postgres_resumes_from_source(
+    mocker, text_column_types, decode_binary_copy
+):
+    mock_conn, mock_cursor = _mock_connection(mocker)
+    mocker.patch(
+        "function_app.get_run_checkpoints",
+        return_value=[("offset:0", None, 0, 100), ("offset:100", None, 100, 100)],
+    )
+    mock_cursor.fetchone.return_value = (0,)
+    lazy_df = pl.DataFrame({"col1": [str(i) for i in range(250)]}).lazy()
+    resume_source = mocker.Mock(return_value=lazy_df.slice(200))
+    slice_ = mocker.spy(pl.LazyFrame, "slice")
+
+    total = load_chunked_blob_data_to_postgres(
+        lazy_df, target_table="test_table", chunk_size=100, run_id="run-1", resume_source=resume_source
+    )
+
+    # The source is reopened past the committed rows instead of read and sliced
+    assert total == 250
+    resume_source.assert_called_once_with(200)
+    assert not slice_.called
+    (copy_call,) = mock_cursor.copy_expert.call_args_list
+    rows = decode_binary_copy(copy_call.args[1].getvalue())
+    assert [row[0].decode() for row in rows] == [str(i) for i in range(200, 250)]
@@ -0,0 +1,204 @@
+import io
+import threading
+import pytest
+import polars as pl
+from function_app import load_parquet_blob_parallel_to_postgres
+
+
+# Providers that pass the load validation rules (the sample stores entity
+# types as "1.0" and has deactivated NPIs without one)
+SAMPLE_DF = (
+    pl.read_csv("nppes_sample.csv", infer_schema=False)
+    .with_columns(pl.col("Entity Type Code").str.replace(r"\.0$", ""))
+    .filter(pl.col("Entity Type Code").is_not_null())
+)
+
+
+class DummyDownload:
+    def __init__(self, data):
+        self._data = data
+
+    def readall(self):
+        return self._data
+
+
+class DummyProperties:
+    def __init__(self, size, etag):
+        self.size = size
+        self.etag = etag
+        self.last_modified = None
+
+
+class DummyRangeBlobClient:
+    def __init__(self, data):
+        self.data = data
+        self.etag = '"v1"'
+
+    def get_blob_properties(self):
+        return DummyProperties(len(self.data), self.etag)
+
+    def download_blob(self, offset=None, length=None):
+        return DummyDownload(self.data[offset : offset + length])
+
+
+class DummyBlobServiceClient:
+    def __init__(self, blob_client):
+        self.blob_client = blob_client
+
+    def get_blob_client(self, container, blob):
+        return self.blob_client
+
+
+@pytest.fixture
+def parquet_blob(monkeypatch):
+    buffer = io.BytesIO()
+    SAMPLE_DF.write_parquet(buffer, row_group_size=100)
+    blob_client = DummyRangeBlobClient(buffer.getvalue())
+    monkeypatch.setattr(
+        "function_app.get_blob_service_client",
+        lambda: DummyBlobServiceClient(blob_client),
+    )
+    return blob_client
+
+
+@pytest.fixture
+def connections(mocker, text_column_types, decode_binary_copy):
+    lock = threading.Lock()
+    state = {"connections": [], "copied_npis": [], "taxonomy_rows": 0, "fail_on_npi": None}
+
+    def copy_expert(sql, payload):
+        rows = decode_binary_copy(payload.getvalue())
+        if sql.startswith("COPY provider_taxonomy_staging "):
+            with lock:
+                state["taxonomy_rows"] += len(rows)
+            return
+        npis = [row[0].decode() for row in rows]
+        if state["fail_on_npi"] in npis:
+            raise Exception("DB error")
+        with lock:
+            state["copied_npis"].extend(npis)
+
+    def new_connection():
+        cursor = mocker.MagicMock()
+        cursor.copy_expert.side_effect = copy_expert
+        # Row counts, e.g. of a staging table emptied by a crash
+        cursor.fetchone.return_value = (0,)
+        conn = mocker.MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cursor
+        with lock:
+            state["connections"].append((conn, cursor))
+        return conn
+
+    mocker.patch("function_app.get_psycopg2_connection", side_effect=new_connection)
+    return state
+
+
+def _procedure_calls(connections):
+    return [
+        call.args
+        for _, cursor in connections["connections"]
+        for call in cursor.execute.call_args_list
+        if not call.args[0].startswith("DELETE FROM load_rejects")
+    ]
+
+
+def test_parallel_load_swaps_staging_table(parquet_blob, connections):
+    total = load_parquet_blob_parallel_to_postgres(
+        "fake.parquet", target_table="nppes_providers", max_workers=3
+    )
+
+    assert total == SAMPLE_DF.height
+    assert sorted(connections["copied_npis"]) == sorted(SAMPLE_DF["NPI"].to_list())
+    # One coordinator connection plus one per worker
+    assert len(connections["connections"]) == 4
+    # provider_taxonomy is rebuilt from the same batches and swapped with it
+    assert connections["taxonomy_rows"] > 0
+    assert _procedure_calls(connections) == [
+        ("CALL prepare_staging_table(%s, %s)", ("nppes_providers", False)),
+        ("CALL prepare_staging_table(%s, %s)", ("provider_taxonomy", False)),
+        ("CALL swap_staging_table(%s)", ("nppes_providers",)),
+        ("CALL swap_staging_table(%s)", ("provider_taxonomy",)),
+    ]
+    for conn, cursor in connections["connections"][1:]:
+        assert {call.args[0].split()[1] for call in cursor.copy_expert.call_args_list} == {
+            "nppes_providers_staging",
+            "provider_taxonomy_staging",
+        }
+        assert conn.close.called
+
+
+def test_parallel_load_failure_keeps_live_table(parquet_blob, connections):
+    connections["fail_on_npi"] = SAMPLE_DF["NPI"][450]
+
+    with pytest.raises(Exception, match="DB error"):
+        load_parquet_blob_parallel_to_postgres(
+            "fake.parquet", target_table="nppes_providers", max_workers=3
+        )
+
+    assert _procedure_calls(connections) == [
+        ("CALL prepare_staging_table(%s, %s)", ("nppes_providers", False)),
+        ("CALL prepare_staging_table(%s, %s)", ("provider_taxonomy", False)),
+        ("CALL drop_staging_table(%s)", ("nppes_providers",)),
+        ("CALL drop_staging_table(%s)", ("provider_taxonomy",)),
+    ]
+    assert all(conn.close.called for conn, _ in connections["connections"])
+
+
+def test_parallel_load_resume_skips_loaded_row_groups(parquet_blob, connections, mocker):
+    # Row groups of 100 rows; the first two were committed by an earlier attempt
+    mocker.patch(
+        "function_app.get_run_checkpoints",
+        return_value=[
+            ("staging", None, None, None),
+            ("row_group:0", 0, None, 100),
+            ("row_group:1", 1, None, 100),
+        ],
+    )
+
+    total = load_parquet_blob_parallel_to_postgres(
+        "fake.parquet", target_table="nppes_providers", max_workers=3, run_id="run-1"
+    )
+
+    assert total == SAMPLE_DF.height
+    assert sorted(connections["copied_npis"]) == sorted(SAMPLE_DF["NPI"].to_list()[200:])
+    calls = _procedure_calls(connections)
+    assert not any("prepare_staging_table" in call[0] for call in calls)
+    checkpointed = sorted(
+        call[1][2] for call in calls if "INSERT INTO pipeline_checkpoints" in call[0]
+    )
+    remaining = (SAMPLE_DF.height + 99) // 100
+    assert checkpointed == sorted(
+        [f"row_group:{n}" for n in range(2, remaining)] + ["swapped"]
+    )
+    # Checkpoints carry the blob's ETag; ones from another version are dropped first
+    (discard,) = [
+        call for call in calls if call[0].lstrip().startswith("DELETE FROM pipeline_checkpoints")
+    ]
+    assert discard[1] == ("run-1", "nppes_providers", '"v1"')
+    assert all(
+        call[1][-1] == '"v1"' for call in calls if "INSERT INTO pipeline_checkpoints" in call[0]
+    )
+
+
+def test_parallel_bulk_load_resume_restarts_when_staging_was_emptied(
+    parquet_blob, connections, mocker
+):
+    # The unlogged staging table lost the two checkpointed row groups in a crash
+    mocker.patch(
+        "function_app.get_run_checkpoints",
+        return_value=[
+            ("staging", None, None, None),
+            ("row_group:0", 0, None, 100),
+            ("row_group:1", 1, None, 100),
+        ],
+    )
+
+    total = load_parquet_blob_parallel_to_postgres(
+        "fake.parquet", target_table="nppes_providers", max_workers=3, bulk_load=True, run_id="run-1"
+    )
+
+    assert total == SAMPLE_DF.height
+    assert sorted(connections["copied_npis"]) == sorted(SAMPLE_DF["NPI"].to_list())
+    calls = _procedure_calls(connections)
+    assert ("SELECT COUNT(*) FROM nppes_providers_staging",) in calls
+    assert ("CALL prepare_staging_table(%s, %s)", ("nppes_providers", True)) in calls
@@ -0,0 +1,76 @@
+import json
+import polars as pl
+from function_app import (
+    NPPES_PROVIDER_RULES,
+    load_chunked_blob_data_to_postgres,
+    measure_stage,
+    validate_batch,
+)
+
+
+def test_validate_batch_rejects_with_first_failing_rule():
+    df = pl.DataFrame(
+        {
+            "npi": ["1234567890", None, "12345", " 1234567891 ", "123456789X"],
+            "entity_type_code": ["1", None, "2", "x", None],
+        }
+    )
+
+    valid, rejects = validate_batch(df, NPPES_PROVIDER_RULES)
+
+    assert valid.columns == df.columns
+    assert valid["npi"].to_list() == ["1234567890"]
+    assert rejects.select("npi", "reason_code").rows() == [
+        (None, "npi_missing"),
+        ("12345", "npi_not_10_digits"),
+        (" 1234567891 ", "entity_type_not_numeric"),
+        ("123456789X", "npi_not_10_digits"),
+    ]
+
+
+def test_chunked_load_routes_rejects_to_load_rejects(mocker, text_column_types, decode_binary_copy):
+    mock_cursor = mocker.MagicMock()
+    mock_conn = mocker.MagicMock()
+    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+    mocker.patch("function_app.get_psycopg2_connection", return_value=mock_conn)
+    copied = []
+    mock_cursor.copy_expert.side_effect = lambda sql, file: copied.append((sql, file.read()))
+    lazy_df = pl.DataFrame(
+        {
+            "npi": [f"{i:010d}" for i in range(8)] + ["", "12"],
+            "entity_type_code": ["1"] * 7 + [None, "2", "2"],
+        }
+    ).lazy()
+
+    with measure_stage("nppes_providers") as metrics:
+        total = load_chunked_blob_data_to_postgres(
+            lazy_df, target_table="nppes_providers_delta", chunk_size=5, source_name="update.csv"
+        )
+
+    assert total == 7
+    mock_cursor.execute.assert_any_call(
+        "DELETE FROM load_rejects WHERE target_table = %s AND source_name IS NOT DISTINCT FROM %s",
+        ("nppes_providers_delta", "update.csv"),
+    )
+    loaded = [
+        row[0].decode()
+        for sql, payload in copied
+        if sql.startswith("COPY nppes_providers_delta ")
+        for row in decode_binary_copy(payload)
+    ]
+    assert loaded == [f"{i:010d}" for i in range(7)]
+    rejects = [
+        row
+        for sql, payload in copied
+        if sql.startswith("COPY load_rejects ")
+        for row in decode_binary_copy(payload)
+    ]
+    assert [(row[1], row[3], row[4]) for row in rejects] == [
+        (b"update.csv", b"entity_type_missing", b"0000000007"),
+        (b"update.csv", b"npi_missing", b""),
+        (b"update.csv", b"npi_not_10_digits", b"12"),
+    ]
+    assert json.loads(rejects[0][5]) == {"npi": "0000000007", "entity_type_code": None}
+    assert metrics.counters["rejected:npi_missing"] == 1
+    assert metrics.counters["rejected:npi_not_10_digits"] == 1
+    assert metrics.counters["rejected:entity_type_missing"] == 1
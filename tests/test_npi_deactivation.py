@@ -0,0 +1,42 @@
+import datetime
+import polars as pl
+from function_app import apply_npi_deactivations, extract_npi_deactivation_file_from_blob
+
+
+def test_extract_npi_deactivation_file_parses_dates_and_dedupes(mocker):
+    lazy_df = pl.DataFrame(
+        {
+            "npi": [" 1000000001", "1000000002", "", "1000000001"],
+            "deactivated_on": ["01/15/2024", "2023-11-02", "", "02/01/2024 "],
+        }
+    ).lazy()
+    extract_csv = mocker.patch("function_app.extract_csv_data_from_blob", return_value=lazy_df)
+
+    df = extract_npi_deactivation_file_from_blob("NPPES Deactivated NPI Report.csv").collect()
+
+    args, _ = extract_csv.call_args
+    assert args[1] == ["NPI", "NPPES Deactivation Date"]
+    assert df.schema["deactivated_on"] == pl.Date
+    # The row without an NPI is left for the load validation to reject
+    assert df.sort("npi").rows() == [
+        ("", None),
+        ("1000000001", datetime.date(2024, 2, 1)),
+        ("1000000002", datetime.date(2023, 11, 2)),
+    ]
+
+
+def test_apply_npi_deactivations_loads_list_and_merges(mocker):
+    load_stage = mocker.patch("function_app.load_npi_deactivation_stage", return_value=True)
+    mock_cursor = mocker.MagicMock()
+    mock_cursor.fetchone.return_value = (42,)
+    mock_conn = mocker.MagicMock()
+    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+    mocker.patch("function_app.get_psycopg2_connection", return_value=mock_conn)
+
+    body = {"deactivation_file": "deactivated.csv"}
+    assert apply_npi_deactivations(body) == 42
+
+    load_stage.assert_called_once_with(body)
+    mock_cursor.execute.assert_called_once_with("CALL apply_npi_deactivations(NULL, TRUE)")
+    assert mock_conn.commit.called
+    assert mock_conn.close.called
@@ -0,0 +1,90 @@
+import json
+import azure.functions as func
+import pytest
+import function_app
+from function_app import PROVIDER_QUERY_COLUMNS, TTLLRUCache, npi_lookup
+
+
+def test_ttl_lru_cache_evicts_and_expires():
+    now = [0.0]
+    cache = TTLLRUCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.put_many({"a": 1, "b": 2})
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # "b" is the least recently used
+
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+    now[0] = 10.0
+    assert cache.get("a") is TTLLRUCache.MISSING
+    assert len(cache) == 1
+
+
+def test_ttl_lru_cache_drops_values_read_before_clear():
+    cache = TTLLRUCache(max_entries=10, ttl_seconds=60)
+    generation = cache.generation
+    cache.clear()
+    cache.put("a", 1, generation)
+
+    assert cache.get("a") is TTLLRUCache.MISSING
+
+
+def _row(npi, county_fips="47037", taxonomy_codes=("207RC0000X",)):
+    values = {column: None for column in PROVIDER_QUERY_COLUMNS}
+    values.update(npi=npi, entity_name="JOHN SMITH MD", county_fips=county_fips)
+    return tuple(values[column] for column in PROVIDER_QUERY_COLUMNS) + (list(taxonomy_codes),)
+
+
+@pytest.fixture
+def lookup_cursor(query_cursor, mocker):
+    # The lookup caches are process-wide; start and end each test empty
+    function_app.invalidate_query_caches()
+    mocker.patch.dict(function_app._query_cache_version, {"data_version": None, "checked_at": None})
+    yield query_cursor
+    function_app.invalidate_query_caches()
+
+
+def _post(body):
+    return npi_lookup(
+        func.HttpRequest(method="POST", url="/api/npi_lookup", body=json.dumps(body).encode())
+    )
+
+
+def _queries(cursor, fragment):
+    return [call.args for call in cursor.execute.call_args_list if fragment in call.args[0]]
+
+
+def test_npi_lookup_batches_misses_and_caches(lookup_cursor):
+    lookup_cursor.fetchone.return_value = (None,)
+    lookup_cursor.fetchall.side_effect = [
+        [_row("1000000001")],
+        [("207RC0000X", "Allopathic & Osteopathic Physicians", "Internal Medicine", "Cardiovascular Disease")],
+        [("47037", "44180", "34980", "Nashville-Davidson--Murfreesboro--Franklin, TN")],
+    ]
+
+    response = _post({"npis": ["1000000001", "1000000002", "1000000001"]})
+
+    assert response.status_code == 200
+    payload = json.loads(response.get_body())
+    assert payload["not_found"] == ["1000000002"]
+    assert payload["cache_hits"] == 0
+    (provider,) = payload["providers"]
+    assert provider["taxonomies"][0]["specialization"] == "Cardiovascular Disease"
+    assert provider["ssa_code"] == "44180"
+    ((sql, params),) = _queries(lookup_cursor, "npi = ANY(%s)")
+    assert params == (["1000000001", "1000000002"],)
+
+    # Both NPIs, found or not, and the reference tables now come from the cache
+    lookup_cursor.execute.reset_mock()
+    response = _post({"npis": ["1000000002", "1000000001"]})
+
+    payload = json.loads(response.get_body())
+    assert payload["cache_hits"] == 2
+    assert [p["npi"] for p in payload["providers"]] == ["1000000001"]
+    assert not lookup_cursor.execute.called
+
+
+@pytest.mark.parametrize("body", [{"npis": []}, {"npis": ["123"]}, {"npi": "1000000001"}, ["1000000001"]])
+def test_npi_lookup_rejects_bad_input(lookup_cursor, body):
+    response = _post(body)
+
+    assert response.status_code == 400
+    assert not lookup_cursor.execute.called
@@ -0,0 +1,25 @@
+import json
+import azure.functions as func
+from function_app import NPPES_Data_Cleaning, pipeline_db_connections
+
+
+def test_pipeline_db_connections_counts_the_busiest_phase():
+    assert pipeline_db_connections({}) == 4
+    # Two other loads beside the NPPES load's 8 workers and its swap connection
+    assert pipeline_db_connections({"load_parallelism": 8}) == 12
+    assert pipeline_db_connections({"max_concurrent_stages": 1, "clean_parallelism": 16}) == 17
+
+
+def test_pipeline_rejects_parallelism_over_the_connection_budget(mocker):
+    mocker.patch("function_app.MAX_DB_CONNECTIONS", 10)
+    start_run = mocker.patch("function_app.start_pipeline_run")
+    # A body cannot raise the server's limit
+    body = {"load_parallelism": 8, "max_db_connections": 100}
+
+    response = NPPES_Data_Cleaning(
+        func.HttpRequest(method="POST", url="/api/NPPES_Data_Cleaning", body=json.dumps(body).encode())
+    )
+
+    assert response.status_code == 400
+    assert "12 DB connections" in json.loads(response.get_body())["error"]
+    assert not start_run.called
@@ -0,0 +1,46 @@
+import json
+import azure.functions as func
+import pytest
+from function_app import PROVIDER_SEARCH_COLUMNS, provider_search
+
+
+def _row(npi, entity_name, score):
+    values = {column: None for column in PROVIDER_SEARCH_COLUMNS}
+    values.update(npi=npi, entity_name=entity_name, score=score)
+    return tuple(values[column] for column in PROVIDER_SEARCH_COLUMNS)
+
+
+def _get(**params):
+    return provider_search(
+        func.HttpRequest(method="GET", url="/api/provider_search", params=params, body=b"")
+    )
+
+
+def test_provider_search_ranks_trigram_matches(query_cursor):
+    query_cursor.fetchall.return_value = [
+        _row("1000000001", "JOHN SMITH MD", 0.9),
+        _row("1000000002", "JON SMYTH DO", 0.7),
+    ]
+
+    response = _get(q="  SMITH   John cardio ", state="tn", limit="10")
+
+    assert response.status_code == 200
+    assert response.headers["X-Row-Count"] == "2"
+    lines = [json.loads(line) for line in response.get_body().decode().splitlines()]
+    assert [(line["npi"], line["score"]) for line in lines] == [("1000000001", 0.9), ("1000000002", 0.7)]
+    sql, params = query_cursor.execute.call_args.args
+    assert "WHERE %s <%% search_text AND provider_state = %s" in sql
+    assert sql.endswith("ORDER BY score DESC, data_quality_score DESC, npi LIMIT %s")
+    assert params == ["smith john cardio", "smith john cardio", "TN", 10]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{"q": "ab"}, {"q": "smith", "limit": "500"}, {"q": "smith", "entity_type": "x"}],
+)
+def test_provider_search_rejects_bad_input(query_cursor, params):
+    response = _get(**params)
+
+    assert response.status_code == 400
+    assert "error" in json.loads(response.get_body())
+    assert not query_cursor.execute.called
@@ -0,0 +1,88 @@
+import base64
+import json
+import azure.functions as func
+import pytest
+from function_app import PROVIDER_QUERY_COLUMNS, provider_filters_digest, providers
+
+
+def _row(npi):
+    values = {column: None for column in PROVIDER_QUERY_COLUMNS}
+    values.update(npi=npi, entity_type="Provider", county_fips="47037", data_quality_score=90)
+    return tuple(values[column] for column in PROVIDER_QUERY_COLUMNS)
+
+
+def _get(**params):
+    return providers(func.HttpRequest(method="GET", url="/api/providers", params=params, body=b""))
+
+
+def test_providers_pages_with_opaque_cursor(query_cursor):
+    query_cursor.fetchall.return_value = [_row("1000000001"), _row("1000000002"), _row("1000000003")]
+
+    response = _get(county_fips="47037", taxonomy_code="207rc0000x", limit="2")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_body().decode().splitlines()]
+    assert [line["npi"] for line in lines] == ["1000000001", "1000000002"]
+    sql, params = query_cursor.execute.call_args.args
+    assert "npi > %s AND county_fips = %s AND primary_taxonomy_code = %s" in sql
+    assert sql.endswith("ORDER BY npi LIMIT %s")
+    assert params == ["", "47037", "207RC0000X", 3]
+
+    next_cursor = response.headers["X-Next-Cursor"]
+    query_cursor.fetchall.return_value = [_row("1000000003")]
+    response = _get(county_fips="47037", taxonomy_code="207rc0000x", limit="2", cursor=next_cursor)
+
+    assert query_cursor.execute.call_args.args[1][0] == "1000000002"
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_providers_csv_output(query_cursor):
+    query_cursor.fetchall.return_value = [_row("1000000001")]
+
+    response = _get(state="tn", entity_type="provider", min_quality="80", format="csv")
+
+    lines = response.get_body().decode().splitlines()
+    assert response.mimetype == "text/csv"
+    assert lines[0] == ",".join(PROVIDER_QUERY_COLUMNS)
+    assert lines[1].startswith("1000000001,Provider,")
+    assert query_cursor.execute.call_args.args[1] == ["", "TN", 1, 80, 1001]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"entity_type": "hospital"},
+        {"min_quality": "high"},
+        {"limit": "0"},
+        {"format": "xml"},
+        {"cursor": "not-a-cursor"},
+    ],
+)
+def test_providers_rejects_bad_requests(query_cursor, params):
+    response = _get(**params)
+
+    assert response.status_code == 400
+    assert not query_cursor.execute.called
+
+
+def test_providers_rejects_cursor_from_other_filters(query_cursor):
+    query_cursor.fetchall.return_value = [_row("1000000001"), _row("1000000002")]
+    next_cursor = _get(state="TN", limit="1").headers["X-Next-Cursor"]
+
+    response = _get(state="KY", limit="1", cursor=next_cursor)
+
+    assert response.status_code == 400
+    assert "different filters" in json.loads(response.get_body())["error"]
+
+
+@pytest.mark.parametrize("after", [1000000001, "100000000", "1000000001' OR '1'='1", None])
+def test_providers_rejects_cursor_with_bad_npi(query_cursor, after):
+    payload = json.dumps({"after": after, "filters": provider_filters_digest({})})
+    cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+
+    response = _get(cursor=cursor)
+
+    assert response.status_code == 400
+    assert json.loads(response.get_body())["error"] == "Invalid cursor"
+    assert not query_cursor.execute.called
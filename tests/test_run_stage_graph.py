@@ -0,0 +1,48 @@
+import threading
+import pytest
+from function_app import run_stage_graph
+
+
+def test_run_stage_graph_runs_independent_stages_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    order = []
+
+    def source(name):
+        def stage():
+            # Both sources must be running at the same time to pass the barrier
+            barrier.wait()
+            order.append(name)
+        return stage
+
+    stages = {
+        "small_reference": ((), source("small_reference")),
+        "large_provider": ((), source("large_provider")),
+        "clean": (("small_reference", "large_provider"), lambda: order.append("clean")),
+        "export": (("clean",), lambda: order.append("export")),
+    }
+
+    durations = run_stage_graph(stages, max_workers=2)
+
+    assert set(durations) == set(stages)
+    assert order[-2:] == ["clean", "export"]
+
+
+def test_run_stage_graph_stops_dependents_after_failure():
+    ran = []
+
+    def failing_load():
+        raise RuntimeError("load failed")
+
+    stages = {
+        "load": ((), failing_load),
+        "clean": (("load",), lambda: ran.append("clean")),
+    }
+
+    with pytest.raises(RuntimeError, match="load failed"):
+        run_stage_graph(stages)
+    assert ran == []
+
+
+def test_run_stage_graph_rejects_unknown_dependencies():
+    with pytest.raises(ValueError, match="unknown stages"):
+        run_stage_graph({"clean": (("missing",), lambda: None)})
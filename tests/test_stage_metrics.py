@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import polars as pl
+import pytest
+from function_app import (
+    copy_dataframe_to_postgres,
+    count_metric,
+    measure_stage,
+    record_db_notice,
+    run_stage_graph,
+    submit_in_context,
+)
+
+
+def test_measure_stage_counts_copies_from_worker_threads(mocker, text_column_types):
+    cursor = mocker.MagicMock()
+    df = pl.DataFrame({"col1": ["a", "b", "c"]})
+
+    with measure_stage("load") as metrics:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                submit_in_context(executor, copy_dataframe_to_postgres, cursor, df, "test_table")
+                for _ in range(2)
+            ]
+            for future in futures:
+                future.result()
+
+    assert metrics.status == "completed"
+    assert metrics.counters["rows_copied"] == 6
+    assert metrics.counters["copy_bytes"] > 0
+    assert metrics.wall_seconds >= 0
+    # Nothing is counted outside a stage
+    count_metric("rows_copied", 10)
+    assert metrics.counters["rows_copied"] == 6
+
+
+def test_measure_stage_reports_peak_rss_of_the_stage_alone():
+    with measure_stage("large") as large:
+        buffer = np.ones(256 * 1024 * 1024 // 8)
+    del buffer
+    with measure_stage("small") as small:
+        pass
+
+    # ru_maxrss would carry the first stage's peak over into the second
+    assert large.peak_rss_mb - small.peak_rss_mb > 128
+
+
+def test_record_db_notice_parses_procedure_duration():
+    with measure_stage("clean") as metrics:
+        record_db_notice(
+            "NOTICE:  NPPES data cleaning completed at 2025-04-13 02:00:00. "
+            "Records processed: 12. Duration: 00:01:02.5\n"
+        )
+        record_db_notice("NOTICE:  Export view created successfully\n")
+
+    assert metrics.db_notices == [
+        {
+            "message": "NPPES data cleaning completed at 2025-04-13 02:00:00. "
+            "Records processed: 12. Duration: 00:01:02.5",
+            "duration_seconds": 62.5,
+        },
+        {"message": "Export view created successfully", "duration_seconds": None},
+    ]
+
+
+def test_run_stage_graph_collects_stage_metrics():
+    stage_metrics = {}
+
+    def failing_load():
+        count_metric("rows_copied", 5)
+        raise RuntimeError("load failed")
+
+    with pytest.raises(RuntimeError, match="load failed"):
+        run_stage_graph(
+            {"load": ((), failing_load), "clean": (("load",), lambda: None)},
+            stage_metrics=stage_metrics,
+        )
+
+    assert list(stage_metrics) == ["load"]
+    assert stage_metrics["load"].status == "failed"
+    assert stage_metrics["load"].counters["rows_copied"] == 5
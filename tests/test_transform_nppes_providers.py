@@ -0,0 +1,298 @@
+import os
+import re
+import uuid
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+from function_app import (
+    CLEAN_NPPES_COLUMNS,
+    NPPES_COLUMN_MAPPING,
+    NPPES_RELEVANT_COLUMNS,
+    copy_dataframe_to_postgres,
+    get_psycopg2_connection,
+    load_clean_nppes_providers_to_postgres,
+    transform_nppes_providers,
+)
+
+SQL_SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), "..", "sql_scripts")
+# What clean_and_populate_nppes_data needs, in the README's order
+CLEAN_PROCEDURE_SCRIPTS = [
+    "01_create_nppes_providers.sql",
+    "02_create_nucc_taxonomy.sql",
+    "06_function_get_primary_taxonomy_code.sql",
+    "07_create_nppes_providers_clean.sql",
+    "08_sp_clean_nppes_data.sql",
+    "16_sp_staging_table_swap.sql",
+    "19_sp_build_zip_primary_county.sql",
+]
+
+
+# Raw rows as the pipeline extracts them: missing values are nulls. The sample
+# was re-saved with float-formatted entity codes ("1.0"), which the procedure's
+# numeric check rejects; CMS ships them as "1"/"2"
+RAW_DF = (
+    pl.read_csv("nppes_sample.csv", infer_schema=False)
+    .select(NPPES_RELEVANT_COLUMNS)
+    .rename(NPPES_COLUMN_MAPPING)
+    .with_columns(pl.col("entity_type_code").str.replace(r"\.0$", ""))
+)
+
+TAXONOMY_DF = pl.DataFrame(
+    {
+        "code": ["207Q00000X", "207RC0000X", "251G00000X"],
+        "grouping": [
+            "Allopathic & Osteopathic Physicians",
+            "Allopathic & Osteopathic Physicians",
+            "Agencies",
+        ],
+        "classification": ["Family Medicine", "Internal Medicine", "Hospice Care, Community Based"],
+        "specialization": [None, "Cardiovascular Disease", None],
+    }
+)
+
+ZIP_COUNTY_DF = pl.DataFrame(
+    {
+        "zip": ["35209", "68847", "32204"],
+        "county_fips": ["01073", "31019", "12031"],
+        "county_name": ["Jefferson", "Buffalo", "Duval"],
+        "state_name": ["Alabama", "Nebraska", "Florida"],
+        "zip_county_ratio": ["1.0000000000", "0.9876543210", "1.0000000000"],
+    }
+)
+
+
+def reference_clean_row(raw, taxonomy, counties):
+    """Row-by-row port of upsert_clean_nppes_providers, with None for NULL."""
+    npi = (raw["npi"] or "").strip(" ")
+    entity_type_code = (raw["entity_type_code"] or "").strip(" ")
+    if not re.fullmatch(r"[0-9]{10}", npi) or not re.fullmatch(r"[0-9]+", entity_type_code):
+        return None
+
+    def left_trim(column, n):
+        return None if raw[column] is None else raw[column].strip(" ")[:n]
+
+    row = {"npi": npi, "entity_type_code": int(entity_type_code)}
+    for column, n in [
+        ("provider_organization_name", 200), ("provider_last_name", 100),
+        ("provider_first_name", 100), ("provider_middle_name", 100),
+        ("provider_name_prefix", 10), ("provider_name_suffix", 10),
+        ("provider_credential", 50), ("provider_other_organization_name", 200),
+        ("provider_location_address_1", 100), ("provider_location_address_2", 100),
+        ("provider_city", 100), ("provider_state", 50), ("provider_postal_code", 10),
+    ]:
+        row[column] = left_trim(column, n)
+    zip_match = re.match(r"^([0-9]{5})", (raw["provider_postal_code"] or "").strip(" "))
+    row["provider_postal_code_clean"] = zip_match.group(1) if zip_match else None
+
+    primary = None
+    for slot in range(1, 16):
+        if raw[f"healthcare_provider_primary_taxonomy_switch_{slot}"] == "Y":
+            primary = raw[f"healthcare_provider_taxonomy_code_{slot}"]
+            break
+    else:
+        primary = next(
+            (raw[f"healthcare_provider_taxonomy_code_{slot}"] for slot in (1, 2, 3)
+             if raw[f"healthcare_provider_taxonomy_code_{slot}"] is not None),
+            None,
+        )
+    row["primary_taxonomy_code"] = primary
+
+    code = row["entity_type_code"]
+    row["entity_type"] = {1: "Individual", 2: "Organization"}.get(code, "Unknown")
+    if code == 1:
+        parts = [row[c] for c in (
+            "provider_name_prefix", "provider_first_name", "provider_middle_name",
+            "provider_last_name", "provider_name_suffix", "provider_credential",
+        ) if row[c] not in (None, "")]
+        name = " ".join(parts).strip(" ")
+    elif code == 2:
+        name = row["provider_organization_name"] or "Unknown Organization"
+    else:
+        name = "Unknown"
+    row["entity_name"] = name[:200]
+
+    row["has_complete_address"] = all(
+        row[c] is not None
+        for c in ("provider_location_address_1", "provider_city", "provider_state")
+    )
+    row["has_valid_zip"] = row["provider_postal_code_clean"] is not None
+    row["has_primary_taxonomy"] = primary not in (None, "")
+    nt = taxonomy.get(primary, {})
+    row["taxonomy_grouping"] = nt.get("grouping")
+    row["taxonomy_classification"] = nt.get("classification")
+    row["taxonomy_specialization"] = nt.get("specialization")
+    zpc = counties.get(row["provider_postal_code_clean"], {})
+    for column in ("county_fips", "county_name", "state_name", "zip_county_ratio"):
+        row[column] = zpc.get(column)
+    row["has_county_info"] = row["county_fips"] is not None and row["county_name"] is not None
+    row["data_quality_score"] = 20 * sum([
+        row["entity_name"] != "", row["has_complete_address"], row["has_valid_zip"],
+        row["has_primary_taxonomy"], row["has_county_info"],
+    ])
+    return row
+
+
+def test_transform_matches_cleaning_procedure_on_sample():
+    taxonomy = {r["code"]: r for r in TAXONOMY_DF.iter_rows(named=True)}
+    counties = {r["zip"]: r for r in ZIP_COUNTY_DF.iter_rows(named=True)}
+    expected = [
+        row
+        for raw in RAW_DF.iter_rows(named=True)
+        if (row := reference_clean_row(raw, taxonomy, counties)) is not None
+    ]
+
+    result = transform_nppes_providers(RAW_DF.lazy(), TAXONOMY_DF, ZIP_COUNTY_DF).collect()
+
+    assert result.columns == CLEAN_NPPES_COLUMNS
+    assert len(result) == len(expected) > 0
+    result_rows = sorted(result.iter_rows(named=True), key=lambda r: r["npi"])
+    expected_rows = sorted(expected, key=lambda r: r["npi"])
+    for result_row, expected_row in zip(result_rows, expected_rows):
+        assert result_row == {c: expected_row[c] for c in CLEAN_NPPES_COLUMNS}
+
+
+def test_transform_rejects_invalid_npis_and_builds_names():
+    raw_df = pl.DataFrame(
+        {column: [None, None, None] for column in NPPES_COLUMN_MAPPING.values()},
+        schema={column: pl.Utf8 for column in NPPES_COLUMN_MAPPING.values()},
+    ).with_columns(
+        npi=pl.Series([" 1234567890 ", "12345", "2345678901"]),
+        entity_type_code=pl.Series(["1", "1", "2"]),
+        provider_first_name=pl.Series(["  Ada ", None, None]),
+        provider_last_name=pl.Series(["Lovelace", None, None]),
+        provider_credential=pl.Series(["", None, None]),
+        provider_location_address_1=pl.Series(["1 Main St", None, None]),
+        provider_city=pl.Series(["Birmingham", None, None]),
+        provider_state=pl.Series(["AL", None, None]),
+        provider_postal_code=pl.Series(["352091234", None, "9266"]),
+        healthcare_provider_taxonomy_code_2=pl.Series(["207Q00000X", None, None]),
+        healthcare_provider_primary_taxonomy_switch_2=pl.Series(["Y", None, None]),
+    )
+
+    result = transform_nppes_providers(raw_df.lazy(), TAXONOMY_DF, ZIP_COUNTY_DF).collect()
+
+    individual, organization = result.sort("npi").iter_rows(named=True)
+    assert individual["npi"] == "1234567890"
+    assert individual["entity_name"] == "Ada Lovelace"
+    assert individual["provider_postal_code_clean"] == "35209"
+    assert individual["taxonomy_classification"] == "Family Medicine"
+    assert individual["county_name"] == "Jefferson"
+    assert individual["data_quality_score"] == 100
+    assert organization["entity_name"] == "Unknown Organization"
+    assert organization["provider_postal_code_clean"] is None
+    assert organization["primary_taxonomy_code"] is None
+    assert not organization["has_complete_address"]
+    assert organization["data_quality_score"] == 20
+
+
+def test_clean_load_copies_into_clean_table(mocker, text_column_types, decode_binary_copy):
+    mocker.patch(
+        "function_app.fetch_clean_lookup_tables",
+        return_value=(TAXONOMY_DF, ZIP_COUNTY_DF),
+    )
+    mock_conn = mocker.patch("function_app.get_psycopg2_connection").return_value
+    cursor = mock_conn.cursor.return_value.__enter__.return_value
+    copied = []
+    cursor.copy_expert.side_effect = lambda sql, file: copied.append((sql, file.read()))
+
+    text_column_types.update(
+        entity_type_code="int4",
+        zip_county_ratio="numeric",
+        has_complete_address="bool",
+        has_valid_zip="bool",
+        has_primary_taxonomy="bool",
+        has_county_info="bool",
+        data_quality_score="int4",
+    )
+
+    total = load_clean_nppes_providers_to_postgres(RAW_DF.lazy(), chunk_size=300)
+
+    clean_copies = [
+        (sql, payload) for sql, payload in copied if sql.startswith("COPY nppes_providers_clean ")
+    ]
+    assert len(clean_copies) > 1
+    assert total == sum(len(decode_binary_copy(payload)) for _, payload in clean_copies)
+    cursor.execute.assert_any_call("CALL truncate_table(%s)", ("nppes_providers_clean",))
+    cursor.execute.assert_any_call("CALL truncate_table(%s)", ("provider_taxonomy",))
+    assert clean_copies[0][0].startswith("COPY nppes_providers_clean (npi, entity_type_code,")
+    assert clean_copies[0][0].endswith("WITH (FORMAT BINARY)")
+    mock_conn.commit.assert_called_once()
+
+
+def test_bulk_clean_load_copies_into_staging_tables(mocker, text_column_types):
+    mocker.patch(
+        "function_app.fetch_clean_lookup_tables",
+        return_value=(TAXONOMY_DF, ZIP_COUNTY_DF),
+    )
+    mock_conn = mocker.patch("function_app.get_psycopg2_connection").return_value
+    cursor = mock_conn.cursor.return_value.__enter__.return_value
+    copied = []
+    cursor.copy_expert.side_effect = lambda sql, file: copied.append(sql)
+
+    load_clean_nppes_providers_to_postgres(RAW_DF.lazy(), chunk_size=300, bulk_load=True)
+
+    copy_targets = {sql.split(" ")[1] for sql in copied if not sql.startswith("COPY load_rejects ")}
+    assert copy_targets == {"nppes_providers_clean_staging", "provider_taxonomy_staging"}
+    for table in ("nppes_providers_clean", "provider_taxonomy"):
+        cursor.execute.assert_any_call("CALL begin_bulk_rebuild(%s)", (table,))
+        cursor.execute.assert_any_call("CALL finish_bulk_rebuild(%s)", (table,))
+    mock_conn.commit.assert_called_once()
+
+
+@pytest.fixture
+def scratch_schema_cursor():
+    """
+    Cursor on the POSTGRES_* database with the cleaning scripts created in a
+    schema of their own. Nothing is committed, so the rollback drops it all.
+    Point it at a test database: the scripts' DROP ... IF EXISTS of older
+    objects also search public.
+    """
+    schema = f"clean_parity_{uuid.uuid4().hex[:8]}"
+    pg_conn = get_psycopg2_connection()
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(f"CREATE SCHEMA {schema}")
+            # public stays on the path for extensions such as pg_trgm
+            cursor.execute(f"SET LOCAL search_path TO {schema}, public")
+            for script in CLEAN_PROCEDURE_SCRIPTS:
+                with open(os.path.join(SQL_SCRIPTS_DIR, script)) as sql_file:
+                    cursor.execute(sql_file.read())
+            yield cursor
+    finally:
+        pg_conn.rollback()
+        pg_conn.close()
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not os.getenv("POSTGRES_HOST"), reason="needs a Postgres test database")
+def test_transform_matches_clean_procedure_in_postgres(scratch_schema_cursor):
+    cursor = scratch_schema_cursor
+    # The procedure and the transform read the same raw rows and lookups
+    copy_dataframe_to_postgres(cursor, RAW_DF, "nppes_providers")
+    copy_dataframe_to_postgres(cursor, TAXONOMY_DF, "nucc_taxonomy")
+    copy_dataframe_to_postgres(
+        cursor,
+        ZIP_COUNTY_DF.with_columns(assignment_strategy=pl.lit("population")),
+        "zip_primary_county",
+    )
+    cursor.execute("CALL clean_and_populate_nppes_data()")
+    # Compared as text, which is how both sides reach the COPY into the table
+    cursor.execute(
+        f"SELECT {', '.join(f'{column}::TEXT' for column in CLEAN_NPPES_COLUMNS)} "
+        "FROM nppes_providers_clean ORDER BY npi"
+    )
+    expected = pl.DataFrame(
+        cursor.fetchall(),
+        schema={column: pl.Utf8 for column in CLEAN_NPPES_COLUMNS},
+        orient="row",
+    )
+
+    result = (
+        transform_nppes_providers(RAW_DF.lazy(), TAXONOMY_DF, ZIP_COUNTY_DF)
+        .collect()
+        .with_columns(pl.all().cast(pl.Utf8))
+        .sort("npi")
+    )
+
+    assert len(expected) > 0
+    assert_frame_equal(result, expected)
@@ -0,0 +1,64 @@
+import polars as pl
+from function_app import (
+    NPPES_COLUMN_MAPPING,
+    load_chunked_blob_data_to_postgres,
+    unpivot_provider_taxonomy,
+)
+
+
+RAW_COLUMNS = list(NPPES_COLUMN_MAPPING.values())
+
+
+def _raw_providers(**columns):
+    return pl.DataFrame(
+        {column: columns.get(column, [None] * len(columns["npi"])) for column in RAW_COLUMNS},
+        schema={column: pl.Utf8 for column in RAW_COLUMNS},
+    )
+
+
+def test_unpivot_keeps_non_empty_slots():
+    raw_df = _raw_providers(
+        npi=["1234567890", "2345678901"],
+        healthcare_provider_taxonomy_code_1=["207Q00000X", ""],
+        healthcare_provider_primary_taxonomy_switch_1=["N", None],
+        healthcare_provider_taxonomy_code_3=[" 207RC0000X ", None],
+        healthcare_provider_primary_taxonomy_switch_3=["Y", None],
+        healthcare_provider_taxonomy_code_15=[None, "251G00000X"],
+    )
+
+    result = unpivot_provider_taxonomy(raw_df).sort("npi", "slot")
+
+    assert result.columns == ["npi", "slot", "code", "is_primary"]
+    assert result.rows() == [
+        ("1234567890", 1, "207Q00000X", False),
+        ("1234567890", 3, "207RC0000X", True),
+        ("2345678901", 15, "251G00000X", False),
+    ]
+
+
+def test_chunked_load_fills_provider_taxonomy(mocker, text_column_types, decode_binary_copy):
+    mock_cursor = mocker.MagicMock()
+    mock_conn = mocker.MagicMock()
+    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+    mocker.patch("function_app.get_psycopg2_connection", return_value=mock_conn)
+    raw_df = _raw_providers(
+        npi=[f"{i:010d}" for i in range(150)],
+        entity_type_code=["1"] * 150,
+        healthcare_provider_taxonomy_code_1=["207Q00000X"] * 150,
+        healthcare_provider_taxonomy_code_2=["207RC0000X"] * 150,
+    )
+
+    load_chunked_blob_data_to_postgres(raw_df.lazy(), target_table="nppes_providers", chunk_size=100)
+
+    truncated = [
+        call.args[1]
+        for call in mock_cursor.execute.call_args_list
+        if call.args[0].startswith("CALL truncate_table")
+    ]
+    assert truncated == [("nppes_providers",), ("provider_taxonomy",)]
+    taxonomy_rows = sum(
+        len(decode_binary_copy(call.args[1].getvalue()))
+        for call in mock_cursor.copy_expert.call_args_list
+        if call.args[0].startswith("COPY provider_taxonomy ")
+    )
+    assert taxonomy_rows == 300